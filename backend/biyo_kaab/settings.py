@@ -111,3 +111,82 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 PLANNER_DEFAULT_HORIZON_DAYS = int(os.getenv("PLANNER_DEFAULT_HORIZON_DAYS", "7"))
 
 
+
+# In-process device_id -> Sensor cache used by the ingest paths
+SENSOR_CACHE_SIZE = int(os.getenv("SENSOR_CACHE_SIZE", "10000"))
+SENSOR_CACHE_TTL_SECONDS = int(os.getenv("SENSOR_CACHE_TTL_SECONDS", "300"))
+
+# Limits for the gateway batch ingest endpoint (/api/iot/ingest/batch/)
+IOT_BATCH_MAX_ROWS = int(os.getenv("IOT_BATCH_MAX_ROWS", "5000"))
+IOT_BATCH_MAX_BYTES = int(os.getenv("IOT_BATCH_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Device-supplied timestamps: allowed clock drift into the future and how far back a backfill may reach
+IOT_MAX_CLOCK_SKEW_SECONDS = int(os.getenv("IOT_MAX_CLOCK_SKEW_SECONDS", "300"))
+IOT_MAX_BACKFILL_DAYS = int(os.getenv("IOT_MAX_BACKFILL_DAYS", "30"))
+
+# Per-device sliding window of recent sequence numbers used to drop retransmitted readings
+DEDUP_WINDOW_SIZE = int(os.getenv("DEDUP_WINDOW_SIZE", "1024"))
+DEDUP_MAX_DEVICES = int(os.getenv("DEDUP_MAX_DEVICES", "50000"))
+
+# Deadband write suppression (opt-in: suppressed readings are not stored) and its defaults; per-sensor overrides live on Sensor
+DEADBAND_ENABLED = os.getenv("DEADBAND_ENABLED", "false").lower() == "true"
+DEADBAND_DISTANCE_CM = float(os.getenv("DEADBAND_DISTANCE_CM", "0.5"))
+DEADBAND_HUMIDITY = float(os.getenv("DEADBAND_HUMIDITY", "1.0"))
+DEADBAND_TEMPERATURE = float(os.getenv("DEADBAND_TEMPERATURE", "0.5"))
+DEADBAND_HEARTBEAT_SECONDS = int(os.getenv("DEADBAND_HEARTBEAT_SECONDS", "900"))
+
+# Sensor history API: raw readings up to this span, rollups beyond it, at most this many points per response
+HISTORY_RAW_MAX_HOURS = int(os.getenv("HISTORY_RAW_MAX_HOURS", "24"))
+HISTORY_MAX_POINTS = int(os.getenv("HISTORY_MAX_POINTS", "1000"))
+# Default page size of cursor-paginated raw history (capped at HISTORY_MAX_POINTS)
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "200"))
+# History requests with ?points=N read raw readings (then downsample) for ranges up to this many days
+HISTORY_DOWNSAMPLE_RAW_DAYS = int(os.getenv("HISTORY_DOWNSAMPLE_RAW_DAYS", "31"))
+
+# Retention tiers in days (0 keeps forever; raw must exceed IOT_MAX_BACKFILL_DAYS, as seq claims go with raw rows). prune_readings archives raw rows to READING_ARCHIVE_DIR before deleting them.
+RETENTION_RAW_DAYS = int(os.getenv("RETENTION_RAW_DAYS", "90"))
+RETENTION_HOURLY_DAYS = int(os.getenv("RETENTION_HOURLY_DAYS", "365"))
+RETENTION_DAILY_DAYS = int(os.getenv("RETENTION_DAILY_DAYS", "0"))
+READING_ARCHIVE_DIR = os.getenv("READING_ARCHIVE_DIR", str(BASE_DIR / "archive"))
+
+# compact_readings packs raw readings older than this into per-sensor/day compressed chunks (seq claims stay, so re-sent backfill is still rejected)
+CHUNK_COMPACT_AFTER_DAYS = int(os.getenv("CHUNK_COMPACT_AFTER_DAYS", "31"))
+
+# Most devices accepted by the batch status / history endpoints in one request
+BATCH_MAX_DEVICES = int(os.getenv("BATCH_MAX_DEVICES", "100"))
+
+# Live event bus between ingest and streaming workers: auto | postgres | socket | local (see water/services/events.py)
+EVENT_BUS = os.getenv("EVENT_BUS", "auto")
+EVENT_CHANNEL = os.getenv("EVENT_CHANNEL", "water_readings")
+EVENT_SOCKET_DIR = os.getenv("EVENT_SOCKET_DIR", "/tmp/biyo_kaab-events")
+# Live stream (/api/stream/) heartbeat interval, connection lifetime and per-process connection cap
+LIVE_STREAM_HEARTBEAT_SECONDS = int(os.getenv("LIVE_STREAM_HEARTBEAT_SECONDS", "15"))
+LIVE_STREAM_MAX_SECONDS = int(os.getenv("LIVE_STREAM_MAX_SECONDS", "3600"))
+LIVE_STREAM_MAX_CONNECTIONS = int(os.getenv("LIVE_STREAM_MAX_CONNECTIONS", "1000"))
+
+# Django cache: local memory per process by default; point CACHE_BACKEND/CACHE_LOCATION at a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache, redis://localhost:6379/0) to share it between workers
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "biyo-kaab"),
+    }
+}
+# Dashboard summary cache: safety-net lifetime of a summary, and how long concurrent loads wait for one rebuild
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "300"))
+DASHBOARD_CACHE_LOCK_SECONDS = int(os.getenv("DASHBOARD_CACHE_LOCK_SECONDS", "10"))
+
+# Regional risk board (/api/regions/risk/): default and largest page size
+RISK_BOARD_PAGE_SIZE = int(os.getenv("RISK_BOARD_PAGE_SIZE", "100"))
+RISK_BOARD_MAX_PAGE_SIZE = int(os.getenv("RISK_BOARD_MAX_PAGE_SIZE", "1000"))
+
+# Monte Carlo supply projections (/api/projections/): default and largest scenario count and horizon, cache lifetime
+PROJECTION_SCENARIOS = int(os.getenv("PROJECTION_SCENARIOS", "5000"))
+PROJECTION_MAX_SCENARIOS = int(os.getenv("PROJECTION_MAX_SCENARIOS", "50000"))
+PROJECTION_HORIZON_DAYS = int(os.getenv("PROJECTION_HORIZON_DAYS", "90"))
+PROJECTION_MAX_HORIZON_DAYS = int(os.getenv("PROJECTION_MAX_HORIZON_DAYS", "365"))
+PROJECTION_CACHE_TTL_SECONDS = int(os.getenv("PROJECTION_CACHE_TTL_SECONDS", "900"))
+
+# Tank assumed for level sensors without a TankGeometry: an upright cylinder of this height and capacity
+TANK_DEFAULT_HEIGHT_CM = float(os.getenv("TANK_DEFAULT_HEIGHT_CM", "100"))
+TANK_DEFAULT_CAPACITY_L = float(os.getenv("TANK_DEFAULT_CAPACITY_L", "200"))
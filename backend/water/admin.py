@@ -34,6 +34,13 @@ class SensorAdmin(admin.ModelAdmin):
     search_fields = ("device_id",)
 
 
+@admin.register(models.TankGeometry)
+class TankGeometryAdmin(admin.ModelAdmin):
+    list_display = ("sensor", "shape", "storage", "height_cm", "diameter_cm", "updated_at")
+    list_filter = ("shape",)
+    search_fields = ("sensor__device_id",)
+
+
 @admin.register(models.SensorReading)
 class SensorReadingAdmin(admin.ModelAdmin):
     list_display = ("sensor", "recorded_at", "distance_cm", "water_level", "humidity", "temperature")
@@ -56,7 +63,7 @@ class ClimateSnapshotAdmin(admin.ModelAdmin):
 
 @admin.register(models.WaterPlan)
 class WaterPlanAdmin(admin.ModelAdmin):
-    list_display = ("owner", "status", "date_start", "date_end", "created_at")
+    list_display = ("owner", "status", "date_start", "date_end", "created_at", "updated_at")
     list_filter = ("status",)
 
 
@@ -6,6 +6,9 @@ class WaterConfig(AppConfig):
     name = "water"
     verbose_name = "Water & Sensor Management"
 
+    def ready(self):
+        from water import checks, signals  # noqa: F401
+
 
 
 
@@ -0,0 +1,18 @@
+"""System checks for settings that only misbehave at runtime."""
+from django.conf import settings
+from django.core.checks import Error, register
+
+from water.services.retention import backfill_conflict
+
+
+@register()
+def check_backfill_window(app_configs, **kwargs):
+    """
+    Raw retention must not drop the seq claims of readings a backfill can
+    still re-send. Compaction is not checked: claims outlive it.
+    """
+    errors = []
+    problem = settings.RETENTION_RAW_DAYS and backfill_conflict("RETENTION_RAW_DAYS", settings.RETENTION_RAW_DAYS)
+    if problem:
+        errors.append(Error(problem, hint="Raise RETENTION_RAW_DAYS (0 keeps raw readings forever).", id="water.E002"))
+    return errors
@@ -0,0 +1,96 @@
+"""
+Django management command to benchmark the downsampled history path.
+
+Usage: python manage.py benchmark_downsample [--rows 1000000] [--points 500]
+
+Seeds a synthetic tank level series (drift, daily cycle, noise and occasional
+refill spikes) for one sensor, spread over HISTORY_DOWNSAMPLE_RAW_DAYS, the
+longest range the endpoint downsamples from raw readings. Then times
+``downsampled_series`` end to end, the way ``/api/sensors/history/?points=N``
+calls it: loading the range, the LTTB or min/max selection and fetching the
+chosen rows. Fails if a method exceeds the budget, so it can gate CI. The
+seeded rows are rolled back.
+"""
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from water.models import Sensor, SensorReading
+from water.services.downsample import METHODS
+from water.services.history import downsampled_series
+
+START = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+SEED_BATCH = 50_000
+
+
+class Command(BaseCommand):
+    help = "Benchmarks LTTB and min/max history downsampling end to end on seeded readings"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Readings seeded (default: 1000000)")
+        parser.add_argument("--points", type=int, default=500, help="Target points (default: 500)")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per method; the best is reported (default: 3)")
+        parser.add_argument("--budget-ms", type=float, default=3000.0, help="Fail if a method takes longer (default: 3000)")
+
+    def handle(self, *args, **options):
+        rows, points = options["rows"], options["points"]
+        with transaction.atomic():
+            sensor = Sensor.objects.create(device_id="BENCH-DOWNSAMPLE", description="benchmark_downsample")
+            started = time.perf_counter()
+            step = timedelta(days=settings.HISTORY_DOWNSAMPLE_RAW_DAYS) / rows
+            self.seed(sensor, rows, step)
+            self.stdout.write(f"Seeded {rows} readings in {time.perf_counter() - started:.1f}s; downsampling to {points}")
+            try:
+                failures = [problem for method in METHODS if (problem := self.run(sensor, rows * step, method, options))]
+            finally:
+                transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError("Downsampling benchmark failed: " + "; ".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"✓ Both methods within {options['budget_ms']:.0f} ms"))
+
+    @staticmethod
+    def seed(sensor: Sensor, rows: int, step: timedelta) -> None:
+        rng = np.random.default_rng(42)
+        seconds = np.arange(rows, dtype=np.float64) * step.total_seconds()
+        levels = (
+            150
+            - np.cumsum(rng.normal(0.0, 0.05, rows))
+            + 5 * np.sin(seconds / 86400 * 2 * np.pi)
+            + np.where(rng.random(rows) < 0.0005, 40.0, 0.0)
+        )
+        # Plain INSERTs: building a million model instances for bulk_create takes minutes.
+        table = connection.ops.quote_name(SensorReading._meta.db_table)
+        sql = f"INSERT INTO {table} (sensor_id, recorded_at, distance_cm, motion_detected) VALUES (%s, %s, %s, %s)"
+        with connection.cursor() as cursor:
+            for offset in range(0, rows, SEED_BATCH):
+                batch = range(offset, min(offset + SEED_BATCH, rows))
+                moments = (connection.ops.adapt_datetimefield_value(START + index * step) for index in batch)
+                cursor.executemany(sql, [(sensor.id, moment, float(levels[index]), False) for index, moment in zip(batch, moments)])
+
+    def run(self, sensor: Sensor, span: timedelta, method: str, options) -> str | None:
+        rows, points = options["rows"], options["points"]
+        end = START + span
+        timings = []
+        for _ in range(options["repeat"]):
+            started = time.perf_counter()
+            readings, source = downsampled_series(sensor, START, end, "distance_cm", points, method)
+            timings.append((time.perf_counter() - started) * 1000)
+        best = min(timings)
+        self.stdout.write(
+            f"  {method:<7} best {best:7.1f} ms  median {sorted(timings)[len(timings) // 2]:7.1f} ms  "
+            f"-> {len(readings)} of {source} points"
+        )
+        moments = [reading.recorded_at for reading in readings]
+        if source != rows or len(readings) > points or moments != sorted(moments):
+            return f"{method}: invalid selection"
+        if (moments[0], moments[-1]) != (START, START + (rows - 1) * (span / rows)):
+            return f"{method}: endpoints not kept"
+        if best > options["budget_ms"]:
+            return f"{method}: {best:.1f} ms > {options['budget_ms']:.0f} ms budget"
+        return None
@@ -0,0 +1,140 @@
+"""
+Django management command to benchmark the per-profile dashboard path against summarize_profiles.
+
+Usage: python manage.py benchmark_engines [--profiles 2000] [--repeat 3]
+
+Seeds synthetic households (locations with climate, storages, sensors with
+latest readings, demand units) into the database, then times both full
+paths from a profile queryset to the figures: the scalar engines once per
+profile as the dashboard runs them (DashboardSummaryView.build_summary,
+queries included), and summarize_profiles over the whole queryset. Fails
+unless every figure matches exactly. The seeded rows are rolled back.
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from water.models import (
+    ClimateSnapshot,
+    Location,
+    Sensor,
+    SensorLatest,
+    UserProfile,
+    WaterDemandUnit,
+    WaterStorage,
+    WaterSystem,
+)
+from water.services.batch_engines import summarize_profiles
+from water.services.constraint_engine import NO_RAINFALL
+from water.services.demand_engine import CATEGORIES
+from water.views.dashboard import DashboardSummaryView
+
+
+def _liters(rng: random.Random, high: int) -> Decimal:
+    return Decimal(rng.randrange(0, high * 100)) / 100
+
+
+class Command(BaseCommand):
+    help = "Benchmarks per-profile dashboard summaries against summarize_profiles, queries included, and checks they agree"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profiles", type=int, default=2_000, help="Synthetic households (default: 2000)")
+        parser.add_argument("--repeat", type=int, default=3, help="Batch runs; the best is reported (default: 3)")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            profiles = self.seed(random.Random(42), options["profiles"])
+            self.stdout.write(f"Summarizing {profiles.count()} profiles")
+            mismatches = self.compare(profiles, options["repeat"])
+            transaction.set_rollback(True)
+
+        if mismatches:
+            raise CommandError(f"summarize_profiles disagrees with the dashboard engines on {mismatches} profiles")
+        self.stdout.write(self.style.SUCCESS(f"✓ All {options['profiles']} profiles match exactly"))
+
+    def seed(self, rng: random.Random, count: int):
+        """Bulk-insert ``count`` households (no signals fire) and return their profiles."""
+        locations = Location.objects.bulk_create(Location(name=f"Benchmark {index}", region="Benchmark") for index in range(20))
+        ClimateSnapshot.objects.bulk_create(
+            ClimateSnapshot(location=location, season="gu", days_until_rainfall=rng.randint(0, 60))
+            for location in locations
+            if rng.random() < 0.8
+        )
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(username=f"benchmark-{index}") for index in range(count)
+        )
+        profiles = UserProfile.objects.bulk_create(
+            UserProfile(user=user, user_type=UserProfile.UserType.FARMER, location=rng.choice([None, *locations]))
+            for user in users
+        )
+        systems = WaterSystem.objects.bulk_create(
+            WaterSystem(name="Benchmark", system_type=WaterSystem.SystemType.FIXED_FOG_NET, owner=profile)
+            for profile in profiles
+        )
+        WaterStorage.objects.bulk_create(
+            WaterStorage(system=system, current_volume_liters=_liters(rng, 5000), capacity_liters=Decimal("5000"))
+            for system in systems
+            for _ in range(rng.randint(0, 3))
+        )
+        sensors = Sensor.objects.bulk_create(
+            Sensor(system=system, device_id=f"BENCH{system.id}-{index}")
+            for system in systems
+            for index in range(rng.randint(0, 2))
+        )
+        now = timezone.now()
+        SensorLatest.objects.bulk_create(
+            SensorLatest(sensor=sensor, recorded_at=now, water_level=rng.choice([None, Decimal(0), _liters(rng, 80)]))
+            for sensor in sensors
+        )
+        WaterDemandUnit.objects.bulk_create(
+            WaterDemandUnit(
+                owner=profile,
+                category=rng.choice(CATEGORIES),
+                name="Benchmark",
+                daily_need_liters=_liters(rng, 60),
+                count=rng.randint(1, 20),
+            )
+            for profile in profiles
+            for _ in range(rng.randint(0, 4))
+        )
+        return UserProfile.objects.filter(id__in=[profile.id for profile in profiles])
+
+    def compare(self, profiles, repeat: int) -> int:
+        """Time both paths over ``profiles`` and return how many profiles disagree."""
+        started = time.perf_counter()
+        scalar = [DashboardSummaryView.build_summary(user_id) for user_id in profiles.order_by("id").values_list("user_id", flat=True)]
+        scalar_ms = (time.perf_counter() - started) * 1000
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            batch = summarize_profiles(profiles)
+            timings.append((time.perf_counter() - started) * 1000)
+        batch_ms = min(timings)
+
+        mismatches = 0
+        for i, summary in enumerate(scalar):
+            a, d, c = summary["availability"], summary["demand"], summary["constraints"]
+            expected = (
+                a["available_liters"], a["fog_capture_liters"], d["total_daily_liters"], *(d["totals"][k] for k in CATEGORIES),
+                c["days_of_supply"], c["risk_level"], c["days_until_rainfall"],
+            )
+            got = (
+                batch["available_liters"][i], batch["fog_capture_liters"][i], batch["total_daily_liters"][i],
+                *(batch["demand_totals"][k][i] for k in CATEGORIES),
+                batch["days_of_supply"][i], batch["risk_level"][i],
+                None if batch["days_until_rainfall"][i] == NO_RAINFALL else batch["days_until_rainfall"][i],
+            )
+            if expected != got:
+                mismatches += 1
+                if mismatches <= 5:
+                    self.stdout.write(self.style.ERROR(f"  profile {batch['profile_ids'][i]}: scalar {expected} != batch {got}"))
+
+        self.stdout.write(f"  scalar {scalar_ms:9.1f} ms  (build_summary per profile)")
+        self.stdout.write(f"  batch  {batch_ms:9.1f} ms  (summarize_profiles, {scalar_ms / batch_ms:.0f}x faster)")
+        return mismatches
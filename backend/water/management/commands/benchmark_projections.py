@@ -0,0 +1,70 @@
+"""
+Django management command to benchmark the Monte Carlo supply projections.
+
+Usage: python manage.py benchmark_projections [--profiles 200] [--scenarios 5000] [--horizon 90]
+
+Projects synthetic households (stored water, capacity, fog capture, demand
+and climate) one at a time, reports the time per profile, and fails unless
+every projection is reproducible for its seed and internally consistent:
+depletion curves never decrease, end at the overall depletion probability,
+and households without demand never run dry. Needs no database rows.
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from water.services.demand_engine import CATEGORIES
+from water.services.projection_engine import SEASON_PARAMS, ProjectionInputs, SupplyProjectionEngine
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the Monte Carlo supply projection engine and checks its results are consistent"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profiles", type=int, default=200, help="Synthetic households (default: 200)")
+        parser.add_argument("--scenarios", type=int, default=5000, help="Scenarios per projection (default: 5000)")
+        parser.add_argument("--horizon", type=int, default=90, help="Days simulated (default: 90)")
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        engine = SupplyProjectionEngine()
+        scenarios, horizon = options["scenarios"], options["horizon"]
+        timings, problems = [], []
+
+        for i in range(options["profiles"]):
+            capacity = rng.choice([1000, 5000, 20000])
+            has_demand = rng.random() < 0.9
+            inputs = ProjectionInputs(
+                available_liters=rng.uniform(0, capacity),
+                capacity_liters=capacity,
+                fog_capture_liters=rng.choice([0, rng.uniform(0, 200)]),
+                demand_liters=tuple(rng.uniform(0, 300) if has_demand else 0.0 for _ in CATEGORIES),
+                rationing=tuple(rng.choice([0.0, 0.25, 0.5]) for _ in CATEGORIES),
+                days_until_rainfall=rng.randint(0, 60) if rng.random() < 0.8 else None,
+                season=rng.choice(list(SEASON_PARAMS)),
+            )
+            started = time.perf_counter()
+            result = engine.project(inputs, scenarios, horizon, seed=i)
+            timings.append((time.perf_counter() - started) * 1000)
+
+            curve = result["depletion_probability"]
+            if engine.project(inputs, scenarios, horizon, seed=i) != result:
+                problems.append(f"profile {i}: not reproducible for its seed")
+            if any(later < earlier for earlier, later in zip(curve, curve[1:])):
+                problems.append(f"profile {i}: depletion curve decreases")
+            if curve and curve[-1] > result["probability_depleted_before_rain"] + 1e-4:
+                problems.append(f"profile {i}: curve ends above the depletion probability")
+            if not has_demand and result["probability_depleted_before_rain"]:
+                problems.append(f"profile {i}: ran dry without demand")
+
+        for problem in problems[:5]:
+            self.stdout.write(self.style.ERROR(f"  {problem}"))
+        timings.sort()
+        self.stdout.write(f"Projected {len(timings)} profiles x {scenarios} scenarios x {horizon} days")
+        self.stdout.write(f"  median {statistics.median(timings):7.2f} ms per profile")
+        self.stdout.write(f"  p95    {timings[int(len(timings) * 0.95) - 1]:7.2f} ms per profile")
+        if problems:
+            raise CommandError(f"{len(problems)} inconsistent projections")
+        self.stdout.write(self.style.SUCCESS(f"✓ All {len(timings)} projections are reproducible and consistent"))
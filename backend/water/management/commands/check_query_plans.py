@@ -0,0 +1,158 @@
+"""
+Django management command that EXPLAINs the hot endpoint queries and fails
+if any of them stops using its index.
+
+Usage: python manage.py check_query_plans
+
+The queries are not restated here: each hot path calls the service function
+(or view helper) its endpoint calls, with probe arguments, and the SQL it
+issues against the expected table is captured and EXPLAINed, so a change to
+the endpoint's query is checked as soon as it is made. Every probe runs in a
+transaction that is rolled back.
+
+Works on SQLite (EXPLAIN QUERY PLAN) and PostgreSQL. On PostgreSQL sequential
+scans are disabled for the check, because on a near-empty dev/CI database the
+planner would rightly prefer them; what matters is that the index is usable.
+Exits non-zero on any regression so it can gate CI (water/tests/test_query_plans.py
+runs it with the suite).
+"""
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from water.models import ProfileRisk, Sensor, SensorRollup, UserProfile
+from water.services.batch_engines import current_climate, latest_climate
+from water.services.history import latest_readings_many, raw_page, raw_series, rollup_series
+from water.services.latest import rebuild_latest
+from water.services.risk_board import board_page, encode_cursor
+from water.views.plans import ActivePlanView
+
+# On partitioned PostgreSQL the scans hit each partition's copy of the index, named after the partition.
+READING_RECENT_IDX = ("reading_sensor_recent_idx", "_sensor_id_recorded_at_id_idx")
+# SQLite builds unique constraints inline, under an automatic index name.
+ROLLUP_IDX = ("uniq_rollup_sensor_bucket", "sqlite_autoindex_water_sensorrollup_1")
+KEYSET_PROBE = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def hot_queries():
+    """(endpoint, call, table, expected index name or names) for every query that must stay indexed."""
+    sensor = Sensor(id=1, device_id="PROBE")
+    profile = UserProfile(id=1, user_id=1)
+    cursor = encode_cursor(ProfileRisk(days_of_supply=1.5, profile_id=1))
+    now = datetime.now(dt_timezone.utc)
+    return [
+        (
+            "rebuild_sensor_latest newest reading per sensor",
+            lambda: rebuild_latest([sensor.id]),
+            "water_sensorreading",
+            READING_RECENT_IDX,
+        ),
+        (
+            "SensorHistoryView recent readings",
+            lambda: raw_series(sensor, KEYSET_PROBE - timedelta(days=1), KEYSET_PROBE),
+            "water_sensorreading",
+            READING_RECENT_IDX,
+        ),
+        (
+            "SensorHistoryView keyset page",
+            lambda: raw_page(sensor, None, None, (KEYSET_PROBE, 1), 200),
+            "water_sensorreading",
+            READING_RECENT_IDX,
+        ),
+        (
+            "SensorHistoryView rollup buckets",
+            lambda: rollup_series(sensor, SensorRollup.Resolution.HOUR, now - timedelta(days=1), now),
+            "water_sensorrollup",
+            ROLLUP_IDX,
+        ),
+        (
+            "SensorHistoryBatchView / DeviceStatusBatchView newest readings",
+            lambda: latest_readings_many([sensor, Sensor(id=2, device_id="PROBE2")], 10),
+            "water_sensorreading",
+            READING_RECENT_IDX,
+        ),
+        (
+            "Dashboard / plans / chat climate snapshot",
+            lambda: current_climate(1),
+            "water_climatesnapshot",
+            "climate_location_recent_idx",
+        ),
+        (
+            "Batch summaries climate snapshots",
+            lambda: latest_climate([1, 2]),
+            "water_climatesnapshot",
+            "climate_location_recent_idx",
+        ),
+        (
+            "ActivePlanView active plan",
+            lambda: ActivePlanView.active_plans(profile).first(),
+            "water_waterplan",
+            "plan_owner_status_recent_idx",
+        ),
+        (
+            "RegionRiskView region page",
+            lambda: board_page(region="Sool", cursor=cursor),
+            "water_profilerisk",
+            "risk_board_region_idx",
+        ),
+        (
+            "RegionRiskView board page",
+            lambda: board_page(),
+            "water_profilerisk",
+            "risk_board_idx",
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = "EXPLAINs hot endpoint queries and fails if one stops using its index"
+
+    def handle(self, *args, **options):
+        failures = []
+        for label, call, table, index_names in hot_queries():
+            plan = self.explain(call, table)
+            if isinstance(index_names, str):
+                index_names = (index_names,)
+            index_name = next((name for name in index_names if name in plan), index_names[0])
+            problem = self.check_plan(plan, index_name) if plan else f"issues no query on {table}"
+            if problem:
+                failures.append(f"{label}: {problem}\n{plan}")
+                self.stderr.write(self.style.ERROR(f"✗ {label}: {problem}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✓ {label} uses {index_name}"))
+            if options["verbosity"] >= 2:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError("Query plan regressions:\n\n" + "\n\n".join(failures))
+
+    def explain(self, call, table: str) -> str:
+        """Run ``call`` and EXPLAIN the first query it sent that reads ``table`` ("" if none did)."""
+        quoted = connection.ops.quote_name(table)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                if connection.vendor == "postgresql":
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                with CaptureQueriesContext(connection) as captured:
+                    call()
+                sql = next((query["sql"] for query in captured if quoted in query["sql"]), None)
+                plan = ""
+                if sql is not None:
+                    prefix = "EXPLAIN QUERY PLAN" if connection.vendor == "sqlite" else "EXPLAIN"
+                    cursor.execute(f"{prefix} {sql}")
+                    plan = "\n".join(str(row[-1]) for row in cursor.fetchall())
+            transaction.set_rollback(True)
+        return plan
+
+    @staticmethod
+    def check_plan(plan: str, index_name: str) -> str | None:
+        if index_name not in plan:
+            return f"does not use {index_name}"
+        if connection.vendor == "sqlite" and "TEMP B-TREE" in plan:
+            return "sorts in a temp b-tree instead of reading the index in order"
+        if connection.vendor == "postgresql" and "Sort" in plan.split(index_name)[0]:
+            return "adds an explicit Sort above the index scan"
+        return None
@@ -0,0 +1,55 @@
+"""
+Django management command to pack old raw readings into compressed chunks.
+
+Usage: python manage.py compact_readings [--older-than-days N]
+
+Every sensor's readings for a UTC day older than the cutoff become one
+ReadingChunk row (delta-of-delta timestamps, XOR / fixed-point values,
+deflated) and the raw rows are deleted in the same transaction. The history
+API and rollups read chunks transparently. Optional: without it, raw rows
+simply stay in SensorReading until prune_readings archives them.
+
+Any cutoff is safe against re-sent backfill: the ReadingSeq claims that reject
+it stay in place until prune_readings drops them, and a late reading for an
+already packed day is merged into its chunk on the next run.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from water.services.chunks import compact_readings, day_bounds
+from water.services.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Compacts raw sensor readings older than N days into per-sensor/day compressed chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.CHUNK_COMPACT_AFTER_DAYS,
+            help=f"Compact whole UTC days older than this (default: CHUNK_COMPACT_AFTER_DAYS={settings.CHUNK_COMPACT_AFTER_DAYS})",
+        )
+        parser.add_argument("--pause-ms", type=int, default=20, help="Pause between sensor-days (default: 20)")
+
+    def handle(self, *args, **options):
+        # Only whole UTC days, so a day is normally packed once.
+        before, _ = day_bounds((timezone.now() - timedelta(days=options["older_than_days"])).date())
+        refresh_rollups()
+
+        started = time.perf_counter()
+        log = self.stdout.write if options["verbosity"] >= 2 else None
+        stats = compact_readings(before, pause=options["pause_ms"] / 1000, log=log)
+        elapsed = time.perf_counter() - started
+
+        per_reading = stats["chunk_bytes"] / stats["packed"] if stats["packed"] else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Compacted {stats['readings']} readings from {stats['sensors']} sensors into {stats['chunks']} "
+                f"chunks before {before:%Y-%m-%d} ({per_reading:.1f} bytes/reading) in {elapsed:.1f}s"
+            )
+        )
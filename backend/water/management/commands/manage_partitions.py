@@ -0,0 +1,80 @@
+"""
+Django management command to maintain monthly SensorReading partitions (PostgreSQL).
+
+Usage: python manage.py manage_partitions [--ahead 3] [--dry-run]
+
+- Creates the next --ahead months of partitions so new readings never land
+  in the DEFAULT partition (rows already there are moved on creation)
+- Archives and drops whole months older than RETENTION_RAW_DAYS, which
+  replaces row-by-row deletes for those months (RETENTION_RAW_DAYS must
+  exceed IOT_MAX_BACKFILL_DAYS)
+
+On SQLite, which has no table partitioning, it only reports that
+prune_readings / compact_readings handle retention instead.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from water.services import partitions
+from water.services.archive import month_start, next_month
+from water.services.retention import backfill_conflict, prune_seq_claims
+from water.services.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Pre-creates future monthly SensorReading partitions and archives/drops expired ones (PostgreSQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=3, help="Months of partitions to keep ready (default: 3)")
+        parser.add_argument(
+            "--raw-days",
+            type=int,
+            default=settings.RETENTION_RAW_DAYS,
+            help="Drop months entirely older than this many days (default: RETENTION_RAW_DAYS; 0 keeps all)",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+
+    def handle(self, *args, **options):
+        problem = options["raw_days"] and backfill_conflict("--raw-days", options["raw_days"])
+        if problem:
+            raise CommandError(problem)
+        if not partitions.supported():
+            self.stdout.write(
+                self.style.WARNING(
+                    "Table partitioning needs PostgreSQL (USE_POSTGRES=true); on this database "
+                    "prune_readings and compact_readings handle retention."
+                )
+            )
+            return
+        if not partitions.is_partitioned():
+            raise CommandError("water_sensorreading is not partitioned; run migrations first")
+
+        dry_run = options["dry_run"]
+        existing = partitions.partitions()
+        month = month_start(timezone.now())
+        for _ in range(options["ahead"] + 1):
+            name = partitions.partition_name(month)
+            if name not in existing:
+                if not dry_run:
+                    partitions.ensure_partition(month)
+                self.stdout.write(f"{'Would create' if dry_run else 'Created'} {name}")
+            month = next_month(month)
+
+        if options["raw_days"] > 0:
+            cutoff = timezone.now() - timedelta(days=options["raw_days"])
+            expired = {name: start for name, start in existing.items() if next_month(start) <= cutoff}
+            if expired and not dry_run:
+                refresh_rollups()
+            for name, start in sorted(expired.items(), key=lambda item: item[1]):
+                if dry_run:
+                    self.stdout.write(f"Would archive and drop {name}")
+                    continue
+                archived = partitions.drop_partition(name, start)
+                self.stdout.write(f"Archived {archived} readings and dropped {name}")
+            claims = prune_seq_claims(cutoff, dry_run=dry_run)
+            self.stdout.write(f"{'Would delete' if dry_run else 'Deleted'} {claims} seq claims older than {cutoff:%Y-%m-%d}")
+
+        self.stdout.write(self.style.SUCCESS("✓ Partitions up to date"))
@@ -7,14 +7,20 @@ This command:
 - Connects to Mosquitto MQTT broker (localhost:1883)
 - Subscribes to biyokaab/+/telemetry topics
 - Receives JSON sensor data
-- Saves it to Django database using water.SensorReading model
+- Queues parsed readings and bulk-inserts them from a writer thread
+  (flushed every --batch-size readings or --flush-ms milliseconds)
+- With --workers N, fans messages out to N worker processes partitioned by
+  device_id, so throughput scales with cores without reordering a device
+- With --spool-dir, appends raw payloads to a durable on-disk spool first and
+  replays it into the database, so DB outages or slow inserts lose nothing;
+  spools left by a run with a different --workers count are drained at startup
 - Auto-creates Sensor if it doesn't exist
 """
-import json
 import logging
-import traceback
+import signal
+import time
+
 from django.core.management.base import BaseCommand
-from django.db import transaction, close_old_connections
 
 try:
     import paho.mqtt.client as mqtt
@@ -23,7 +29,10 @@ except ImportError:
     MQTT_AVAILABLE = False
     mqtt = None
 
-from water.models import Sensor, SensorReading
+from water.services.ingest import BufferedIngest, TelemetryError, TelemetryWriter, format_stats, parse_payload
+from water.services.ingest_workers import PartitionedIngest, orphaned_spools
+from water.services.metrics import metrics
+from water.services.spool import Spool, SpoolDrainer, drain_spool
 
 
 logger = logging.getLogger(__name__)
@@ -36,6 +45,11 @@ class Command(BaseCommand):
         super().__init__(*args, **kwargs)
         self.client = None
         self.connected = False
+        self.buffer = None
+        self.partitions = None
+        self.spool = None
+        self.topic = "biyokaab/+/telemetry"
+        self.verbosity = 1
 
     def add_arguments(self, parser):
         """Add command-line arguments."""
@@ -63,6 +77,39 @@ class Command(BaseCommand):
             default="biyokaab/+/telemetry",
             help="MQTT topic pattern to subscribe to (default: biyokaab/+/telemetry)",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Flush queued readings once this many are buffered (default: 500)",
+        )
+        parser.add_argument(
+            "--flush-ms",
+            type=int,
+            default=1000,
+            help="Maximum time a reading waits in the buffer before a flush, in ms (default: 1000)",
+        )
+        parser.add_argument(
+            "--stats-interval",
+            type=int,
+            default=60,
+            help="Seconds between ingest stats reports, 0 to disable (default: 60)",
+        )
+        parser.add_argument(
+            "--spool-dir",
+            type=str,
+            default="",
+            help="Write payloads to a durable spool in this directory before the database (default: off)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of writer processes; >1 hash-partitions messages by device_id "
+                "(default: 1). Only useful with PostgreSQL, SQLite serializes writers."
+            ),
+        )
 
     def handle(self, *args, **options):
         """Main command handler."""
@@ -79,6 +126,13 @@ class Command(BaseCommand):
         port = options["port"]
         keepalive = options["keepalive"]
         topic = options["topic"]
+        batch_size = options["batch_size"]
+        flush_ms = options["flush_ms"]
+        stats_interval = options["stats_interval"]
+        workers = max(1, options["workers"])
+        spool_dir = options["spool_dir"]
+        self.topic = topic
+        self.verbosity = options["verbosity"]
 
         self.stdout.write(
             self.style.SUCCESS(
@@ -86,9 +140,41 @@ class Command(BaseCommand):
                 f"  Broker: {broker}:{port}\n"
                 f"  Topic: {topic}\n"
                 f"  Keepalive: {keepalive}s\n"
+                f"  Batch size: {batch_size} (flush every {flush_ms} ms)\n"
+                f"  Workers: {workers}\n"
+                f"  Spool: {spool_dir or 'disabled'}\n"
             )
         )
 
+        if spool_dir:
+            self.drain_orphaned_spools(spool_dir, workers, batch_size)
+        if workers > 1:
+            self.partitions = PartitionedIngest(
+                workers,
+                batch_size=batch_size,
+                flush_ms=flush_ms,
+                stats_interval=stats_interval,
+                spool_dir=spool_dir,
+            )
+            self.partitions.start()
+            sink = self.partitions
+        elif spool_dir:
+            self.spool = SpoolDrainer(
+                Spool(spool_dir), TelemetryWriter(source="MQTT"), batch_size=batch_size, idle_ms=flush_ms
+            )
+            self.spool.start()
+            sink = self.spool
+        else:
+            self.buffer = BufferedIngest(
+                TelemetryWriter(source="MQTT"),
+                batch_size=batch_size,
+                flush_ms=flush_ms,
+                on_flush=self.on_flush,
+            )
+            self.buffer.start()
+            sink = self.buffer
+        signal.signal(signal.SIGTERM, self.terminate)
+
         # Create MQTT client
         self.client = mqtt.Client()
         self.client.on_connect = self.on_connect
@@ -101,21 +187,49 @@ class Command(BaseCommand):
             self.client.connect(broker, port, keepalive)
             self.stdout.write(self.style.SUCCESS("Connected successfully!"))
 
-            # Start the loop (blocks forever)
+            # Network loop runs in paho's thread; this one only reports stats
             self.stdout.write("Listening for messages. Press Ctrl+C to stop.")
-            self.client.loop_forever()
+            self.client.loop_start()
+            last_report = time.monotonic()
+            while True:
+                time.sleep(1)
+                if self.partitions is not None and self.partitions.alive() < workers:
+                    raise RuntimeError("An ingest worker process exited unexpectedly")
+                if stats_interval and time.monotonic() - last_report >= stats_interval:
+                    self.report_stats()
+                    last_report = time.monotonic()
 
         except KeyboardInterrupt:
             self.stdout.write(self.style.WARNING("\nShutting down..."))
             if self.client:
                 self.client.disconnect()
+                self.client.loop_stop()
+            self.stdout.write("Flushing buffered readings...")
+            sink.close()
+            self.report_stats()
             self.stdout.write(self.style.SUCCESS("MQTT listener stopped."))
         except Exception as e:
             self.stderr.write(
-                self.style.ERROR(f"Error connecting to MQTT broker: {e}")
+                self.style.ERROR(f"MQTT listener error: {e}")
             )
+            if self.client:
+                self.client.loop_stop()
+            sink.close()
             raise
 
+    def drain_orphaned_spools(self, spool_dir: str, workers: int, batch_size: int) -> None:
+        """
+        Replay spools an earlier run with a different --workers count left
+        behind, before any new message is taken, so each device's backlog is
+        written ahead of its new readings.
+        """
+        for directory, name in orphaned_spools(spool_dir, workers):
+            self.stdout.write(f"Draining spool left by a previous layout: {directory}")
+            if drain_spool(directory, name, TelemetryWriter(source="MQTT"), batch_size=batch_size):
+                self.stdout.write(self.style.SUCCESS(f"✓ Drained {directory}"))
+            else:
+                self.stderr.write(self.style.WARNING(f"Could not drain {directory} completely; retrying on next start"))
+
     def on_connect(self, client, userdata, flags, rc):
         """
         Callback when the client receives a CONNACK response from the server.
@@ -133,7 +247,7 @@ class Command(BaseCommand):
             )
 
             # Subscribe to telemetry topics
-            topic = "biyokaab/+/telemetry"
+            topic = self.topic
             client.subscribe(topic)
             self.stdout.write(
                 self.style.SUCCESS(f"Subscribed to topic: {topic}")
@@ -148,168 +262,45 @@ class Command(BaseCommand):
         """
         Callback when a PUBLISH message is received from the server.
 
+        Only parsing and validation happen here, on paho's network thread;
+        the reading is queued and persisted by the buffered writer thread.
+
         Args:
             client: The client instance
             userdata: Private user data
             msg: The message object with topic, payload, qos, retain
         """
-        # Close old database connections to prevent issues in long-running processes
-        close_old_connections()
-        
         try:
-            # Decode message payload
-            payload_str = msg.payload.decode("utf-8")
-            topic = msg.topic
-
-            self.stdout.write(
-                f"\nReceived message from {topic}:\n{payload_str}"
-            )
-
-            # Parse JSON
-            try:
-                data = json.loads(payload_str)
-            except json.JSONDecodeError as e:
-                self.stderr.write(
-                    self.style.ERROR(
-                        f"Invalid JSON in message from {topic}: {e}\n"
-                        f"Payload: {payload_str[:100]}"
-                    )
+            if self.verbosity >= 2:
+                self.stdout.write(
+                    f"\nReceived message from {msg.topic}:\n{msg.payload[:200]!r}"
                 )
-                return
-
-            # Validate required fields (only device_id and distance_cm are mandatory)
-            required_fields = ["device_id", "distance_cm"]
-            missing_fields = [field for field in required_fields if field not in data]
 
-            if missing_fields:
-                self.stderr.write(
-                    self.style.ERROR(
-                        f"Missing required fields in message from {topic}: "
-                        f"{', '.join(missing_fields)}\n"
-                        f"Payload: {payload_str[:100]}"
-                    )
-                )
+            if self.partitions is not None:
+                # Workers parse and validate; keep the network thread minimal.
+                self.partitions.submit(msg.topic, msg.payload)
+                metrics.incr("ingest.dispatched")
                 return
 
-            # Extract and validate data types
-            try:
-                device_id = str(data["device_id"])
-                distance_cm = float(data["distance_cm"])
-                # Optional fields
-                water_level = (
-                    float(data["water_level"]) if "water_level" in data else None
-                )
-                humidity = (
-                    float(data["humidity"]) if "humidity" in data else None
-                )
-                temperature = (
-                    float(data["temperature"]) if "temperature" in data else None
-                )
-            except (ValueError, TypeError) as e:
-                self.stderr.write(
-                    self.style.ERROR(
-                        f"Invalid data types in message from {topic}: {e}\n"
-                        f"Payload: {payload_str[:100]}"
-                    )
-                )
+            if self.spool is not None:
+                # Durable first; the drainer parses and writes to the database.
+                self.spool.submit_payload(msg.payload)
                 return
 
-            # Get or create Sensor for this device_id
-            # Auto-create if it doesn't exist (system can be None)
             try:
-                sensor, created = Sensor.objects.get_or_create(
-                    device_id=device_id,
-                    defaults={
-                        "system": None,
-                        "description": f"Auto-created from MQTT on {msg.topic}",
-                    }
-                )
-                if created:
-                    self.stdout.write(
-                        self.style.SUCCESS(f"Created new sensor: {device_id}")
-                    )
-                else:
-                    self.stdout.write(
-                        f"Using existing sensor: {device_id} (ID: {sensor.id})"
-                    )
-            except Exception as e:
-                error_traceback = traceback.format_exc()
+                records = parse_payload(msg.payload)
+            except TelemetryError as e:
+                metrics.incr("ingest.rejected")
                 self.stderr.write(
                     self.style.ERROR(
-                        f"Error getting/creating sensor for {device_id}: {e}\n"
-                        f"Traceback:\n{error_traceback}"
+                        f"Rejected message from {msg.topic}: {e}\n"
+                        f"Payload: {msg.payload[:100]!r}"
                     )
                 )
                 return
 
-            # Save to database using Django ORM
-            # For now, only store distance_cm. Water level calculation will be done later.
-            try:
-                from decimal import Decimal
-                from django.db import transaction
-
-                self.stdout.write(
-                    f"Attempting to save reading for sensor ID: {sensor.id}, device_id: {device_id}"
-                )
-
-                # Only convert optional fields if they're provided in the message
-                # For now, focus on storing distance_cm only
-                water_level_decimal = None
-                if water_level is not None:
-                    water_level_decimal = Decimal(str(water_level))
-
-                humidity_decimal = None
-                if humidity is not None:
-                    humidity_decimal = Decimal(str(humidity))
-
-                temperature_decimal = None
-                if temperature is not None:
-                    temperature_decimal = Decimal(str(temperature))
-
-                # Use transaction to ensure data is saved
-                with transaction.atomic():
-                    sensor_reading = SensorReading.objects.create(
-                        sensor=sensor,
-                        distance_cm=distance_cm,  # Primary field - always saved
-                        water_level=water_level_decimal,  # Optional - only if in message
-                        humidity=humidity_decimal,  # Optional - only if in message
-                        temperature=temperature_decimal,  # Optional - only if in message
-                    )
-
-                # Verify the reading was created
-                if sensor_reading.id:
-                    # Build success message with available fields
-                    fields_info = f"distance_cm={distance_cm}"
-                    if water_level is not None:
-                        fields_info += f", water_level={water_level}"
-                    if humidity is not None:
-                        fields_info += f", humidity={humidity}"
-                    if temperature is not None:
-                        fields_info += f", temperature={temperature}"
-
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"✓ Saved sensor reading ID {sensor_reading.id} for {sensor.device_id} "
-                            f"(distance_cm={distance_cm})"
-                        )
-                    )
-                else:
-                    self.stderr.write(
-                        self.style.ERROR(
-                            f"Failed to save sensor reading: No ID returned\n"
-                            f"Device ID: {device_id}"
-                        )
-                    )
-            except Exception as e:
-                # Print full traceback for debugging
-                error_traceback = traceback.format_exc()
-                self.stderr.write(
-                    self.style.ERROR(
-                        f"Error saving sensor reading to database: {e}\n"
-                        f"Device ID: {device_id}\n"
-                        f"Traceback:\n{error_traceback}"
-                    )
-                )
+            for record in records:
+                self.buffer.submit(record)
 
         except Exception as e:
             # Catch any unexpected errors to prevent the listener from crashing
@@ -319,6 +310,25 @@ class Command(BaseCommand):
                 )
             )
 
+    def on_flush(self, written, elapsed_ms):
+        """Called by the writer thread after every successful bulk insert."""
+        if self.verbosity >= 2:
+            self.stdout.write(
+                self.style.SUCCESS(f"✓ Flushed {written} readings in {elapsed_ms:.1f} ms")
+            )
+
+    def report_stats(self):
+        """Write flush counts and timings collected since startup."""
+        if self.partitions is not None:
+            self.stdout.write(f"Supervisor: dispatched={metrics.snapshot()['counters'].get('ingest.dispatched', 0)}")
+            return
+        for line in format_stats():
+            self.stdout.write(line)
+
+    def terminate(self, signum, frame):
+        """SIGTERM handler: reuse the Ctrl+C shutdown path so buffers are flushed."""
+        raise KeyboardInterrupt
+
     def on_disconnect(self, client, userdata, rc):
         """
         Callback when the client disconnects from the server.
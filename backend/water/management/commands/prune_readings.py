@@ -0,0 +1,58 @@
+"""
+Django management command to apply the reading retention policy.
+
+Usage: python manage.py prune_readings [--dry-run]
+
+Tiers (settings, days, 0 = keep forever):
+- RETENTION_RAW_DAYS: raw SensorReading rows; older rows are exported to
+  per-sensor/per-month compressed archives under READING_ARCHIVE_DIR, then
+  deleted in small primary-key batches, along with their ReadingSeq claims;
+  must exceed IOT_MAX_BACKFILL_DAYS, since the claims are what rejects
+  re-sent backfill
+- RETENTION_HOURLY_DAYS / RETENTION_DAILY_DAYS: SensorRollup buckets
+
+The history API keeps serving archived ranges. Run it daily from cron.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from water.models import SensorRollup
+from water.services.retention import backfill_conflict, cutoff_for, prune_readings, prune_rollups
+
+
+class Command(BaseCommand):
+    help = "Archives and deletes expired sensor readings and rollups per the retention policy"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be pruned without changing anything")
+        parser.add_argument("--raw-days", type=int, default=settings.RETENTION_RAW_DAYS, help="Override RETENTION_RAW_DAYS")
+        parser.add_argument("--hourly-days", type=int, default=settings.RETENTION_HOURLY_DAYS, help="Override RETENTION_HOURLY_DAYS")
+        parser.add_argument("--daily-days", type=int, default=settings.RETENTION_DAILY_DAYS, help="Override RETENTION_DAILY_DAYS")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows deleted per transaction (default: 2000)")
+        parser.add_argument("--pause-ms", type=int, default=50, help="Pause between delete batches (default: 50)")
+
+    def handle(self, *args, **options):
+        problem = options["raw_days"] and backfill_conflict("--raw-days", options["raw_days"])
+        if problem:
+            raise CommandError(problem)
+        dry_run = options["dry_run"]
+        verb = "Would archive" if dry_run else "Archived"
+
+        cutoff = cutoff_for(options["raw_days"])
+        if cutoff:
+            stats = prune_readings(
+                cutoff, chunk_size=options["chunk_size"], pause=options["pause_ms"] / 1000, dry_run=dry_run
+            )
+            self.stdout.write(
+                f"{verb} {stats['archived']} readings from {stats['sensors']} sensors "
+                f"({stats['files']} sensor-months, {stats['chunks']} compacted chunks) older than {cutoff:%Y-%m-%d}; "
+                f"deleted {stats['deleted']} and {stats['claims']} seq claims"
+            )
+
+        for resolution, days in ((SensorRollup.Resolution.HOUR, options["hourly_days"]), (SensorRollup.Resolution.DAY, options["daily_days"])):
+            cutoff = cutoff_for(days)
+            if cutoff:
+                count = prune_rollups(resolution, cutoff, chunk_size=options["chunk_size"], dry_run=dry_run)
+                self.stdout.write(f"{'Would delete' if dry_run else 'Deleted'} {count} {resolution} rollups older than {cutoff:%Y-%m-%d}")
+
+        self.stdout.write(self.style.SUCCESS("✓ Retention applied" if not dry_run else "✓ Dry run complete"))
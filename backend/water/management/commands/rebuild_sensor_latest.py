@@ -0,0 +1,45 @@
+"""
+Django management command to rebuild SensorLatest from stored readings.
+
+Usage: python manage.py rebuild_sensor_latest [--device-id ID ...]
+
+Ingest keeps SensorLatest current on its own; run this after bulk imports,
+manual deletes of readings, or restoring a backup.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from water.models import Sensor
+from water.services.latest import rebuild_latest
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the SensorLatest table (newest reading per sensor) from reading history"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--device-id",
+            action="append",
+            dest="device_ids",
+            help="Only rebuild these devices (repeatable; default: all sensors)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Sensors per transaction (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        sensor_ids = None
+        if options["device_ids"]:
+            sensor_ids = list(Sensor.objects.filter(device_id__in=options["device_ids"]).values_list("id", flat=True))
+            if not sensor_ids:
+                raise CommandError("None of the given device ids exist")
+
+        started = time.perf_counter()
+        total = rebuild_latest(sensor_ids, chunk_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ Rebuilt latest reading for {total} sensors in {time.perf_counter() - started:.2f}s")
+        )
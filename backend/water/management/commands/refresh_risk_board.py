@@ -0,0 +1,64 @@
+"""
+Django management command to keep the regional drought-risk board current.
+
+Usage: python manage.py refresh_risk_board [--every SECONDS] [--full]
+
+Only profiles whose readings, storages, demand units, climate or profile
+changed since the last run are recomputed (with the NumPy batch engines)
+and upserted into ProfileRisk. Run it from cron, or with --every as a service.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from water.services.risk_board import refresh_risk_board
+
+
+class Command(BaseCommand):
+    help = "Incrementally recomputes the per-profile drought-risk board"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running and refresh every N seconds (default: run once)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Profiles per engine batch and upsert (default: 5000)",
+        )
+        parser.add_argument(
+            "--overlap",
+            type=int,
+            default=60,
+            help="Seconds of change stamps re-read below the watermark, for late commits (default: 60)",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute every profile on the first run",
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        full = options["full"]
+        while True:
+            close_old_connections()
+            self.report(refresh_risk_board(full=full, batch_size=options["batch_size"], overlap_seconds=options["overlap"]))
+            full = False
+            if not options["every"]:
+                break
+            try:
+                time.sleep(options["every"])
+            except KeyboardInterrupt:
+                break
+
+    def report(self, stats: dict) -> None:
+        if stats["profiles"] or self.verbosity >= 2:
+            self.stdout.write(
+                self.style.SUCCESS(f"✓ Recomputed {stats['profiles']} profiles (watermark {stats['watermark']:%Y-%m-%d %H:%M:%S})")
+            )
@@ -0,0 +1,66 @@
+"""
+Django management command to keep the hourly/daily SensorRollup tables current.
+
+Usage: python manage.py refresh_rollups [--every SECONDS] [--rebuild]
+
+Only readings inserted since the last run (tracked by a RollupWatermark on
+reading ids) are processed; late-arriving rows recompute just the hour and
+day buckets they fall into. Run it from cron, or with --every as a service.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from water.services.rollups import rebuild_rollups, refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Incrementally refreshes hourly/daily sensor rollups from new readings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=0,
+            help="Keep running and refresh every N seconds (default: run once)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=20000,
+            help="Reading ids per transaction (default: 20000)",
+        )
+        parser.add_argument(
+            "--overlap",
+            type=int,
+            default=0,
+            help="Re-read this many ids below the watermark, for concurrent PostgreSQL writers (default: 0)",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop all rollups and recompute them from the full history first",
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        if options["rebuild"]:
+            self.report(rebuild_rollups(batch_size=options["batch_size"]))
+
+        while True:
+            close_old_connections()
+            self.report(refresh_rollups(batch_size=options["batch_size"], overlap=options["overlap"]))
+            if not options["every"]:
+                break
+            try:
+                time.sleep(options["every"])
+            except KeyboardInterrupt:
+                break
+
+    def report(self, stats: dict) -> None:
+        if stats["readings"] or self.verbosity >= 2:
+            self.stdout.write(
+                f"Rolled up {stats['readings']} readings into {stats['hours']} hourly / "
+                f"{stats['days']} daily buckets (watermark {stats['watermark']})"
+            )
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0002_sensorreading_distance_cm_alter_sensor_system'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpoolCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('segment', models.BigIntegerField(default=0)),
+                ('offset', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0003_spoolcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sensorreading',
+            name='recorded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Device sample time, or arrival time if the device sent none'),
+        ),
+    ]
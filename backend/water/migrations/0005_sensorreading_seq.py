@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0004_sensorreading_device_recorded_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sensorreading',
+            name='seq',
+            field=models.BigIntegerField(blank=True, help_text='Device sequence number, or negative content hash, for deduplication', null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='sensorreading',
+            constraint=models.UniqueConstraint(condition=models.Q(('seq__isnull', False)), fields=('sensor', 'seq'), name='uniq_reading_sensor_seq'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0005_sensorreading_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sensor',
+            name='deadband_distance_cm',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sensor',
+            name='deadband_humidity',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='sensor',
+            name='deadband_temperature',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='sensor',
+            name='heartbeat_seconds',
+            field=models.PositiveIntegerField(blank=True, help_text='Store at least one reading this often', null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0006_sensor_deadband'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='climatesnapshot',
+            index=models.Index(fields=['location', '-recorded_at'], name='climate_location_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sensorreading',
+            index=models.Index(fields=['sensor', '-recorded_at'], name='reading_sensor_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waterplan',
+            index=models.Index(fields=['owner', 'status', '-created_at'], name='plan_owner_status_recent_idx'),
+        ),
+    ]
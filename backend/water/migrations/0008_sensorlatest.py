@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+VALUE_FIELDS = ("recorded_at", "distance_cm", "water_level", "humidity", "temperature", "soil_moisture", "motion_detected")
+
+
+def backfill_latest(apps, schema_editor):
+    Sensor = apps.get_model("water", "Sensor")
+    SensorLatest = apps.get_model("water", "SensorLatest")
+    rows = []
+    for sensor in Sensor.objects.all():
+        reading = sensor.readings.order_by("-recorded_at", "-id").first()
+        if reading is not None:
+            rows.append(
+                SensorLatest(sensor=sensor, reading=reading, **{name: getattr(reading, name) for name in VALUE_FIELDS})
+            )
+    SensorLatest.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0007_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorLatest',
+            fields=[
+                ('sensor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest', serialize=False, to='water.sensor')),
+                ('recorded_at', models.DateTimeField()),
+                ('distance_cm', models.FloatField(blank=True, null=True)),
+                ('water_level', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('humidity', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('temperature', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('soil_moisture', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('motion_detected', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('reading', models.ForeignKey(blank=True, help_text='Stored reading these values came from; empty if it was deadband-suppressed', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='water.sensorreading')),
+            ],
+        ),
+        migrations.RunPython(backfill_latest, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0008_sensorlatest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('last_reading_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SensorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=8)),
+                ('bucket', models.DateTimeField(help_text='Start of the hour/day')),
+                ('count', models.PositiveIntegerField(default=0, help_text='Readings in the bucket')),
+                ('last_at', models.DateTimeField(help_text='Time of the newest reading in the bucket')),
+                ('distance_cm_min', models.FloatField(blank=True, null=True)),
+                ('distance_cm_max', models.FloatField(blank=True, null=True)),
+                ('distance_cm_avg', models.FloatField(blank=True, null=True)),
+                ('distance_cm_count', models.PositiveIntegerField(default=0)),
+                ('distance_cm_last', models.FloatField(blank=True, null=True)),
+                ('water_level_min', models.FloatField(blank=True, null=True)),
+                ('water_level_max', models.FloatField(blank=True, null=True)),
+                ('water_level_avg', models.FloatField(blank=True, null=True)),
+                ('water_level_count', models.PositiveIntegerField(default=0)),
+                ('water_level_last', models.FloatField(blank=True, null=True)),
+                ('humidity_min', models.FloatField(blank=True, null=True)),
+                ('humidity_max', models.FloatField(blank=True, null=True)),
+                ('humidity_avg', models.FloatField(blank=True, null=True)),
+                ('humidity_count', models.PositiveIntegerField(default=0)),
+                ('humidity_last', models.FloatField(blank=True, null=True)),
+                ('temperature_min', models.FloatField(blank=True, null=True)),
+                ('temperature_max', models.FloatField(blank=True, null=True)),
+                ('temperature_avg', models.FloatField(blank=True, null=True)),
+                ('temperature_count', models.PositiveIntegerField(default=0)),
+                ('temperature_last', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sensor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='water.sensor')),
+            ],
+            options={
+                'ordering': ['-bucket'],
+                'constraints': [models.UniqueConstraint(fields=('sensor', 'resolution', 'bucket'), name='uniq_rollup_sensor_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0009_sensor_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('start_at', models.DateTimeField(help_text='Oldest reading in the chunk')),
+                ('end_at', models.DateTimeField(help_text='Newest reading in the chunk')),
+                ('count', models.PositiveIntegerField()),
+                ('encoding', models.PositiveSmallIntegerField(default=1)),
+                ('data', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sensor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='water.sensor')),
+            ],
+            options={
+                'ordering': ['-day'],
+                'constraints': [models.UniqueConstraint(fields=('sensor', 'day'), name='uniq_chunk_sensor_day')],
+            },
+        ),
+    ]
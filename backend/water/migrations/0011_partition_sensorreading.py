@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+TABLE = "water_sensorreading"
+
+
+def _months(first, last):
+    month = first.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while month <= last:
+        yield month
+        month = month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def partition_readings(apps, schema_editor):
+    """
+    PostgreSQL only: rebuild water_sensorreading as a table range-partitioned
+    by recorded_at, one partition per UTC month from the oldest reading to
+    three months ahead, plus a DEFAULT partition. Partitioned primary keys and
+    unique indexes must contain the partition key, so the primary key becomes
+    (id, recorded_at) and the (sensor, seq) uniqueness becomes
+    (sensor, seq, recorded_at), which no longer stops a re-sent reading with a
+    different recorded_at; 0016 moves (sensor, seq) uniqueness to water_readingseq.
+    Other databases are left unpartitioned.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    from datetime import datetime, timedelta, timezone
+
+    execute = schema_editor.execute
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT min(recorded_at), max(recorded_at) FROM {TABLE}")
+        oldest, newest = cursor.fetchone()
+    now = datetime.now(timezone.utc)
+    first = min(oldest or now, now).astimezone(timezone.utc)
+    last = max(newest or now, now).astimezone(timezone.utc) + timedelta(days=92)
+
+    execute(
+        f"CREATE TABLE {TABLE}_partitioned (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+        f"PARTITION BY RANGE (recorded_at)"
+    )
+    execute(f"ALTER TABLE {TABLE}_partitioned ADD PRIMARY KEY (id, recorded_at)")
+    execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE}_partitioned DEFAULT")
+    for month in _months(first, last):
+        upper = month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+        execute(
+            f"CREATE TABLE {TABLE}_y{month:%Y}m{month:%m} PARTITION OF {TABLE}_partitioned "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [month, upper],
+        )
+    execute(f"INSERT INTO {TABLE}_partitioned SELECT * FROM {TABLE}")
+    execute(f"DROP TABLE {TABLE}")
+    execute(f"ALTER TABLE {TABLE}_partitioned RENAME TO {TABLE}")
+    execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_sensor_id_fk FOREIGN KEY (sensor_id) "
+        f"REFERENCES water_sensor (id) DEFERRABLE INITIALLY DEFERRED"
+    )
+    execute(f"CREATE INDEX reading_sensor_recent_idx ON {TABLE} (sensor_id, recorded_at DESC)")
+    execute(
+        f"CREATE UNIQUE INDEX uniq_reading_sensor_seq ON {TABLE} (sensor_id, seq, recorded_at) WHERE seq IS NOT NULL"
+    )
+    execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), coalesce((SELECT max(id) FROM {TABLE}), 0) + 1, false)"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0010_readingchunk'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sensorlatest',
+            name='reading',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Stored reading these values came from; empty if it was deadband-suppressed', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='water.sensorreading'),
+        ),
+        # Not reversible in place: a partitioned table cannot be turned back without a full copy.
+        migrations.RunPython(partition_readings, migrations.RunPython.noop, elidable=False),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0011_partition_sensorreading'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sensorreading',
+            name='reading_sensor_recent_idx',
+        ),
+        migrations.AddIndex(
+            model_name='sensorreading',
+            index=models.Index(fields=['sensor', '-recorded_at', '-id'], name='reading_sensor_recent_idx'),
+        ),
+    ]
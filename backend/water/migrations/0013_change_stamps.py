@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0012_keyset_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='waterdemandunit',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='waterstorage',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0013_change_stamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('changed_through', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProfileRisk',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='risk', serialize=False, to='water.userprofile')),
+                ('region', models.CharField(blank=True, help_text='Copied from the location for filtering', max_length=120)),
+                ('available_liters', models.FloatField(default=0)),
+                ('fog_capture_liters', models.FloatField(default=0)),
+                ('human_liters', models.FloatField(default=0)),
+                ('livestock_liters', models.FloatField(default=0)),
+                ('crop_liters', models.FloatField(default=0)),
+                ('total_daily_liters', models.FloatField(default=0)),
+                ('days_of_supply', models.FloatField(default=0)),
+                ('days_until_rainfall', models.PositiveIntegerField(blank=True, null=True)),
+                ('season', models.CharField(blank=True, max_length=12)),
+                ('risk_level', models.CharField(choices=[('low', 'Low'), ('moderate', 'Moderate'), ('high', 'High'), ('critical', 'Critical')], max_length=12)),
+                ('stale', models.BooleanField(default=False, help_text='Inputs changed without a timestamp (edits, deletions); recompute next refresh')),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='water.location')),
+            ],
+            options={
+                'ordering': ['days_of_supply', 'profile'],
+                'indexes': [models.Index(fields=['days_of_supply', 'profile'], name='risk_board_idx'), models.Index(fields=['region', 'days_of_supply', 'profile'], name='risk_board_region_idx'), models.Index(fields=['location', 'days_of_supply', 'profile'], name='risk_board_location_idx'), models.Index(fields=['risk_level', 'days_of_supply', 'profile'], name='risk_board_level_idx')],
+            },
+        ),
+    ]
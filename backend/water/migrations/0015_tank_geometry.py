@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def measure_existing(apps, schema_editor):
+    # No sensor has a TankGeometry yet: every tank is the default upright cylinder, linear in height.
+    SensorLatest = apps.get_model("water", "SensorLatest")
+    height, capacity = settings.TANK_DEFAULT_HEIGHT_CM, settings.TANK_DEFAULT_CAPACITY_L
+    rows = list(SensorLatest.objects.filter(distance_cm__isnull=False))
+    for latest in rows:
+        latest.water_height_cm = round(min(max(height - latest.distance_cm, 0.0), height), 2)
+        latest.percent_full = round(latest.water_height_cm / height * 100, 2)
+        latest.volume_liters = round(latest.water_height_cm / height * capacity, 2)
+        latest.capacity_liters = capacity
+    SensorLatest.objects.bulk_update(rows, ["water_height_cm", "percent_full", "volume_liters", "capacity_liters"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0014_risk_board'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sensorlatest',
+            name='capacity_liters',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sensorlatest',
+            name='percent_full',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sensorlatest',
+            name='volume_liters',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sensorlatest',
+            name='water_height_cm',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='TankGeometry',
+            fields=[
+                ('sensor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='tank', serialize=False, to='water.sensor')),
+                ('shape', models.CharField(choices=[('cylinder', 'Upright cylinder'), ('horizontal_cylinder', 'Horizontal cylinder'), ('cone_bottom', 'Cone-bottom cylinder'), ('lookup', 'Calibration table')], default='cylinder', max_length=24)),
+                ('height_cm', models.FloatField(blank=True, help_text='Interior height, bottom to brim (not for horizontal cylinders)', null=True)),
+                ('sensor_offset_cm', models.FloatField(default=0, help_text='Distance from the sensor face down to the brim')),
+                ('diameter_cm', models.FloatField(blank=True, null=True)),
+                ('length_cm', models.FloatField(blank=True, help_text='Horizontal cylinders only', null=True)),
+                ('cone_height_cm', models.FloatField(blank=True, help_text='Cone-bottom only: height of the conical section', null=True)),
+                ('outlet_diameter_cm', models.FloatField(default=0, help_text='Cone-bottom only: diameter at the bottom of the cone')),
+                ('calibration', models.JSONField(blank=True, default=list, help_text='Calibration table only: [[water_height_cm, liters], ...], heights ascending')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('storage', models.OneToOneField(blank=True, help_text='Storage whose current volume (and capacity) follow this sensor', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='level_sensor', to='water.waterstorage')),
+            ],
+        ),
+        migrations.RunPython(measure_existing, migrations.RunPython.noop),
+    ]
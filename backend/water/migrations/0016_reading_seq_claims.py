@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def claim_existing_seqs(apps, schema_editor):
+    """
+    One claim per (sensor, seq) already stored. On a partitioned table the
+    weaker (sensor, seq, recorded_at) index may have let a re-sent reading in
+    twice; the earliest copy keeps the claim.
+    """
+    schema_editor.execute(
+        "INSERT INTO water_readingseq (sensor_id, seq, recorded_at) "
+        "SELECT sensor_id, seq, min(recorded_at) FROM water_sensorreading "
+        "WHERE seq IS NOT NULL GROUP BY sensor_id, seq"
+    )
+
+
+def drop_seq_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX IF EXISTS uniq_reading_sensor_seq")
+
+
+def restore_seq_index(apps, schema_editor):
+    # 0011 partitions the table on PostgreSQL, where unique indexes need the partition key.
+    columns = "sensor_id, seq, recorded_at" if schema_editor.connection.vendor == "postgresql" else "sensor_id, seq"
+    schema_editor.execute(
+        f"CREATE UNIQUE INDEX uniq_reading_sensor_seq ON water_sensorreading ({columns}) WHERE seq IS NOT NULL"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0015_tank_geometry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingSeq',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField()),
+                ('recorded_at', models.DateTimeField(help_text='Sample time of the reading, for retention')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='readingseq',
+            name='sensor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='water.sensor'),
+        ),
+        migrations.AddIndex(
+            model_name='readingseq',
+            index=models.Index(fields=['recorded_at'], name='readingseq_recorded_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='readingseq',
+            constraint=models.UniqueConstraint(fields=('sensor', 'seq'), name='uniq_readingseq_sensor_seq'),
+        ),
+        migrations.RunPython(claim_existing_seqs, migrations.RunPython.noop),
+        # The index behind uniq_reading_sensor_seq is (sensor_id, seq) on SQLite but
+        # (sensor_id, seq, recorded_at) on a table partitioned by 0011, which the
+        # state never described; dropping it by name brings both back in step.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name='sensorreading',
+                    name='uniq_reading_sensor_seq',
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(drop_seq_index, restore_seq_index),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:48
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_reading_seq(apps, schema_editor):
+    """Rows that point at a stored reading take its seq; suppressed ones get it on the next reading."""
+    SensorLatest = apps.get_model("water", "SensorLatest")
+    SensorReading = apps.get_model("water", "SensorReading")
+    SensorLatest.objects.filter(reading__isnull=False).update(
+        seq=Subquery(SensorReading.objects.filter(id=OuterRef("reading_id")).values("seq")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0016_reading_seq_claims'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sensorlatest',
+            name='seq',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(copy_reading_seq, migrations.RunPython.noop),
+    ]
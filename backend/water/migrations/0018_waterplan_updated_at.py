@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water', '0017_sensorlatest_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='waterplan',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 
 class Location(models.Model):
@@ -46,6 +48,7 @@ class WaterStorage(models.Model):
     name = models.CharField(max_length=120, default="Tank")
     capacity_liters = models.DecimalField(max_digits=10, decimal_places=2)
     current_volume_liters = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return f"{self.name} ({self.current_volume_liters}/{self.capacity_liters} L)"
@@ -55,6 +58,12 @@ class Sensor(models.Model):
     system = models.ForeignKey(WaterSystem, on_delete=models.CASCADE, related_name="sensors", null=True, blank=True, help_text="Optional: can be auto-created from MQTT without system")
     device_id = models.CharField(max_length=64, unique=True)
     description = models.CharField(max_length=255, blank=True)
+    # Deadband: readings are only stored once a value moves this much (or the heartbeat passes).
+    # Empty fields fall back to the DEADBAND_* settings.
+    deadband_distance_cm = models.FloatField(null=True, blank=True)
+    deadband_humidity = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    deadband_temperature = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    heartbeat_seconds = models.PositiveIntegerField(null=True, blank=True, help_text="Store at least one reading this often")
 
     def __str__(self) -> str:
         return f"{self.device_id} ({self.system})"
@@ -62,21 +71,142 @@ class Sensor(models.Model):
 
 class SensorReading(models.Model):
     sensor = models.ForeignKey(Sensor, on_delete=models.CASCADE, related_name="readings")
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    recorded_at = models.DateTimeField(default=timezone.now, help_text="Device sample time, or arrival time if the device sent none")
     distance_cm = models.FloatField(null=True, blank=True, help_text="Distance from sensor to water surface in cm")
     water_level = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
     humidity = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     temperature = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     soil_moisture = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     motion_detected = models.BooleanField(default=False)
+    seq = models.BigIntegerField(null=True, blank=True, help_text="Device sequence number, or negative content hash, for deduplication")
 
     class Meta:
         ordering = ["-recorded_at"]
+        indexes = [
+            # latest-per-sensor and per-sensor history scans; id breaks ties for keyset pages
+            models.Index(fields=["sensor", "-recorded_at", "-id"], name="reading_sensor_recent_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.sensor.device_id} @ {self.recorded_at}"
 
 
+class ReadingSeq(models.Model):
+    """
+    (sensor, seq) key of every stored reading, claimed by ingest in the same
+    transaction as the insert. SensorReading cannot hold this constraint
+    itself: once it is partitioned by recorded_at (PostgreSQL), unique
+    indexes must include the partition key. Claims also outlive compaction
+    and are pruned with raw readings, after the backfill window has passed.
+    """
+
+    sensor = models.ForeignKey(Sensor, on_delete=models.CASCADE, related_name="+")
+    seq = models.BigIntegerField()
+    recorded_at = models.DateTimeField(help_text="Sample time of the reading, for retention")
+
+    class Meta:
+        indexes = [models.Index(fields=["recorded_at"], name="readingseq_recorded_idx")]
+        constraints = [models.UniqueConstraint(fields=["sensor", "seq"], name="uniq_readingseq_sensor_seq")]
+
+    def __str__(self) -> str:
+        return f"{self.sensor_id}#{self.seq}"
+
+
+class SensorLatest(models.Model):
+    """
+    Newest reading received per sensor, upserted by ingest in the same
+    transaction as the insert so status views never scan SensorReading.
+    Deadband-suppressed readings update it too (with ``reading`` left empty).
+    Rebuild from history with ``manage.py rebuild_sensor_latest``.
+    """
+
+    sensor = models.OneToOneField(Sensor, on_delete=models.CASCADE, primary_key=True, related_name="latest")
+    # No database constraint: on PostgreSQL SensorReading is partitioned and its primary key includes recorded_at.
+    reading = models.ForeignKey(
+        SensorReading, on_delete=models.SET_NULL, null=True, blank=True, related_name="+", db_constraint=False,
+        help_text="Stored reading these values came from; empty if it was deadband-suppressed",
+    )
+    recorded_at = models.DateTimeField()
+    seq = models.BigIntegerField(null=True, blank=True)
+    distance_cm = models.FloatField(null=True, blank=True)
+    water_level = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    humidity = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    temperature = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    soil_moisture = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    motion_detected = models.BooleanField(default=False)
+    # Tank level measured from distance_cm at ingest with the sensor's TankGeometry (water/services/tank_geometry.py).
+    water_height_cm = models.FloatField(null=True, blank=True)
+    volume_liters = models.FloatField(null=True, blank=True)
+    percent_full = models.FloatField(null=True, blank=True)
+    capacity_liters = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def as_reading(self) -> SensorReading:
+        """Unsaved SensorReading carrying these values, for serializers and engines built around readings."""
+        reading = SensorReading(
+            id=self.reading_id,
+            sensor_id=self.sensor_id,
+            recorded_at=self.recorded_at,
+            seq=self.seq,
+            distance_cm=self.distance_cm,
+            water_level=self.water_level,
+            humidity=self.humidity,
+            temperature=self.temperature,
+            soil_moisture=self.soil_moisture,
+            motion_detected=self.motion_detected,
+        )
+        if SensorLatest.sensor.is_cached(self):
+            reading.sensor = self.sensor
+        return reading
+
+    def __str__(self) -> str:
+        return f"{self.sensor_id} latest @ {self.recorded_at}"
+
+
+class TankGeometry(models.Model):
+    """
+    Shape and mounting of the tank a level sensor looks into, used at ingest
+    to turn distance_cm into water height, liters and percent full. Sensors
+    without one are treated as the default tank (TANK_DEFAULT_* settings).
+    A linked storage has its current volume kept in sync from the sensor.
+    """
+
+    class Shape(models.TextChoices):
+        CYLINDER = "cylinder", "Upright cylinder"
+        HORIZONTAL_CYLINDER = "horizontal_cylinder", "Horizontal cylinder"
+        CONE_BOTTOM = "cone_bottom", "Cone-bottom cylinder"
+        LOOKUP = "lookup", "Calibration table"
+
+    sensor = models.OneToOneField(Sensor, on_delete=models.CASCADE, primary_key=True, related_name="tank")
+    storage = models.OneToOneField(
+        WaterStorage, on_delete=models.SET_NULL, null=True, blank=True, related_name="level_sensor",
+        help_text="Storage whose current volume (and capacity) follow this sensor",
+    )
+    shape = models.CharField(max_length=24, choices=Shape.choices, default=Shape.CYLINDER)
+    height_cm = models.FloatField(null=True, blank=True, help_text="Interior height, bottom to brim (not for horizontal cylinders)")
+    sensor_offset_cm = models.FloatField(default=0, help_text="Distance from the sensor face down to the brim")
+    diameter_cm = models.FloatField(null=True, blank=True)
+    length_cm = models.FloatField(null=True, blank=True, help_text="Horizontal cylinders only")
+    cone_height_cm = models.FloatField(null=True, blank=True, help_text="Cone-bottom only: height of the conical section")
+    outlet_diameter_cm = models.FloatField(default=0, help_text="Cone-bottom only: diameter at the bottom of the cone")
+    calibration = models.JSONField(
+        default=list, blank=True, help_text="Calibration table only: [[water_height_cm, liters], ...], heights ascending"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def clean(self):
+        # Deferred: the geometry service imports this module.
+        from water.services.tank_geometry import validate_geometry
+
+        try:
+            validate_geometry(self)
+        except ValueError as exc:
+            raise ValidationError(str(exc)) from None
+
+    def __str__(self) -> str:
+        return f"{self.sensor_id} {self.shape}"
+
+
 class WaterDemandUnit(models.Model):
     class DemandCategory(models.TextChoices):
         HUMAN = "human", "Human"
@@ -89,6 +219,7 @@ class WaterDemandUnit(models.Model):
     count = models.PositiveIntegerField(default=1)
     area_hectares = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
     daily_need_liters = models.DecimalField(max_digits=8, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self) -> str:
         return f"{self.name} ({self.category})"
@@ -108,6 +239,9 @@ class ClimateSnapshot(models.Model):
 
     class Meta:
         ordering = ["-recorded_at"]
+        indexes = [
+            models.Index(fields=["location", "-recorded_at"], name="climate_location_recent_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.location} {self.season} ({self.days_until_rainfall}d)"
@@ -126,10 +260,170 @@ class WaterPlan(models.Model):
     priority_rules = models.JSONField(default=dict, blank=True)
     status = models.CharField(max_length=12, choices=Status.choices, default=Status.ACTIVE)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["owner", "status", "-created_at"], name="plan_owner_status_recent_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.owner} plan {self.date_start} - {self.date_end} ({self.status})"
 
+
+
+class SensorRollup(models.Model):
+    """
+    Hourly/daily aggregates of a sensor's readings for long-range history.
+    Buckets start on local (TIME_ZONE) hour/day boundaries and are kept
+    current by ``manage.py refresh_rollups``. Each metric carries min, max,
+    avg, the number of non-empty values and the value of the bucket's newest reading.
+    """
+
+    class Resolution(models.TextChoices):
+        HOUR = "hour", "Hour"
+        DAY = "day", "Day"
+
+    sensor = models.ForeignKey(Sensor, on_delete=models.CASCADE, related_name="rollups")
+    resolution = models.CharField(max_length=8, choices=Resolution.choices)
+    bucket = models.DateTimeField(help_text="Start of the hour/day")
+    count = models.PositiveIntegerField(default=0, help_text="Readings in the bucket")
+    last_at = models.DateTimeField(help_text="Time of the newest reading in the bucket")
+
+    distance_cm_min = models.FloatField(null=True, blank=True)
+    distance_cm_max = models.FloatField(null=True, blank=True)
+    distance_cm_avg = models.FloatField(null=True, blank=True)
+    distance_cm_count = models.PositiveIntegerField(default=0)
+    distance_cm_last = models.FloatField(null=True, blank=True)
+
+    water_level_min = models.FloatField(null=True, blank=True)
+    water_level_max = models.FloatField(null=True, blank=True)
+    water_level_avg = models.FloatField(null=True, blank=True)
+    water_level_count = models.PositiveIntegerField(default=0)
+    water_level_last = models.FloatField(null=True, blank=True)
+
+    humidity_min = models.FloatField(null=True, blank=True)
+    humidity_max = models.FloatField(null=True, blank=True)
+    humidity_avg = models.FloatField(null=True, blank=True)
+    humidity_count = models.PositiveIntegerField(default=0)
+    humidity_last = models.FloatField(null=True, blank=True)
+
+    temperature_min = models.FloatField(null=True, blank=True)
+    temperature_max = models.FloatField(null=True, blank=True)
+    temperature_avg = models.FloatField(null=True, blank=True)
+    temperature_count = models.PositiveIntegerField(default=0)
+    temperature_last = models.FloatField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-bucket"]
+        constraints = [
+            models.UniqueConstraint(fields=["sensor", "resolution", "bucket"], name="uniq_rollup_sensor_bucket"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.sensor_id} {self.resolution} @ {self.bucket}"
+
+
+class ReadingChunk(models.Model):
+    """
+    One sensor's readings for one UTC day, packed into a compressed blob by
+    ``manage.py compact_readings`` (see water.services.chunks for the format).
+    """
+
+    sensor = models.ForeignKey(Sensor, on_delete=models.CASCADE, related_name="chunks")
+    day = models.DateField()
+    start_at = models.DateTimeField(help_text="Oldest reading in the chunk")
+    end_at = models.DateTimeField(help_text="Newest reading in the chunk")
+    count = models.PositiveIntegerField()
+    encoding = models.PositiveSmallIntegerField(default=1)
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-day"]
+        constraints = [
+            models.UniqueConstraint(fields=["sensor", "day"], name="uniq_chunk_sensor_day"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.sensor_id} {self.day} ({self.count} readings)"
+
+
+class RollupWatermark(models.Model):
+    """Highest SensorReading id folded into SensorRollup by ``refresh_rollups``."""
+
+    name = models.CharField(max_length=64, unique=True)
+    last_reading_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} @ {self.last_reading_id}"
+
+
+class ProfileRisk(models.Model):
+    """
+    Materialized drought-risk board: each profile's dashboard availability,
+    demand and constraint figures, recomputed in batches by
+    ``manage.py refresh_risk_board`` so the regional risk endpoint reads
+    one indexed page instead of computing a dashboard per user.
+    """
+
+    class RiskLevel(models.TextChoices):
+        LOW = "low", "Low"
+        MODERATE = "moderate", "Moderate"
+        HIGH = "high", "High"
+        CRITICAL = "critical", "Critical"
+
+    profile = models.OneToOneField(UserProfile, on_delete=models.CASCADE, primary_key=True, related_name="risk")
+    location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    region = models.CharField(max_length=120, blank=True, help_text="Copied from the location for filtering")
+    available_liters = models.FloatField(default=0)
+    fog_capture_liters = models.FloatField(default=0)
+    human_liters = models.FloatField(default=0)
+    livestock_liters = models.FloatField(default=0)
+    crop_liters = models.FloatField(default=0)
+    total_daily_liters = models.FloatField(default=0)
+    days_of_supply = models.FloatField(default=0)
+    days_until_rainfall = models.PositiveIntegerField(null=True, blank=True)
+    season = models.CharField(max_length=12, blank=True)
+    risk_level = models.CharField(max_length=12, choices=RiskLevel.choices)
+    stale = models.BooleanField(default=False, help_text="Inputs changed without a timestamp (edits, deletions); recompute next refresh")
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["days_of_supply", "profile"]
+        indexes = [
+            models.Index(fields=["days_of_supply", "profile"], name="risk_board_idx"),
+            models.Index(fields=["region", "days_of_supply", "profile"], name="risk_board_region_idx"),
+            models.Index(fields=["location", "days_of_supply", "profile"], name="risk_board_location_idx"),
+            models.Index(fields=["risk_level", "days_of_supply", "profile"], name="risk_board_level_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.profile_id} {self.risk_level} ({self.days_of_supply}d)"
+
+
+class RiskWatermark(models.Model):
+    """Change-stamp time up to which ``refresh_risk_board`` has recomputed ProfileRisk."""
+
+    name = models.CharField(max_length=64, unique=True)
+    changed_through = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} @ {self.changed_through}"
+
+
+class SpoolCheckpoint(models.Model):
+    """Replay position of an MQTT spool drainer; updated atomically with the readings it inserts."""
+
+    name = models.CharField(max_length=64, unique=True)
+    segment = models.BigIntegerField(default=0)
+    offset = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} @ {self.segment}:{self.offset}"
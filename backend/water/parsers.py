@@ -0,0 +1,71 @@
+import gzip
+import json
+import zlib
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError, UnsupportedMediaType
+from rest_framework.parsers import BaseParser, JSONParser
+
+
+def open_body(stream, parser_context):
+    """Wrap the request stream, transparently inflating ``Content-Encoding: gzip`` bodies."""
+    request = (parser_context or {}).get("request")
+    encoding = request.META.get("HTTP_CONTENT_ENCODING", "").strip().lower() if request else ""
+    if encoding in ("", "identity"):
+        return stream
+    if encoding == "gzip":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    raise UnsupportedMediaType(f"Content-Encoding {encoding}")
+
+
+def read_limited(stream, limit: int) -> bytes:
+    """Read at most ``limit`` bytes, refusing larger (or decompression-bomb) bodies."""
+    try:
+        data = stream.read(limit + 1)
+    except (OSError, EOFError, zlib.error) as exc:
+        raise ParseError(f"Invalid gzip body: {exc}") from exc
+    if len(data) > limit:
+        raise ParseError(f"Request body exceeds {limit} bytes")
+    return data
+
+
+class GzipJSONParser(JSONParser):
+    """JSONParser that also accepts gzip-compressed bodies."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = read_limited(open_body(stream, parser_context), settings.IOT_BATCH_MAX_BYTES)
+        try:
+            return json.loads(body)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}") from exc
+
+
+class NDJSONParser(BaseParser):
+    """Newline-delimited JSON (one object per line), optionally gzip-compressed."""
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = open_body(stream, parser_context)
+        limit = settings.IOT_BATCH_MAX_BYTES
+        rows, consumed, line_number = [], 0, 0
+        try:
+            while True:
+                # Bounded reads: a newline-free (or decompression-bomb) line stops at the limit too.
+                line = body.readline(limit - consumed + 1)
+                if not line:
+                    break
+                consumed += len(line)
+                if consumed > limit:
+                    raise ParseError(f"Request body exceeds {limit} bytes")
+                line_number += 1
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError as exc:
+                    raise ParseError(f"NDJSON parse error on line {line_number} - {exc}") from exc
+        except (OSError, EOFError, zlib.error) as exc:
+            raise ParseError(f"Invalid gzip body: {exc}") from exc
+        return rows
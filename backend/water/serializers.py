@@ -11,6 +11,8 @@ from .models import (
     WaterStorage,
     WaterSystem,
 )
+from .services.ingest import TelemetryError, check_timestamp_window
+from .services.sensor_cache import sensor_cache
 
 
 class LocationSerializer(serializers.ModelSerializer):
@@ -50,8 +52,25 @@ class SensorSerializer(serializers.ModelSerializer):
         fields = ["id", "device_id", "description", "system"]
 
 
+class CachedSensorField(serializers.SlugRelatedField):
+    """device_id slug field that resolves through the shared sensor cache instead of a query."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("slug_field", "device_id")
+        kwargs.setdefault("queryset", Sensor.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, (str, int)):
+            self.fail("invalid")
+        ref = sensor_cache.resolve(str(data))
+        if ref is None:
+            self.fail("does_not_exist", slug_name=self.slug_field, value=str(data))
+        return Sensor(id=ref.id, device_id=ref.device_id, system_id=ref.system_id)
+
+
 class SensorReadingSerializer(serializers.ModelSerializer):
-    sensor = serializers.SlugRelatedField(slug_field="device_id", queryset=Sensor.objects.all())
+    sensor = CachedSensorField()
 
     class Meta:
         model = SensorReading
@@ -65,8 +84,23 @@ class SensorReadingSerializer(serializers.ModelSerializer):
             "temperature",
             "soil_moisture",
             "motion_detected",
+            "seq",
         ]
-        read_only_fields = ["recorded_at"]
+        extra_kwargs = {"recorded_at": {"required": False}}
+        # (sensor, seq) uniqueness is enforced by the ingest writer's dedup, not a query per request.
+        validators = []
+
+    def validate_seq(self, value):
+        if value is not None and value < 0:
+            raise serializers.ValidationError("seq must be a non-negative integer")
+        return value
+
+    def validate_recorded_at(self, value):
+        # Optional device timestamp; arrival time is used when it is omitted.
+        try:
+            return check_timestamp_window(value)
+        except TelemetryError as exc:
+            raise serializers.ValidationError(str(exc)) from exc
 
 
 class WaterDemandUnitSerializer(serializers.ModelSerializer):
@@ -96,7 +130,8 @@ class WaterPlanSerializer(serializers.ModelSerializer):
             "priority_rules",
             "status",
             "created_at",
+            "updated_at",
         ]
-        read_only_fields = ["status", "created_at"]
+        read_only_fields = ["status", "created_at", "updated_at"]
 
 
@@ -0,0 +1,165 @@
+"""
+Cold archive of pruned SensorReading rows.
+
+Each sensor/month (UTC) is one compressed, columnar NumPy ``.npz`` file at
+``<READING_ARCHIVE_DIR>/sensor-<id>/<YYYY-MM>.npz``. Files are rewritten
+atomically when a later prune run adds rows to the same month, and rows are
+de-duplicated by reading id, so re-exporting after a crash is harmless.
+"""
+import os
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from water.models import SensorReading
+
+# values_list() order used by exporters
+ARCHIVE_FIELDS = (
+    "id",
+    "recorded_at",
+    "seq",
+    "distance_cm",
+    "water_level",
+    "humidity",
+    "temperature",
+    "soil_moisture",
+    "motion_detected",
+)
+DECIMAL_FIELDS = ("water_level", "humidity", "temperature", "soil_moisture")
+FLOAT_FIELDS = ("distance_cm", *DECIMAL_FIELDS)
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def month_start(moment: datetime) -> datetime:
+    moment = moment.astimezone(dt_timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(start: datetime) -> datetime:
+    return start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+
+
+def _micros(moment: datetime) -> int:
+    delta = moment - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class ReadingArchive:
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+
+    def path_for(self, sensor_id: int, month: datetime) -> Path:
+        return self.directory / f"sensor-{sensor_id}" / f"{month:%Y-%m}.npz"
+
+    def write(self, sensor_id: int, month: datetime, rows: list[tuple]) -> int:
+        """Merge ``rows`` (ARCHIVE_FIELDS tuples within ``month``) into that month's file."""
+        if not rows:
+            return 0
+        columns = self._encode(rows)
+        path = self.path_for(sensor_id, month)
+        if path.exists():
+            existing = self._load(path)
+            columns = {name: np.concatenate([existing[name], columns[name]]) for name in columns}
+        _, unique = np.unique(columns["id"], return_index=True)
+        columns = {name: values[unique] for name, values in columns.items()}
+        order = np.lexsort((columns["id"], columns["recorded_at"]))
+        columns = {name: values[order] for name, values in columns.items()}
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as handle:
+            np.savez_compressed(handle, **columns)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp, path)
+        return len(rows)
+
+    def read(self, sensor_id: int, start: datetime, end: datetime, ids: set[int] | None = None) -> list[SensorReading]:
+        """Archived readings in [start, end), oldest first, as unsaved SensorReading instances, optionally only ``ids``."""
+        readings: list[SensorReading] = []
+        for columns in self._months(sensor_id, start, end):
+            if ids is not None:
+                columns = {name: values[np.isin(columns["id"], list(ids))] for name, values in columns.items()}
+            readings.extend(self._decode(sensor_id, columns))
+        return readings
+
+    def columns(self, sensor_id: int, start: datetime, end: datetime) -> dict[str, np.ndarray]:
+        """Archived readings in [start, end) as raw column arrays (``recorded_at`` in epoch microseconds, NaN for null)."""
+        months = list(self._months(sensor_id, start, end))
+        if not months:
+            return {}
+        return {name: np.concatenate([columns[name] for columns in months]) for name in months[0]}
+
+    def _months(self, sensor_id: int, start: datetime, end: datetime):
+        low, high = _micros(start), _micros(end)
+        month = month_start(start)
+        while month < end:
+            path = self.path_for(sensor_id, month)
+            month = next_month(month)
+            if not path.exists():
+                continue
+            columns = self._load(path)
+            mask = (columns["recorded_at"] >= low) & (columns["recorded_at"] < high)
+            yield {name: values[mask] for name, values in columns.items()}
+
+    def has_sensor(self, sensor_id: int) -> bool:
+        return (self.directory / f"sensor-{sensor_id}").is_dir()
+
+    def oldest_month(self, sensor_id: int) -> datetime | None:
+        """Start of the earliest archived month for the sensor, if any."""
+        months = sorted(path.stem for path in (self.directory / f"sensor-{sensor_id}").glob("*.npz"))
+        if not months:
+            return None
+        return datetime.strptime(months[0], "%Y-%m").replace(tzinfo=dt_timezone.utc)
+
+    @staticmethod
+    def _load(path: Path) -> dict[str, np.ndarray]:
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+
+    @staticmethod
+    def _encode(rows: list[tuple]) -> dict[str, np.ndarray]:
+        by_field = dict(zip(ARCHIVE_FIELDS, zip(*rows)))
+        columns = {
+            "id": np.array(by_field["id"], dtype=np.int64),
+            "recorded_at": np.array([_micros(value) for value in by_field["recorded_at"]], dtype=np.int64),
+            "seq": np.array([value or 0 for value in by_field["seq"]], dtype=np.int64),
+            "seq_present": np.array([value is not None for value in by_field["seq"]], dtype=bool),
+            "motion_detected": np.array(by_field["motion_detected"], dtype=bool),
+        }
+        for name in FLOAT_FIELDS:
+            columns[name] = np.array([np.nan if value is None else float(value) for value in by_field[name]], dtype=np.float64)
+        return columns
+
+    @staticmethod
+    def _decode(sensor_id: int, columns: dict[str, np.ndarray]) -> list[SensorReading]:
+        readings = []
+        for index in range(len(columns["id"])):
+            values = {}
+            for name in FLOAT_FIELDS:
+                value = columns[name][index]
+                if np.isnan(value):
+                    values[name] = None
+                elif name in DECIMAL_FIELDS:
+                    # Archived decimals all have two places, which a float64 round-trips exactly.
+                    values[name] = Decimal(f"{value:.2f}")
+                else:
+                    values[name] = float(value)
+            readings.append(
+                SensorReading(
+                    id=int(columns["id"][index]),
+                    sensor_id=sensor_id,
+                    recorded_at=EPOCH + timedelta(microseconds=int(columns["recorded_at"][index])),
+                    seq=int(columns["seq"][index]) if columns["seq_present"][index] else None,
+                    motion_detected=bool(columns["motion_detected"][index]),
+                    **values,
+                )
+            )
+        return readings
+
+
+reading_archive = ReadingArchive(settings.READING_ARCHIVE_DIR)
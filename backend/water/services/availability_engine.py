@@ -1,13 +1,16 @@
 from decimal import Decimal
 from typing import Iterable
 
-from water.models import SensorReading, WaterStorage
+import numpy as np
+
+from water.models import SensorLatest, SensorReading, WaterStorage
+from water.services.cents import group_sum, liters, owner_index, to_cents
 
 
 class WaterAvailabilityEngine:
     """Calculates usable water based on current tank volumes and latest readings."""
 
-    def calculate(self, storages: Iterable[WaterStorage], latest_readings: dict[str, SensorReading] | None = None) -> dict:
+    def calculate(self, storages: Iterable[WaterStorage], latest_readings: dict[int, SensorLatest | SensorReading] | None = None) -> dict:
         total_available = Decimal("0")
         systems_breakdown: list[dict] = []
 
@@ -35,7 +38,25 @@ class WaterAvailabilityEngine:
             "breakdown": systems_breakdown,
         }
 
-
-
-
-
+    def calculate_batch(
+        self,
+        owner_ids: Iterable[int],
+        storage_owners: Iterable[int],
+        storage_volumes: Iterable,
+        reading_owners: Iterable[int] = (),
+        reading_levels: Iterable = (),
+    ) -> dict[str, np.ndarray]:
+        """
+        Columnar ``calculate`` for many owners at once: storages and latest
+        readings come as parallel (owner id, liters) columns, e.g. from
+        ``values_list``. Returns arrays aligned with the sorted unique
+        ``owner_ids``; equal to the scalar totals (no per-storage breakdown).
+        """
+        owners = owner_index(owner_ids)
+        available = group_sum(owners, np.fromiter(storage_owners, dtype=np.int64), to_cents(storage_volumes))
+        fog = group_sum(owners, np.fromiter(reading_owners, dtype=np.int64), to_cents(reading_levels))
+        return {
+            "owner_ids": owners,
+            "available_liters": liters(available),
+            "fog_capture_liters": liters(fog),
+        }
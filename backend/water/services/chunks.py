@@ -0,0 +1,291 @@
+"""
+Compressed per-sensor/per-day storage for cold readings (ReadingChunk).
+
+``compact_readings`` packs raw SensorReading rows older than a cutoff into
+one blob per sensor and UTC day, Gorilla-style:
+
+- timestamps (microseconds) as delta-of-deltas, which are ~0 for regular sampling
+- reading ids and seq as deltas
+- distance_cm as the XOR of consecutive IEEE-754 bit patterns (lossless)
+- the two-decimal fields as fixed-point hundredths, delta encoded
+- null masks and motion_detected as packed bits
+
+Every column is fixed width and mostly zeros, so the concatenation is then
+deflated. Decoding is vectorised with NumPy and lossless.
+"""
+import struct
+import time
+import zlib
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from water.models import ReadingChunk, SensorReading
+from water.services.archive import ARCHIVE_FIELDS, EPOCH, reading_archive
+
+ENCODING = 1
+# encoding version, row count
+HEADER = struct.Struct(">BI")
+DECIMAL_FIELDS = ("water_level", "humidity", "temperature", "soil_moisture")
+# ids per DELETE, below SQLite's bound-parameter limit
+DELETE_BATCH = 900
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime(day.year, day.month, day.day, tzinfo=dt_timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def _micros(moment: datetime) -> int:
+    delta = moment - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _delta(values: np.ndarray) -> bytes:
+    # int64 overflow wraps, and so does the cumsum that undoes it.
+    return np.diff(values, prepend=np.int64(0)).astype(">i8").tobytes()
+
+
+def _bits(mask: np.ndarray) -> bytes:
+    return np.packbits(mask).tobytes()
+
+
+def encode_chunk(rows: list[tuple]) -> bytes:
+    """Pack ARCHIVE_FIELDS tuples (sorted by recorded_at) into a chunk blob."""
+    columns = dict(zip(ARCHIVE_FIELDS, zip(*rows)))
+    parts = [
+        HEADER.pack(ENCODING, len(rows)),
+        _delta(np.array(columns["id"], dtype=np.int64)),
+        _delta(np.diff(np.array([_micros(value) for value in columns["recorded_at"]], dtype=np.int64), prepend=np.int64(0))),
+    ]
+
+    seq_present = np.array([value is not None for value in columns["seq"]], dtype=bool)
+    parts += [_bits(seq_present), _delta(np.array([value or 0 for value in columns["seq"]], dtype=np.int64))]
+
+    distance_present = np.array([value is not None for value in columns["distance_cm"]], dtype=bool)
+    distance = np.array([value or 0.0 for value in columns["distance_cm"]], dtype=np.float64).view(np.uint64)
+    xored = distance ^ np.concatenate([np.zeros(1, dtype=np.uint64), distance[:-1]])
+    parts += [_bits(distance_present), xored.astype(">u8").tobytes()]
+
+    for name in DECIMAL_FIELDS:
+        present = np.array([value is not None for value in columns[name]], dtype=bool)
+        hundredths = np.array([int(Decimal(value).scaleb(2)) if value is not None else 0 for value in columns[name]], dtype=np.int64)
+        parts += [_bits(present), _delta(hundredths)]
+
+    parts.append(_bits(np.array(columns["motion_detected"], dtype=bool)))
+    return zlib.compress(b"".join(parts), 9)
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.raw = zlib.decompress(data)
+        version, self.count = HEADER.unpack_from(self.raw)
+        if version != ENCODING:
+            raise ValueError(f"Unknown reading chunk encoding {version}")
+        self.offset = HEADER.size
+
+    def ints(self) -> np.ndarray:
+        values = np.frombuffer(self.raw, dtype=">i8", count=self.count, offset=self.offset).astype(np.int64)
+        self.offset += 8 * self.count
+        return values
+
+    def deltas(self) -> np.ndarray:
+        return np.cumsum(self.ints())
+
+    def uints(self) -> np.ndarray:
+        values = np.frombuffer(self.raw, dtype=">u8", count=self.count, offset=self.offset).astype(np.uint64)
+        self.offset += 8 * self.count
+        return values
+
+    def bits(self) -> np.ndarray:
+        size = (self.count + 7) // 8
+        packed = np.frombuffer(self.raw, dtype=np.uint8, count=size, offset=self.offset)
+        self.offset += size
+        return np.unpackbits(packed, count=self.count).astype(bool)
+
+
+def decode_chunk(data: bytes) -> dict[str, np.ndarray]:
+    """Chunk blob -> column arrays; ``recorded_at`` in epoch microseconds, absent values masked by ``<name>_present``."""
+    reader = _Reader(data)
+    columns = {"id": reader.deltas(), "recorded_at": np.cumsum(reader.deltas())}
+    columns["seq_present"], columns["seq"] = reader.bits(), reader.deltas()
+    columns["distance_cm_present"] = reader.bits()
+    # Undo the running XOR: each value is the prefix XOR of the stored words.
+    columns["distance_cm"] = np.bitwise_xor.accumulate(reader.uints()).view(np.float64)
+    for name in DECIMAL_FIELDS:
+        columns[f"{name}_present"], columns[name] = reader.bits(), reader.deltas()
+    columns["motion_detected"] = reader.bits()
+    return columns
+
+
+def chunk_rows(data: bytes) -> list[tuple]:
+    """Chunk blob -> ARCHIVE_FIELDS tuples, for merging and archiving."""
+    return [
+        (
+            reading.id,
+            reading.recorded_at,
+            reading.seq,
+            reading.distance_cm,
+            reading.water_level,
+            reading.humidity,
+            reading.temperature,
+            reading.soil_moisture,
+            reading.motion_detected,
+        )
+        for reading in chunk_readings(0, data)
+    ]
+
+
+def _window(columns: dict[str, np.ndarray], start: datetime | None, end: datetime | None) -> np.ndarray:
+    selected = np.ones(len(columns["id"]), dtype=bool)
+    if start is not None:
+        selected &= columns["recorded_at"] >= _micros(start)
+    if end is not None:
+        selected &= columns["recorded_at"] < _micros(end)
+    return selected
+
+
+def chunk_readings(
+    sensor_id: int,
+    data: bytes,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    ids: set[int] | None = None,
+) -> list[SensorReading]:
+    """Decode a chunk into unsaved SensorReading instances, optionally limited to [start, end) and ``ids``."""
+    columns = decode_chunk(data)
+    selected = _window(columns, start, end)
+    if ids is not None:
+        selected &= np.isin(columns["id"], list(ids))
+
+    readings = []
+    for index in np.flatnonzero(selected):
+        values = {
+            name: (Decimal(int(columns[name][index])).scaleb(-2) if columns[f"{name}_present"][index] else None)
+            for name in DECIMAL_FIELDS
+        }
+        readings.append(
+            SensorReading(
+                id=int(columns["id"][index]),
+                sensor_id=sensor_id,
+                recorded_at=EPOCH + timedelta(microseconds=int(columns["recorded_at"][index])),
+                seq=int(columns["seq"][index]) if columns["seq_present"][index] else None,
+                distance_cm=float(columns["distance_cm"][index]) if columns["distance_cm_present"][index] else None,
+                motion_detected=bool(columns["motion_detected"][index]),
+                **values,
+            )
+        )
+    return readings
+
+
+def cold_readings(sensor_id: int, start: datetime, end: datetime, ids: set[int] | None = None) -> list[SensorReading]:
+    """Readings in [start, end) that no longer live in SensorReading: compacted chunks, then the archive."""
+    return cold_readings_many([sensor_id], start, end, ids)[sensor_id]
+
+
+def cold_readings_many(
+    sensor_ids: list[int], start: datetime, end: datetime, ids: set[int] | None = None
+) -> dict[int, list[SensorReading]]:
+    """cold_readings for several sensors, with a single chunk query."""
+    readings: dict[int, list[SensorReading]] = defaultdict(list)
+    chunks = ReadingChunk.objects.filter(sensor_id__in=sensor_ids, start_at__lt=end, end_at__gte=start).order_by("sensor_id", "day")
+    for chunk in chunks:
+        readings[chunk.sensor_id].extend(chunk_readings(chunk.sensor_id, bytes(chunk.data), start, end, ids))
+    for sensor_id in sensor_ids:
+        if reading_archive.has_sensor(sensor_id):
+            seen = {reading.id for reading in readings[sensor_id]}
+            readings[sensor_id].extend(
+                reading for reading in reading_archive.read(sensor_id, start, end, ids) if reading.id not in seen
+            )
+    return readings
+
+
+def cold_series(sensor_id: int, start: datetime, end: datetime, field: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (ids, recorded_at epoch microseconds, values) of one numeric field for
+    the cold readings in [start, end), straight from the decoded columns
+    without building model instances. Null values are NaN; order is arbitrary.
+    """
+    parts = []
+    chunks = ReadingChunk.objects.filter(sensor_id=sensor_id, start_at__lt=end, end_at__gte=start).values_list("data", flat=True)
+    for data in chunks:
+        columns = decode_chunk(bytes(data))
+        values = columns[field] / 100 if field in DECIMAL_FIELDS else columns[field]
+        values = np.where(columns[f"{field}_present"], values, np.nan)
+        selected = _window(columns, start, end)
+        parts.append((columns["id"][selected], columns["recorded_at"][selected], values[selected]))
+    if reading_archive.has_sensor(sensor_id):
+        columns = reading_archive.columns(sensor_id, start, end)
+        if columns:
+            fresh = ~np.isin(columns["id"], np.concatenate([part[0] for part in parts])) if parts else slice(None)
+            parts.append((columns["id"][fresh], columns["recorded_at"][fresh], columns[field][fresh]))
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    return tuple(np.concatenate([part[index] for part in parts]) for index in range(3))
+
+
+def cold_floor(sensor_id: int) -> datetime | None:
+    """Earliest moment covered by the sensor's compacted chunks or archive, if it has any cold data."""
+    candidates = [
+        ReadingChunk.objects.filter(sensor_id=sensor_id).order_by("start_at").values_list("start_at", flat=True).first(),
+        reading_archive.oldest_month(sensor_id),
+    ]
+    candidates = [moment for moment in candidates if moment is not None]
+    return min(candidates) if candidates else None
+
+
+def compact_readings(before: datetime, pause: float = 0.0, log=None) -> dict:
+    """
+    Move raw readings recorded before ``before`` into per-sensor/UTC-day
+    chunks. Each sensor-day is one transaction that merges into any existing
+    chunk and deletes exactly the rows it packed, so reruns and rows that
+    arrive mid-run are safe. Refresh rollups before calling this.
+    """
+    stats = {"sensors": 0, "chunks": 0, "readings": 0, "packed": 0, "chunk_bytes": 0}
+    old = SensorReading.objects.filter(recorded_at__lt=before)
+    for sensor_id in list(old.order_by().values_list("sensor_id", flat=True).distinct()):
+        stats["sensors"] += 1
+        while True:
+            oldest = old.filter(sensor_id=sensor_id).order_by("recorded_at").values_list("recorded_at", flat=True).first()
+            if oldest is None:
+                break
+            day = oldest.astimezone(dt_timezone.utc).date()
+            day_start, day_end = day_bounds(day)
+            rows = list(
+                old.filter(sensor_id=sensor_id, recorded_at__gte=day_start, recorded_at__lt=min(day_end, before))
+                .order_by("recorded_at", "id")
+                .values_list(*ARCHIVE_FIELDS)
+            )
+            with transaction.atomic():
+                chunk = ReadingChunk.objects.select_for_update().filter(sensor_id=sensor_id, day=day).first()
+                merged = {row[0]: row for row in chunk_rows(bytes(chunk.data))} if chunk else {}
+                merged.update((row[0], row) for row in rows)
+                packed = sorted(merged.values(), key=lambda row: (row[1], row[0]))
+                data = encode_chunk(packed)
+                ReadingChunk.objects.update_or_create(
+                    sensor_id=sensor_id,
+                    day=day,
+                    defaults={
+                        "start_at": packed[0][1],
+                        "end_at": packed[-1][1],
+                        "count": len(packed),
+                        "encoding": ENCODING,
+                        "data": data,
+                    },
+                )
+                ids = [row[0] for row in rows]
+                for offset in range(0, len(ids), DELETE_BATCH):
+                    SensorReading.objects.filter(id__in=ids[offset : offset + DELETE_BATCH]).delete()
+            stats["chunks"] += 1
+            stats["readings"] += len(rows)
+            stats["packed"] += len(packed)
+            stats["chunk_bytes"] += len(data)
+            if log:
+                log(f"sensor {sensor_id} {day}: {len(rows)} readings -> {len(data)} bytes")
+            if pause:
+                time.sleep(pause)
+    return stats
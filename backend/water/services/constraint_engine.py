@@ -1,7 +1,13 @@
 from decimal import Decimal
-from typing import Optional
+from typing import Iterable, Optional
+
+import numpy as np
 
 from water.models import ClimateSnapshot
+from water.services.cents import to_cents
+
+# Stand-in for "no climate snapshot" in days_until_rainfall columns.
+NO_RAINFALL = -1
 
 
 class ConstraintEngine:
@@ -39,7 +45,52 @@ class ConstraintEngine:
             return "high" if days_of_supply < 5 else "moderate"
         return "low"
 
+    def evaluate_batch(
+        self,
+        available_liters: Iterable[float],
+        daily_demand_liters: Iterable[float],
+        days_until_rainfall: Iterable[int | None],
+    ) -> dict[str, np.ndarray]:
+        """
+        Columnar ``evaluate`` over parallel per-owner columns (liters with at
+        most two decimals, as the engines produce; None or NO_RAINFALL for a
+        missing climate snapshot). ``days_of_supply`` and ``risk_level``
+        equal the scalar results: the ratio is compared and rounded
+        (half-even) in integer cents rather than divided in floating point.
+        """
+        available = to_cents(np.asarray(available_liters, dtype=np.float64))
+        demand = to_cents(np.asarray(daily_demand_liters, dtype=np.float64))
+        if isinstance(days_until_rainfall, np.ndarray):
+            rainfall = days_until_rainfall.astype(np.int64)
+        else:
+            rainfall = np.array([NO_RAINFALL if days is None else days for days in days_until_rainfall], dtype=np.int64)
+        has_demand = demand > 0
+        divisor = np.where(has_demand, demand, 1)
 
+        # days_of_supply rounded to 2 places: 100 * available / demand, half to even.
+        scaled = np.abs(available) * 100
+        quotient, remainder = np.divmod(scaled, divisor)
+        quotient += (2 * remainder > divisor) | ((2 * remainder == divisor) & (quotient % 2 == 1))
+        days = np.where(has_demand, np.sign(available) * quotient, 0) / 100
 
+        # "days_of_supply < k" is "available < k * demand", exact in cents; without demand it is 0 < k.
+        def below(k):
+            return np.where(has_demand, available < k * demand, 0 < k)
 
-
+        no_climate = rainfall == NO_RAINFALL
+        risk = np.select(
+            [
+                no_climate & below(3),
+                no_climate & below(7),
+                no_climate,
+                below(rainfall) & below(5),
+                below(rainfall),
+            ],
+            ["critical", "high", "moderate", "high", "moderate"],
+            default="low",
+        )
+        return {
+            "days_of_supply": days,
+            "days_until_rainfall": rainfall,
+            "risk_level": risk,
+        }
@@ -0,0 +1,128 @@
+"""
+Per-user cache of the dashboard summary.
+
+Each user has a version token in Django's cache; the summary is stored
+together with the version it was built for and only served while that
+version is current. Invalidation deletes the token, so the next load mints
+a new one and rebuilds:
+
+- readings: ``upsert_latest`` invalidates the owners of sensors whose
+  SensorLatest row changed, after commit
+- storages, demand units, climate snapshots, profiles, systems and sensors:
+  post_save / post_delete signals (water/signals.py)
+
+Invalidations are also broadcast on the live event bus, so with the default
+local-memory cache every web process drops its own copy; with a shared
+backend (CACHE_BACKEND) the extra deletes are harmless. Only one caller per
+cache rebuilds a missing summary; concurrent loads wait for its result.
+"""
+import threading
+import time
+import uuid
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+
+from water.models import Sensor
+from water.services.events import event_hub
+
+EVENT_TYPE = "dashboard"
+# How often a waiting caller re-checks for the summary being rebuilt.
+WAIT_INTERVAL = 0.05
+
+
+class DashboardCache:
+    """Versioned dashboard summaries in a Django cache, with a rebuild lock per user and version."""
+
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+        self._listening = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def _keys(user_id: int) -> tuple[str, str, str]:
+        return f"dashboard:version:{user_id}", f"dashboard:summary:{user_id}", f"dashboard:lock:{user_id}"
+
+    def _listen(self) -> None:
+        with self._lock:
+            if not self._listening:
+                self._listening = True
+                event_hub.add_listener(self._on_events)
+
+    def _on_events(self, events: list[dict]) -> None:
+        user_ids = [user_id for event in events if event.get("type") == EVENT_TYPE for user_id in event["user_ids"]]
+        if user_ids:
+            self.invalidate(user_ids, broadcast=False)
+
+    def get_or_build(self, user_id: int, build: Callable[[], dict | None]) -> tuple[dict | None, str]:
+        """
+        (summary, version) for the user, calling ``build`` only when no
+        summary exists for the current version and no other caller is
+        already building it. ``build`` returning None is not cached.
+        """
+        self._listen()
+        version_key, summary_key, lock_key = self._keys(user_id)
+        found = self.cache.get_many([version_key, summary_key])
+        version = found.get(version_key)
+        if version is None:
+            self.cache.add(version_key, uuid.uuid4().hex, timeout=None)
+            version = self.cache.get(version_key)
+        entry = found.get(summary_key)
+        if entry and entry[0] == version:
+            self.hits += 1
+            return entry[1], version
+
+        self.misses += 1
+        lock_key = f"{lock_key}:{version}"
+        if not self.cache.add(lock_key, 1, settings.DASHBOARD_CACHE_LOCK_SECONDS):
+            # Someone else is rebuilding: wait for their result instead of piling on.
+            self.waits += 1
+            deadline = time.monotonic() + settings.DASHBOARD_CACHE_LOCK_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(WAIT_INTERVAL)
+                current = self.cache.get_many([summary_key, lock_key])
+                entry = current.get(summary_key)
+                if entry and entry[0] == version:
+                    return entry[1], version
+                if lock_key not in current:
+                    break  # the builder gave up without caching; build here
+            return build(), version
+        try:
+            summary = build()
+            if summary is not None:
+                # Tagged with the version it was built for: if an invalidation
+                # landed mid-build the entry is simply never served.
+                self.cache.set(summary_key, (version, summary), settings.DASHBOARD_CACHE_TTL_SECONDS)
+            return summary, version
+        finally:
+            self.cache.delete(lock_key)
+
+    def invalidate(self, user_ids: Iterable[int], broadcast: bool = True) -> None:
+        user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+        if not user_ids:
+            return
+        self.cache.delete_many([self._keys(user_id)[0] for user_id in user_ids])
+        if broadcast:
+            event_hub.publish([{"type": EVENT_TYPE, "user_ids": user_ids}])
+
+    def invalidate_sensors(self, sensor_ids: Iterable[int]) -> None:
+        """Invalidate the owners of these sensors (one query)."""
+        self.invalidate(
+            Sensor.objects.filter(id__in=list(sensor_ids), system__isnull=False)
+            .values_list("system__owner__user_id", flat=True)
+            .distinct()
+        )
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "waits": self.waits, "backend": self.cache.__class__.__name__}
+
+
+dashboard_cache = DashboardCache()
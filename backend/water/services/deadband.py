@@ -0,0 +1,130 @@
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+
+from water.models import SensorReading
+from water.services.sensor_cache import SensorRef
+
+
+class _SensorState:
+    __slots__ = ("stored_at", "distance_cm", "humidity", "temperature", "seen_at", "seen")
+
+    def __init__(self):
+        self.stored_at: datetime | None = None
+        self.distance_cm: float | None = None
+        self.humidity: Decimal | None = None
+        self.temperature: Decimal | None = None
+        self.seen_at: datetime | None = None
+        self.seen: SensorReading | None = None
+
+
+def _moved(previous, current, threshold) -> bool:
+    if current is None:
+        return False
+    if previous is None:
+        return True
+    return abs(current - previous) >= threshold
+
+
+class DeadbandFilter:
+    """
+    Change-based write suppression for slowly moving tank readings.
+
+    A reading is stored when distance_cm, humidity or temperature moved by at
+    least the sensor's deadband since the last *stored* reading, or when the
+    sensor's heartbeat interval has passed. Every reading, stored or not,
+    updates the in-memory "last seen" state. Out-of-order (backfilled)
+    readings older than the last stored one are always kept.
+
+    ``decide`` does not mutate state; ``commit`` applies it once the batch
+    has been written, so a failed and retried batch is judged the same way.
+    """
+
+    def __init__(self, enabled: bool = True, max_devices: int = 50000):
+        self.enabled = enabled
+        self.max_devices = max_devices
+        self._states: dict[int, _SensorState] = {}
+        self._lock = threading.Lock()
+
+    def thresholds(self, ref: SensorRef) -> tuple[float, Decimal, Decimal, timedelta]:
+        return (
+            ref.deadband_distance_cm if ref.deadband_distance_cm is not None else settings.DEADBAND_DISTANCE_CM,
+            ref.deadband_humidity if ref.deadband_humidity is not None else Decimal(str(settings.DEADBAND_HUMIDITY)),
+            (
+                ref.deadband_temperature
+                if ref.deadband_temperature is not None
+                else Decimal(str(settings.DEADBAND_TEMPERATURE))
+            ),
+            timedelta(
+                seconds=ref.heartbeat_seconds if ref.heartbeat_seconds is not None else settings.DEADBAND_HEARTBEAT_SECONDS
+            ),
+        )
+
+    def decide(self, readings: list[SensorReading | None], refs: dict[int, SensorRef]) -> tuple[list[bool], dict]:
+        """Return per-reading keep flags and the pending state to ``commit`` after a successful write."""
+        keep = [reading is not None for reading in readings]
+        pending: dict[int, _SensorState] = {}
+        with self._lock:
+            for index, reading in enumerate(readings):
+                if reading is None:
+                    continue
+                state = pending.get(reading.sensor_id)
+                if state is None:
+                    state = _SensorState()
+                    current = self._states.get(reading.sensor_id)
+                    if current is not None:
+                        for slot in _SensorState.__slots__:
+                            setattr(state, slot, getattr(current, slot))
+                    pending[reading.sensor_id] = state
+
+                if state.seen_at is None or reading.recorded_at >= state.seen_at:
+                    state.seen_at, state.seen = reading.recorded_at, reading
+
+                if not self.enabled or state.stored_at is None:
+                    self._store(state, reading)
+                    continue
+                if reading.recorded_at < state.stored_at:
+                    # Backfilled history is kept as-is and does not move the baseline.
+                    continue
+
+                distance_band, humidity_band, temperature_band, heartbeat = self.thresholds(refs[reading.sensor_id])
+                if (
+                    reading.recorded_at - state.stored_at >= heartbeat
+                    or _moved(state.distance_cm, reading.distance_cm, distance_band)
+                    or _moved(state.humidity, reading.humidity, humidity_band)
+                    or _moved(state.temperature, reading.temperature, temperature_band)
+                ):
+                    self._store(state, reading)
+                else:
+                    keep[index] = False
+        return keep, pending
+
+    @staticmethod
+    def _store(state: _SensorState, reading: SensorReading) -> None:
+        state.stored_at = reading.recorded_at
+        state.distance_cm = reading.distance_cm
+        state.humidity = reading.humidity
+        state.temperature = reading.temperature
+
+    def commit(self, pending: dict) -> None:
+        with self._lock:
+            self._states.update(pending)
+            if len(self._states) > self.max_devices:
+                # Forgetting a sensor only costs one extra stored reading for it.
+                for sensor_id in list(self._states)[: len(self._states) - self.max_devices]:
+                    del self._states[sensor_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+    def last_seen(self, sensor_id: int) -> SensorReading | None:
+        """Newest reading received for the sensor in this process, stored or suppressed."""
+        with self._lock:
+            state = self._states.get(sensor_id)
+            return state.seen if state else None
+
+
+deadband = DeadbandFilter(enabled=settings.DEADBAND_ENABLED)
@@ -0,0 +1,90 @@
+import hashlib
+import threading
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+
+def derive_seq(record: dict) -> int | None:
+    """
+    Content hash for readings that carry a device timestamp but no ``seq``.
+    Derived keys are negative so they never collide with device counters.
+    Readings without a device timestamp get no key: identical values sent
+    minutes apart are real samples, not retransmissions.
+    """
+    if record.get("recorded_at") is None:
+        return None
+    content = "|".join(
+        str(record.get(field))
+        for field in (
+            "device_id",
+            "recorded_at",
+            "distance_cm",
+            "water_level",
+            "humidity",
+            "temperature",
+            "soil_moisture",
+            "motion_detected",
+        )
+    )
+    digest = hashlib.blake2b(content.encode("utf-8"), digest_size=8).digest()
+    return -(int.from_bytes(digest, "big") >> 1) - 1
+
+
+class _DeviceWindow:
+    __slots__ = ("order", "members", "max_seq")
+
+    def __init__(self, size: int):
+        self.order: deque = deque(maxlen=size)
+        self.members: set[int] = set()
+        self.max_seq: int | None = None
+
+
+class DedupWindow:
+    """
+    Per-sensor sliding window of recently stored sequence numbers.
+
+    Device counters must increase monotonically per device (persist them
+    across reboots): once a device has been checked against the database,
+    a counter above the highest one stored is known to be new without a query.
+    """
+
+    def __init__(self, size: int = 1024, max_devices: int = 50000):
+        self.size = size
+        self.max_devices = max_devices
+        self._devices: OrderedDict[int, _DeviceWindow] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def contains(self, sensor_id: int, seq: int) -> bool:
+        with self._lock:
+            window = self._devices.get(sensor_id)
+            return window is not None and seq in window.members
+
+    def is_new(self, sensor_id: int, seq: int) -> bool:
+        """True when ``seq`` is an explicit counter above everything stored for this device."""
+        with self._lock:
+            window = self._devices.get(sensor_id)
+            return seq >= 0 and window is not None and window.max_seq is not None and seq > window.max_seq
+
+    def remember(self, sensor_id: int, seq: int) -> None:
+        with self._lock:
+            window = self._devices.get(sensor_id)
+            if window is None:
+                window = self._devices[sensor_id] = _DeviceWindow(self.size)
+                while len(self._devices) > self.max_devices:
+                    self._devices.popitem(last=False)
+            else:
+                self._devices.move_to_end(sensor_id)
+            if len(window.order) == window.order.maxlen:
+                window.members.discard(window.order[0])
+            window.order.append(seq)
+            window.members.add(seq)
+            if seq >= 0 and (window.max_seq is None or seq > window.max_seq):
+                window.max_seq = seq
+
+    def clear(self) -> None:
+        with self._lock:
+            self._devices.clear()
+
+
+dedup_window = DedupWindow(size=settings.DEDUP_WINDOW_SIZE, max_devices=settings.DEDUP_MAX_DEVICES)
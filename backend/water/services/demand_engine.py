@@ -1,21 +1,50 @@
 from decimal import Decimal
 from typing import Iterable
 
+import numpy as np
+
 from water.models import WaterDemandUnit
+from water.services.cents import group_sum, liters, owner_index, to_cents
+
+CATEGORIES = ("human", "livestock", "crop")
 
 
 class DemandEngine:
     """Aggregates daily water demand for people, livestock, and crops."""
 
     def daily_demand(self, demand_units: Iterable[WaterDemandUnit]) -> dict:
-        totals = {"human": Decimal("0"), "livestock": Decimal("0"), "crop": Decimal("0")}
+        totals = {category: Decimal("0") for category in CATEGORIES}
         for unit in demand_units:
             totals[unit.category] += unit.daily_need_liters * unit.count
 
         total = sum(totals.values())
         return {"totals": {k: float(v) for k, v in totals.items()}, "total_daily_liters": float(total)}
 
-
-
-
-
+    def daily_demand_batch(
+        self,
+        owner_ids: Iterable[int],
+        unit_owners: Iterable[int],
+        unit_categories: Iterable[str],
+        unit_needs: Iterable,
+        unit_counts: Iterable[int],
+    ) -> dict:
+        """
+        Columnar ``daily_demand``: one row per demand unit as parallel
+        columns. Returns per-category and total arrays aligned with the
+        sorted unique ``owner_ids``, equal to the scalar results.
+        """
+        owners = owner_index(owner_ids)
+        unit_owners = np.fromiter(unit_owners, dtype=np.int64)
+        categories = np.asarray(list(unit_categories), dtype=object)
+        needs = to_cents(unit_needs) * np.fromiter(unit_counts, dtype=np.int64)
+
+        totals = {}
+        for category in CATEGORIES:
+            mask = categories == category
+            totals[category] = group_sum(owners, unit_owners[mask], needs[mask])
+        total = sum(totals.values())
+        return {
+            "owner_ids": owners,
+            "totals": {category: liters(cents) for category, cents in totals.items()},
+            "total_daily_liters": liters(total),
+        }
@@ -0,0 +1,78 @@
+"""
+Chart downsampling of time series with NumPy.
+
+- ``lttb``: Largest-Triangle-Three-Buckets. Keeps the first and last point and,
+  per bucket, the point forming the largest triangle with the previously kept
+  point and the next bucket's average; preserves the visual shape of a line.
+- ``minmax``: the minimum and maximum of each bucket, so no spike is lost.
+
+Both take sorted ``x`` (e.g. epoch seconds) and ``y`` arrays and return the
+sorted indices of the points to keep, at most ``points`` of them.
+"""
+import numpy as np
+
+LTTB = "lttb"
+MINMAX = "minmax"
+METHODS = (LTTB, MINMAX)
+
+
+def _edges(size: int, buckets: int) -> np.ndarray:
+    # Bucket boundaries over the interior points [1, size - 1), as even as integer division allows.
+    edges = (np.arange(buckets + 1) * ((size - 2) / buckets)).astype(np.int64) + 1
+    edges[-1] = size - 1
+    return edges
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    size = len(x)
+    if points >= size or points < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = _edges(size, points - 2)
+
+    # Every bucket's centroid in one pass; the last point closes the final triangle.
+    counts = np.diff(edges)
+    avg_x = np.append(np.add.reduceat(x[1:-1], edges[:-1] - 1) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[1:-1], edges[:-1] - 1) / counts, y[-1])
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+    previous = 0
+    # Each pick depends on the previous one, so buckets are walked in order; the work within one is vectorised.
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        cx, cy = avg_x[bucket + 1], avg_y[bucket + 1]
+        areas = np.abs((ax - cx) * (y[start:end] - ay) - (ax - x[start:end]) * (cy - ay))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    size = len(x)
+    if points >= size:
+        return np.arange(size)
+    if points < 4:
+        # Too few for a min and a max per bucket.
+        return lttb(x, y, points)
+    y = np.asarray(y, dtype=np.float64)
+    edges = _edges(size, (points - 2) // 2)
+    interior = y[1:-1]
+    starts = edges[:-1] - 1
+    bucket_of = np.repeat(np.arange(len(starts)), np.diff(edges))
+
+    # First position of each bucket's extreme: mask matches, then keep the first match per bucket.
+    picks = [np.array([0, size - 1])]
+    for extreme in (np.minimum.reduceat(interior, starts), np.maximum.reduceat(interior, starts)):
+        matches = np.flatnonzero(interior == extreme[bucket_of])
+        _, first = np.unique(bucket_of[matches], return_index=True)
+        picks.append(matches[first] + 1)
+    return np.unique(np.concatenate(picks))
+
+
+def downsample(x: np.ndarray, y: np.ndarray, points: int, method: str = LTTB) -> np.ndarray:
+    if method == MINMAX:
+        return minmax(x, y, points)
+    return lttb(x, y, points)
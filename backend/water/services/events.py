@@ -0,0 +1,305 @@
+"""
+Inter-process event bus for live reading pushes.
+
+Writers (the MQTT listener, HTTP ingest) publish one event per sensor whose
+SensorLatest row changed, after the transaction commits. Web workers that
+serve live streams listen on the bus and hand events to their connections'
+Subscriptions; other in-process listeners (the dashboard cache) get every
+event and use the bus for their own message types. Backends, picked by EVENT_BUS:
+
+- ``postgres``: ``pg_notify`` / ``LISTEN`` on EVENT_CHANNEL; no extra infrastructure
+- ``socket``: Unix datagram sockets in EVENT_SOCKET_DIR, one per listening
+  process; publishers send to every socket there (works with SQLite)
+- ``local``: in-process only, for tests and single-process development
+- ``auto`` (default): postgres on PostgreSQL, else socket where AF_UNIX exists, else local
+
+Delivery is best effort: an event that cannot be sent (a full socket buffer,
+a dead listener) is dropped, and clients resync from the initial snapshot
+when they reconnect.
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+from water.models import SensorLatest
+
+logger = logging.getLogger(__name__)
+
+# Keep every message well under both the pg_notify payload limit (8000 bytes) and typical datagram limits.
+MAX_MESSAGE_BYTES = 7000
+
+
+def reading_event(sensor_id: int, values: dict) -> dict:
+    """Event payload for a sensor's new latest values (SensorLatest field names)."""
+    return {"type": "reading", "sensor_id": sensor_id, **values}
+
+
+def latest_from_event(event: dict) -> SensorLatest:
+    """Unsaved SensorLatest rebuilt from a (JSON-decoded) reading event, for status and serializers."""
+    latest = SensorLatest(sensor_id=event["sensor_id"], reading_id=event.get("reading_id"))
+    for field in SensorLatest._meta.concrete_fields:
+        if field.name in event and not field.is_relation:
+            setattr(latest, field.attname, field.to_python(event[field.name]))
+    return latest
+
+
+def _messages(events: list[dict]) -> list[bytes]:
+    """Pack events into JSON arrays of at most MAX_MESSAGE_BYTES each."""
+    messages, batch, size = [], [], 2
+    for event in events:
+        encoded = json.dumps(event, cls=DjangoJSONEncoder, separators=(",", ":"))
+        if batch and size + len(encoded) + 1 > MAX_MESSAGE_BYTES:
+            messages.append(("[" + ",".join(batch) + "]").encode())
+            batch, size = [], 2
+        batch.append(encoded)
+        size += len(encoded) + 1
+    if batch:
+        messages.append(("[" + ",".join(batch) + "]").encode())
+    return messages
+
+
+class Subscription:
+    """
+    One live connection's view of the bus: events for ``sensor_ids`` only.
+
+    Backpressure: undelivered events are coalesced per sensor, so a slow
+    client holds at most one pending event per device (the newest) and
+    never an unbounded queue. Usable from a thread (``wait``) or from an
+    event loop (``wait_async``).
+    """
+
+    def __init__(self, hub: "EventHub", sensor_ids: set[int]):
+        self.hub = hub
+        self.sensor_ids = sensor_ids
+        self.coalesced = 0
+        self._pending: OrderedDict[int, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._async_ready: asyncio.Event | None = None
+
+    def deliver(self, event: dict) -> None:
+        with self._lock:
+            if self._pending.pop(event["sensor_id"], None) is not None:
+                self.coalesced += 1
+            self._pending[event["sensor_id"]] = event
+        self._ready.set()
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._async_ready.set)
+            except RuntimeError:
+                pass  # loop already closed; the connection is going away
+
+    def drain(self) -> list[dict]:
+        with self._lock:
+            events = list(self._pending.values())
+            self._pending.clear()
+            self._ready.clear()
+        return events
+
+    def wait(self, timeout: float) -> list[dict]:
+        """Block up to ``timeout`` seconds for events; [] on timeout."""
+        self._ready.wait(timeout)
+        return self.drain()
+
+    async def wait_async(self, timeout: float) -> list[dict]:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._async_ready = asyncio.Event()
+        if not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._async_ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._async_ready.clear()
+        return self.drain()
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    """Process-wide fan-out from the bus listener to local subscriptions and listeners."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: set[Subscription] = set()
+        self._listeners: list = []
+        self._backend: "_Backend | None" = None
+
+    @property
+    def backend(self) -> "_Backend":
+        with self._lock:
+            if self._backend is None:
+                self._backend = _make_backend(self)
+            return self._backend
+
+    def publish(self, events: list[dict]) -> None:
+        if events:
+            try:
+                self.backend.publish(events)
+            except Exception:  # noqa: BLE001 - live pushes must never break ingest
+                logger.exception("Publishing %d live events failed", len(events))
+
+    def subscribe(self, sensor_ids: set[int]) -> Subscription:
+        subscription = Subscription(self, set(sensor_ids))
+        self.backend.listen()
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def add_listener(self, callback) -> None:
+        """Call ``callback(events)`` with every batch of events this process receives from the bus."""
+        self.backend.listen()
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def dispatch(self, events: list[dict]) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(events)
+            except Exception:  # noqa: BLE001 - one bad listener must not starve the streams
+                logger.exception("Live event listener %r failed", listener)
+        for event in events:
+            for subscription in subscriptions:
+                if event.get("sensor_id") in subscription.sensor_ids:
+                    subscription.deliver(event)
+
+    def dispatch_message(self, message: bytes | str) -> None:
+        try:
+            events = json.loads(message)
+        except ValueError:
+            logger.warning("Dropping malformed live event message")
+            return
+        self.dispatch(events if isinstance(events, list) else [events])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": type(self._backend).name if self._backend else None,
+                "subscriptions": len(self._subscriptions),
+            }
+
+
+class _Backend:
+    name = "local"
+
+    def __init__(self, hub: EventHub):
+        self.hub = hub
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def publish(self, events: list[dict]) -> None:
+        self.hub.dispatch(json.loads(json.dumps(events, cls=DjangoJSONEncoder)))
+
+    def listen(self) -> None:
+        with self._start_lock:
+            if not self._started:
+                self._started = True
+                self.start()
+
+    def start(self) -> None:
+        pass
+
+
+class _PostgresBackend(_Backend):
+    name = "postgres"
+
+    def publish(self, events: list[dict]) -> None:
+        with connection.cursor() as cursor:
+            for message in _messages(events):
+                cursor.execute("SELECT pg_notify(%s, %s)", [settings.EVENT_CHANNEL, message.decode()])
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, name="live-events-pg", daemon=True).start()
+
+    def _run(self) -> None:
+        import psycopg2
+
+        while True:
+            try:
+                listener = psycopg2.connect(**connection.get_connection_params())
+                listener.autocommit = True
+                with listener.cursor() as cursor:
+                    cursor.execute(f"LISTEN {connection.ops.quote_name(settings.EVENT_CHANNEL)}")
+                while True:
+                    if select.select([listener], [], [], 30) != ([], [], []):
+                        listener.poll()
+                        while listener.notifies:
+                            self.hub.dispatch_message(listener.notifies.pop(0).payload)
+            except Exception:  # noqa: BLE001 - reconnect after database restarts
+                logger.exception("Live event listener lost its connection; reconnecting")
+                threading.Event().wait(5)
+
+
+class _SocketBackend(_Backend):
+    name = "socket"
+
+    def __init__(self, hub: EventHub):
+        super().__init__(hub)
+        self.directory = Path(settings.EVENT_SOCKET_DIR)
+        self._sender: socket.socket | None = None
+
+    def publish(self, events: list[dict]) -> None:
+        if not self.directory.is_dir():
+            return  # nobody is listening
+        if self._sender is None:
+            self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sender.setblocking(False)
+        for message in _messages(events):
+            for path in self.directory.glob("*.sock"):
+                try:
+                    self._sender.sendto(message, str(path))
+                except BlockingIOError:
+                    # That worker's receive buffer is full: drop rather than stall ingest.
+                    logger.debug("Live event dropped for busy listener %s", path.name)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Its process is gone; clean up the stale socket.
+                    path.unlink(missing_ok=True)
+
+    def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.bind(str(path))
+        threading.Thread(target=self._run, args=(receiver,), name="live-events-socket", daemon=True).start()
+
+    def _run(self, receiver: socket.socket) -> None:
+        while True:
+            message = receiver.recv(65536)
+            self.hub.dispatch_message(message)
+
+
+def _make_backend(hub: EventHub) -> _Backend:
+    choice = settings.EVENT_BUS
+    if choice == "auto":
+        if connection.vendor == "postgresql":
+            choice = "postgres"
+        else:
+            choice = "socket" if hasattr(socket, "AF_UNIX") else "local"
+    backends = {backend.name: backend for backend in (_Backend, _PostgresBackend, _SocketBackend)}
+    if choice not in backends:
+        raise ValueError(f"Unknown EVENT_BUS {choice!r}; use auto, postgres, socket or local")
+    return backends[choice](hub)
+
+
+event_hub = EventHub()
@@ -0,0 +1,396 @@
+"""
+Range queries over a sensor's history, served from raw readings for short
+ranges and from SensorRollup for longer ones, falling back to compacted
+chunks and the cold archive for old data.
+"""
+import base64
+import re
+from collections import defaultdict
+from itertools import chain
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, Q, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, RowNumber
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from water.models import Sensor, SensorReading, SensorRollup
+from water.services.chunks import cold_floor, cold_readings, cold_readings_many, cold_series
+from water.services.downsample import downsample
+from water.services.retention import hourly_cutoff
+from water.services.rollups import METRICS, bucket_start, hourly_rollups
+
+RAW = "raw"
+RESOLUTIONS = (RAW, SensorRollup.Resolution.HOUR, SensorRollup.Resolution.DAY)
+RANGE_PATTERN = re.compile(r"^(\d+)([hdw])$")
+RANGE_UNITS = {"h": timedelta(hours=1), "d": timedelta(days=1), "w": timedelta(weeks=1)}
+# Epoch microseconds of a timestamp column, computed in SQL. SQLite's julianday() resolves milliseconds,
+# plenty for chart geometry; the order still comes from the column itself.
+EPOCH_MICROS = {
+    "sqlite": "CAST(ROUND((julianday({column}) - 2440587.5) * 86400000) AS INTEGER) * 1000",
+    "postgresql": "CAST(EXTRACT(EPOCH FROM {column}) * 1000000 AS BIGINT)",
+}
+
+
+def parse_range(range_param: str | None, start_param: str | None, end_param: str | None) -> tuple[datetime, datetime]:
+    """
+    Resolve ``range`` (e.g. ``24h``, ``7d``, ``4w``, counted back from ``end``)
+    or explicit ``start``/``end`` ISO timestamps. Raises ValueError on bad input.
+    """
+    end = parse_moment(end_param) if end_param else timezone.now()
+    if start_param:
+        start = parse_moment(start_param)
+    elif range_param:
+        match = RANGE_PATTERN.match(range_param.strip().lower())
+        if not match:
+            raise ValueError("range must look like 24h, 7d or 4w")
+        start = end - int(match.group(1)) * RANGE_UNITS[match.group(2)]
+    else:
+        raise ValueError("range or start is required")
+    if start >= end:
+        raise ValueError("start must be before end")
+    return start, end
+
+
+def parse_moment(value: str) -> datetime:
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    return moment if timezone.is_aware(moment) else moment.replace(tzinfo=dt_timezone.utc)
+
+
+def parse_points(value: str | None) -> int | None:
+    if value in (None, ""):
+        return None
+    try:
+        points = int(value)
+    except ValueError:
+        raise ValueError("points must be an integer") from None
+    if not 3 <= points <= settings.HISTORY_MAX_POINTS:
+        raise ValueError(f"points must be between 3 and {settings.HISTORY_MAX_POINTS}")
+    return points
+
+
+def pick_resolution(start: datetime, end: datetime, points: int | None = None) -> str:
+    """
+    Finest resolution that keeps the response within HISTORY_MAX_POINTS:
+    raw readings up to HISTORY_RAW_MAX_HOURS, then hourly, then daily rollups.
+    When the response is downsampled to ``points``, raw readings are used up
+    to HISTORY_DOWNSAMPLE_RAW_DAYS.
+    """
+    span = end - start
+    if points and span <= timedelta(days=settings.HISTORY_DOWNSAMPLE_RAW_DAYS):
+        return RAW
+    if span <= timedelta(hours=settings.HISTORY_RAW_MAX_HOURS):
+        return RAW
+    if span / timedelta(hours=1) <= settings.HISTORY_MAX_POINTS:
+        return SensorRollup.Resolution.HOUR
+    return SensorRollup.Resolution.DAY
+
+
+def raw_series(sensor: Sensor, start: datetime, end: datetime) -> list[SensorReading]:
+    """
+    Raw readings in [start, end), oldest first, newest HISTORY_MAX_POINTS at
+    most. Compacted chunks and the cold archive are read for older ranges.
+    """
+    limit = settings.HISTORY_MAX_POINTS
+    readings = list(sensor.readings.filter(recorded_at__gte=start, recorded_at__lt=end).order_by("-recorded_at")[:limit])
+    live = {reading.id for reading in readings}
+    for reading in cold_readings(sensor.id, start, end):
+        if reading.id not in live:
+            reading.sensor = sensor
+            readings.append(reading)
+    readings.sort(key=lambda reading: (reading.recorded_at, reading.id))
+    return readings[-limit:]
+
+
+def downsampled_series(
+    sensor: Sensor, start: datetime, end: datetime, metric: str, points: int, method: str
+) -> tuple[list[SensorReading], int]:
+    """
+    At most ``points`` raw readings in [start, end), oldest first, picked by
+    ``method`` on ``metric`` over every reading in the range. Only the
+    timestamps and the metric are loaded for the selection (see
+    ``_series_columns``); full rows are fetched for the chosen ids. Returns
+    the readings and the source count.
+    """
+    ids, x, y = _series_columns(sensor, start, end, metric)
+
+    if cold_floor(sensor.id) is not None:
+        cold_ids, cold_micros, cold_values = cold_series(sensor.id, start, end, metric)
+        fresh = ~np.isnan(cold_values) & ~np.isin(cold_ids, ids)
+        ids = np.concatenate([ids, cold_ids[fresh]])
+        x = np.concatenate([x, cold_micros[fresh] / 1e6])
+        y = np.concatenate([y, cold_values[fresh]])
+        order = np.lexsort((ids, x))
+        ids, x, y = ids[order], x[order], y[order]
+    if not len(ids):
+        return [], 0
+
+    keep = [int(reading_id) for reading_id in ids[downsample(x, y, points, method)]]
+
+    # Unordered, so the planner looks the ids up by primary key rather than walking the sensor's time index.
+    fetched = {reading.id: reading for reading in sensor.readings.filter(id__in=keep).order_by()}
+    missing = set(keep) - fetched.keys()
+    if missing:
+        fetched.update((reading.id, reading) for reading in cold_readings(sensor.id, start, end, missing))
+    readings = []
+    for reading_id in keep:
+        reading = fetched.get(reading_id)
+        if reading is not None:
+            reading.sensor = sensor
+            readings.append(reading)
+    return readings, len(ids)
+
+
+def _series_columns(sensor: Sensor, start: datetime, end: datetime, metric: str) -> tuple[np.ndarray, ...]:
+    """
+    Ids, epoch seconds and ``metric`` values of the raw readings in [start,
+    end) that have it, in (recorded_at, id) order. SQL turns the timestamp
+    into epoch microseconds and the value into a float, and the rows come from
+    a plain cursor, so no datetime or Decimal is built per reading.
+    """
+    recorded_at = f"{connection.ops.quote_name(SensorReading._meta.db_table)}.{connection.ops.quote_name('recorded_at')}"
+    queryset = (
+        sensor.readings.filter(recorded_at__gte=start, recorded_at__lt=end, **{f"{metric}__isnull": False})
+        .order_by("recorded_at", "id")
+        .annotate(epoch_us=RawSQL(EPOCH_MICROS[connection.vendor].format(column=recorded_at), ()))
+        .annotate(value=Cast(metric, FloatField()))
+        .values_list("id", "epoch_us", "value")
+    )
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    columns = np.fromiter(chain.from_iterable(rows), dtype=np.float64, count=3 * len(rows)).reshape(-1, 3)
+    return columns[:, 0].astype(np.int64), columns[:, 1] / 1e6, columns[:, 2]
+
+
+def downsample_buckets(buckets: list[dict], metric: str, points: int, method: str) -> list[dict]:
+    """Thin rollup buckets (as built by rollup_series) to ``points`` on the metric's average."""
+    candidates = [bucket for bucket in buckets if bucket[metric]["avg"] is not None]
+    if len(candidates) <= points:
+        return buckets
+    x = np.array([parse_datetime(bucket["bucket"]).timestamp() for bucket in candidates], dtype=np.float64)
+    y = np.array([bucket[metric]["avg"] for bucket in candidates], dtype=np.float64)
+    return [candidates[index] for index in downsample(x, y, points, method)]
+
+
+def encode_cursor(reading: SensorReading) -> str:
+    """Opaque keyset cursor pointing just below ``reading`` in (recorded_at, id) order."""
+    value = f"{reading.recorded_at.astimezone(dt_timezone.utc).isoformat()}|{reading.id}"
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        value = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        moment, reading_id = value.rsplit("|", 1)
+        return parse_moment(moment), int(reading_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def parse_page_size(value: str | None) -> int:
+    if value in (None, ""):
+        return settings.HISTORY_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValueError("page_size must be an integer") from None
+    if not 1 <= size <= settings.HISTORY_MAX_POINTS:
+        raise ValueError(f"page_size must be between 1 and {settings.HISTORY_MAX_POINTS}")
+    return size
+
+
+def raw_page(
+    sensor: Sensor,
+    start: datetime | None,
+    end: datetime | None,
+    cursor: tuple[datetime, int] | None,
+    page_size: int,
+) -> tuple[list[SensorReading], str | None]:
+    """
+    One page of raw readings in [start, end), newest first, plus the cursor
+    of the next (older) page or None on the last one. Pages are keyset
+    filtered on (recorded_at, id) and never use OFFSET, so every page is an
+    index range scan no matter how deep it is.
+    """
+    readings = sensor.readings.order_by("-recorded_at", "-id")
+    if start:
+        readings = readings.filter(recorded_at__gte=start)
+    if end:
+        readings = readings.filter(recorded_at__lt=end)
+    if cursor:
+        moment, reading_id = cursor
+        readings = readings.filter(Q(recorded_at__lt=moment) | Q(recorded_at=moment, id__lt=reading_id))
+    page = list(readings[: page_size + 1])
+
+    floor = cold_floor(sensor.id)
+    if floor is not None:
+        # Compacted / archived readings interleave with the live rows fetched, or continue past them.
+        lower = page[-1].recorded_at if len(page) > page_size else max(start or floor, floor)
+        upper = cursor[0] + timedelta(microseconds=1) if cursor else end or timezone.now() + timedelta(days=1)
+        if end:
+            upper = min(upper, end)
+        live = {reading.id for reading in page}
+        page.extend(
+            reading for reading in _cold_before(sensor.id, lower, upper, page_size + 1, cursor) if reading.id not in live
+        )
+        for reading in page:
+            reading.sensor = sensor
+        page.sort(key=lambda reading: (reading.recorded_at, reading.id), reverse=True)
+
+    if len(page) <= page_size:
+        return page, None
+    page = page[:page_size]
+    return page, encode_cursor(page[-1])
+
+
+def _cold_before(
+    sensor_id: int, lower: datetime, upper: datetime, need: int, cursor: tuple[datetime, int] | None
+) -> list[SensorReading]:
+    """
+    Cold readings in [lower, upper) below ``cursor``, read backwards from
+    ``upper`` in doubling windows until at least ``need`` are found, so a
+    page deep in a long archived range decodes only the days it returns.
+    """
+    found: list[SensorReading] = []
+    window = timedelta(days=1)
+    while upper > lower and len(found) < need:
+        window_start = max(lower, upper - window)
+        found.extend(
+            reading
+            for reading in cold_readings(sensor_id, window_start, upper)
+            if cursor is None or (reading.recorded_at, reading.id) < cursor
+        )
+        upper = window_start
+        window *= 2
+    return found
+
+
+def rollup_series(sensor: Sensor, resolution: str, start: datetime, end: datetime) -> list[dict]:
+    """
+    Rollup buckets overlapping [start, end), oldest first, newest
+    HISTORY_MAX_POINTS at most. Hours whose rollups were pruned are rebuilt
+    on the fly from raw, compacted and archived readings.
+    """
+    limit = settings.HISTORY_MAX_POINTS
+    rollups = list(
+        SensorRollup.objects.filter(
+            sensor=sensor,
+            resolution=resolution,
+            bucket__gte=bucket_start(start, resolution),
+            bucket__lt=end,
+        ).order_by("-bucket")[:limit]
+    )
+    cutoff = hourly_cutoff()
+    if resolution == SensorRollup.Resolution.HOUR and cutoff and start < cutoff:
+        stored = {rollup.bucket for rollup in rollups}
+        pruned_end = min(end, bucket_start(cutoff, resolution))
+        readings = list(sensor.readings.filter(recorded_at__gte=start, recorded_at__lt=pruned_end))
+        live = {reading.id for reading in readings}
+        readings.extend(reading for reading in cold_readings(sensor.id, start, pruned_end) if reading.id not in live)
+        rollups.extend(rollup for rollup in hourly_rollups(sensor.id, readings) if rollup.bucket not in stored)
+    rollups.sort(key=lambda rollup: rollup.bucket)
+    return [_bucket_data(rollup) for rollup in rollups[-limit:]]
+
+
+def _newest_per_sensor(queryset, *order: str, limit: int) -> dict[int, list]:
+    """
+    The newest ``limit`` rows per sensor of ``queryset`` in one query, using
+    ROW_NUMBER() partitioned by sensor; ``order`` are the descending keys.
+    The rows come back unordered (callers sort each sensor's few rows).
+    """
+    ranked = queryset.order_by().annotate(
+        rank=Window(RowNumber(), partition_by=[F("sensor_id")], order_by=[F(field).desc() for field in order])
+    ).filter(rank__lte=limit)
+    rows: dict[int, list] = {}
+    for row in ranked:
+        rows.setdefault(row.sensor_id, []).append(row)
+    return rows
+
+
+def latest_readings_many(sensors: list[Sensor], limit: int) -> dict[int, list[SensorReading]]:
+    """Newest ``limit`` raw readings per sensor, newest first, in one query."""
+    readings = _newest_per_sensor(
+        SensorReading.objects.filter(sensor__in=sensors), "recorded_at", "id", limit=limit
+    )
+    by_id = {sensor.id: sensor for sensor in sensors}
+    for sensor_id, rows in readings.items():
+        rows.sort(key=lambda reading: (reading.recorded_at, reading.id), reverse=True)
+        for reading in rows:
+            reading.sensor = by_id[sensor_id]
+    return readings
+
+
+def raw_series_many(sensors: list[Sensor], start: datetime, end: datetime) -> dict[int, list[SensorReading]]:
+    """raw_series for several sensors: one reading query and one chunk query in total."""
+    limit = settings.HISTORY_MAX_POINTS
+    live = _newest_per_sensor(
+        SensorReading.objects.filter(sensor__in=sensors, recorded_at__gte=start, recorded_at__lt=end),
+        "recorded_at",
+        "id",
+        limit=limit,
+    )
+    cold = cold_readings_many([sensor.id for sensor in sensors], start, end)
+    series = {}
+    for sensor in sensors:
+        readings = live.get(sensor.id, [])
+        seen = {reading.id for reading in readings}
+        readings.extend(reading for reading in cold.get(sensor.id, []) if reading.id not in seen)
+        for reading in readings:
+            reading.sensor = sensor
+        readings.sort(key=lambda reading: (reading.recorded_at, reading.id))
+        series[sensor.id] = readings[-limit:]
+    return series
+
+
+def rollup_series_many(sensors: list[Sensor], resolution: str, start: datetime, end: datetime) -> dict[int, list[dict]]:
+    """
+    rollup_series for several sensors: one rollup query, plus one reading
+    query and one chunk query in total when hourly buckets already pruned by
+    retention have to be rebuilt.
+    """
+    limit = settings.HISTORY_MAX_POINTS
+    rollups = _newest_per_sensor(
+        SensorRollup.objects.filter(sensor__in=sensors, resolution=resolution, bucket__gte=bucket_start(start, resolution), bucket__lt=end),
+        "bucket",
+        limit=limit,
+    )
+    cutoff = hourly_cutoff()
+    if resolution == SensorRollup.Resolution.HOUR and cutoff and start < cutoff:
+        pruned_end = min(end, bucket_start(cutoff, resolution))
+        readings: dict[int, list[SensorReading]] = defaultdict(list)
+        for reading in SensorReading.objects.filter(sensor__in=sensors, recorded_at__gte=start, recorded_at__lt=pruned_end).order_by():
+            readings[reading.sensor_id].append(reading)
+        cold = cold_readings_many([sensor.id for sensor in sensors], start, pruned_end)
+        for sensor in sensors:
+            live = {reading.id for reading in readings[sensor.id]}
+            readings[sensor.id].extend(reading for reading in cold.get(sensor.id, []) if reading.id not in live)
+            stored = {rollup.bucket for rollup in rollups.get(sensor.id, [])}
+            rollups.setdefault(sensor.id, []).extend(
+                rollup for rollup in hourly_rollups(sensor.id, readings[sensor.id]) if rollup.bucket not in stored
+            )
+    return {
+        sensor.id: [_bucket_data(rollup) for rollup in sorted(rollups.get(sensor.id, []), key=lambda rollup: rollup.bucket)[-limit:]]
+        for sensor in sensors
+    }
+
+
+def _bucket_data(rollup: SensorRollup) -> dict:
+    return {
+        "bucket": timezone.localtime(rollup.bucket).isoformat(),
+        "count": rollup.count,
+        "last_at": timezone.localtime(rollup.last_at).isoformat(),
+        **{
+            metric: {stat: getattr(rollup, f"{metric}_{stat}") for stat in ("min", "max", "avg", "count", "last")}
+            for metric in METRICS
+        },
+    }
@@ -0,0 +1,416 @@
+import json
+import logging
+import math
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from water.models import ReadingSeq, SensorReading
+from water.services.deadband import deadband
+from water.services.dedup import dedup_window, derive_seq
+from water.services.latest import upsert_latest
+from water.services.metrics import metrics
+from water.services.sensor_cache import SensorRef, sensor_cache
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ("device_id", "distance_cm")
+DECIMAL_FIELDS = ("water_level", "humidity", "temperature", "soil_moisture")
+# Accepted keys for the device-supplied sample time, in order of preference
+TIMESTAMP_FIELDS = ("ts", "timestamp", "recorded_at")
+
+
+class TelemetryError(ValueError):
+    """Raised when a telemetry payload cannot be turned into a reading."""
+
+
+def parse_payload(payload: bytes | str) -> list[dict]:
+    """
+    Decode and validate one MQTT telemetry payload into reading records.
+
+    A payload is either a single reading or a backfill envelope
+    ``{"device_id": ..., "readings": [{"ts": ..., "distance_cm": ...}, ...]}``
+    that a node sends after buffering offline; envelope fields act as
+    defaults for every reading in it.
+    """
+    if isinstance(payload, bytes):
+        try:
+            payload = payload.decode("utf-8")
+        except UnicodeDecodeError as exc:
+            raise TelemetryError(f"Payload is not UTF-8: {exc}") from exc
+    try:
+        data = json.loads(payload)
+    except json.JSONDecodeError as exc:
+        raise TelemetryError(f"Invalid JSON: {exc}") from exc
+    if not isinstance(data, dict):
+        raise TelemetryError("Payload must be a JSON object")
+
+    readings = data.get("readings")
+    if readings is None:
+        return [parse_record(data)]
+    if not isinstance(readings, list) or not all(isinstance(item, dict) for item in readings):
+        raise TelemetryError("readings must be a list of objects")
+    defaults = {key: value for key, value in data.items() if key != "readings"}
+    return [parse_record({**defaults, **item}) for item in readings]
+
+
+def parse_timestamp(value) -> datetime | None:
+    """
+    Parse a device timestamp (ISO 8601 or unix seconds/milliseconds) and
+    check it against the allowed clock skew and backfill window.
+    Naive ISO timestamps are taken as UTC.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise TelemetryError(f"Invalid timestamp: {value!r}")
+    if isinstance(value, (int, float)):
+        seconds = value / 1000 if value > 1e11 else value
+        try:
+            moment = datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+        except (OverflowError, OSError, ValueError) as exc:
+            raise TelemetryError(f"Invalid timestamp: {value!r}") from exc
+    else:
+        moment = parse_datetime(str(value))
+        if moment is None:
+            raise TelemetryError(f"Invalid timestamp: {value!r}")
+        if timezone.is_naive(moment):
+            moment = moment.replace(tzinfo=dt_timezone.utc)
+
+    return check_timestamp_window(moment)
+
+
+def check_timestamp_window(moment: datetime) -> datetime:
+    now = timezone.now()
+    if moment > now + timedelta(seconds=settings.IOT_MAX_CLOCK_SKEW_SECONDS):
+        raise TelemetryError(f"Timestamp {moment.isoformat()} is in the future")
+    if moment < now - timedelta(days=settings.IOT_MAX_BACKFILL_DAYS):
+        raise TelemetryError(
+            f"Timestamp {moment.isoformat()} is older than {settings.IOT_MAX_BACKFILL_DAYS} days"
+        )
+    return moment
+
+
+def parse_record(data: dict) -> dict:
+    """Validate an already-decoded reading (only device_id and distance_cm are mandatory)."""
+    missing_fields = [field for field in REQUIRED_FIELDS if data.get(field) is None]
+    if missing_fields:
+        raise TelemetryError(f"Missing required fields: {', '.join(missing_fields)}")
+
+    try:
+        record = {
+            "device_id": str(data["device_id"]),
+            "distance_cm": float(data["distance_cm"]),
+            "motion_detected": _to_bool(data.get("motion_detected", False)),
+            "recorded_at": parse_timestamp(
+                next((data[key] for key in TIMESTAMP_FIELDS if data.get(key) is not None), None)
+            ),
+        }
+        for field in DECIMAL_FIELDS:
+            record[field] = _to_decimal(field, data.get(field))
+    except TelemetryError:
+        raise
+    except (ValueError, TypeError, ArithmeticError) as exc:
+        raise TelemetryError(f"Invalid data types: {exc}") from exc
+    if not math.isfinite(record["distance_cm"]):
+        raise TelemetryError("distance_cm must be a finite number")
+    record["seq"] = _to_seq(data.get("seq"))
+    if record["seq"] is None:
+        record["seq"] = derive_seq(record)
+    return record
+
+
+def _to_seq(value) -> int | None:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise TelemetryError(f"seq must be an integer: {value!r}")
+    try:
+        seq = int(value)
+    except ValueError as exc:
+        raise TelemetryError(f"seq must be an integer: {value!r}") from exc
+    if not 0 <= seq < 2**63:
+        raise TelemetryError(f"seq out of range: {value!r}")
+    return seq
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def _to_decimal(field: str, value) -> Decimal | None:
+    """Quantize to the column's precision and reject values the column cannot hold."""
+    if value is None:
+        return None
+    model_field = SensorReading._meta.get_field(field)
+    number = Decimal(str(float(value))).quantize(Decimal(1).scaleb(-model_field.decimal_places))
+    if not number.is_finite() or abs(number) >= 10 ** (model_field.max_digits - model_field.decimal_places):
+        raise TelemetryError(f"{field} out of range: {value}")
+    return number
+
+
+def format_stats() -> list[str]:
+    """Human-readable flush counts/timings and sensor-cache stats for this process."""
+    snapshot = metrics.snapshot()
+    counters = snapshot["counters"]
+    flush = snapshot["timings"].get("ingest.flush", {"count": 0, "avg_ms": 0.0, "max_ms": 0.0})
+    cache = sensor_cache.stats()
+    return [
+        f"Ingest stats: received={counters.get('ingest.received', 0)} "
+        f"written={counters.get('ingest.written', 0)} "
+        f"rejected={counters.get('ingest.rejected', 0)} "
+        f"failed={counters.get('ingest.failed', 0)} "
+        f"duplicates={counters.get('ingest.duplicates.window', 0) + counters.get('ingest.duplicates.db', 0)} "
+        f"suppressed={counters.get('ingest.suppressed', 0)} "
+        f"flushes={flush['count']} avg_flush={flush['avg_ms']}ms max_flush={flush['max_ms']}ms",
+        f"Sensor cache: size={cache['size']}/{cache['maxsize']} hits={cache['hits']} "
+        f"misses={cache['misses']} created={cache['created']} hit_ratio={cache['hit_ratio']}",
+    ]
+
+
+STORED = "stored"
+UNKNOWN_SENSOR = "unknown_sensor"
+DUPLICATE = "duplicate"
+SUPPRESSED = "suppressed"
+
+
+class TelemetryWriter:
+    """Persists batches of parsed reading records with a constant number of queries."""
+
+    def __init__(self, auto_create: bool = True, source: str = "MQTT"):
+        self.auto_create = auto_create
+        self.source = source
+
+    def resolve_sensors(self, device_ids: Iterable[str]) -> dict[str, SensorRef]:
+        return sensor_cache.resolve_many(
+            device_ids, create=self.auto_create, description=f"Auto-created from {self.source}"
+        )
+
+    def write(self, records: list[dict]) -> list[SensorReading | None]:
+        """
+        Insert ``records`` and return a list aligned with them: the stored
+        reading, or None for unknown devices, duplicates and deadband-suppressed readings.
+        """
+        return self.write_detailed(records)[0]
+
+    def write_detailed(self, records: list[dict]) -> tuple[list[SensorReading | None], list[str]]:
+        """Like ``write`` but also returns each record's outcome (STORED, DUPLICATE, ...)."""
+        if not records:
+            return [], []
+        refs = self.resolve_sensors(record["device_id"] for record in records)
+        now = timezone.now()
+        # Backfilled rows carry their device time; live rows without one are stamped on arrival.
+        readings: list[SensorReading | None] = [
+            SensorReading(
+                sensor_id=refs[record["device_id"]].id,
+                recorded_at=record.get("recorded_at") or now,
+                seq=record.get("seq"),
+                distance_cm=record["distance_cm"],
+                water_level=record["water_level"],
+                humidity=record["humidity"],
+                temperature=record["temperature"],
+                soil_moisture=record["soil_moisture"],
+                motion_detected=record["motion_detected"],
+            )
+            if record["device_id"] in refs
+            else None
+            for record in records
+        ]
+        outcomes = [STORED if reading is not None else UNKNOWN_SENSOR for reading in readings]
+        self._drop_duplicates(readings, outcomes)
+
+        keep, deadband_state = deadband.decide(readings, {ref.id: ref for ref in refs.values()})
+        suppressed: list[SensorReading] = []
+        for index, reading in enumerate(readings):
+            if reading is not None and not keep[index]:
+                suppressed.append(reading)
+                readings[index], outcomes[index] = None, SUPPRESSED
+        if suppressed:
+            metrics.incr("ingest.suppressed", len(suppressed))
+
+        pending = [reading for reading in readings if reading is not None]
+        try:
+            with transaction.atomic():
+                ReadingSeq.objects.bulk_create(self._claims(pending))
+                SensorReading.objects.bulk_create(pending)
+                # Suppressed readings still count as the sensor's current state.
+                upsert_latest([*pending, *suppressed])
+        except IntegrityError:
+            # A cached sensor was deleted or another writer stored the same
+            # (sensor, seq) in the meantime: reload and insert row by row.
+            sensor_cache.clear()
+            self._insert_individually(readings, outcomes, records)
+            known = {ref.id for ref in self.resolve_sensors(record["device_id"] for record in records).values()}
+            with transaction.atomic():
+                upsert_latest(
+                    reading
+                    for reading in [*readings, *suppressed]
+                    if reading is not None and reading.sensor_id in known
+                )
+        # Filters learn about the rows only once they are durable: when an enclosing transaction
+        # (the spool drainer's, which also moves its checkpoint) rolls back, the replay must not
+        # find them already "stored" and drop them as duplicates or suppressed.
+        stored_seqs = [(reading.sensor_id, reading.seq) for reading in readings if reading is not None and reading.seq is not None]
+        transaction.on_commit(lambda: self._remember(deadband_state, stored_seqs))
+        return readings, outcomes
+
+    @staticmethod
+    def _claims(readings: Iterable[SensorReading]) -> list[ReadingSeq]:
+        # The (sensor, seq) unique constraint lives on ReadingSeq; a conflict rolls back the readings too.
+        return [
+            ReadingSeq(sensor_id=reading.sensor_id, seq=reading.seq, recorded_at=reading.recorded_at)
+            for reading in readings
+            if reading.seq is not None
+        ]
+
+    @staticmethod
+    def _remember(deadband_state: dict, stored_seqs: list[tuple[int, int]]) -> None:
+        deadband.commit(deadband_state)
+        for sensor_id, seq in stored_seqs:
+            dedup_window.remember(sensor_id, seq)
+
+    def _drop_duplicates(self, readings: list[SensorReading | None], outcomes: list[str]) -> None:
+        """Replace retransmitted readings with None: sliding window first, then one indexed query."""
+        batch_keys: set[tuple[int, int]] = set()
+        unchecked: list[int] = []
+        dropped_window = 0
+        for index, reading in enumerate(readings):
+            if reading is None or reading.seq is None:
+                continue
+            key = (reading.sensor_id, reading.seq)
+            if key in batch_keys or dedup_window.contains(*key):
+                readings[index], outcomes[index] = None, DUPLICATE
+                dropped_window += 1
+                continue
+            batch_keys.add(key)
+            if not dedup_window.is_new(*key):
+                unchecked.append(index)
+
+        dropped_db = 0
+        if unchecked:
+            existing = set(
+                ReadingSeq.objects.filter(
+                    sensor_id__in={readings[index].sensor_id for index in unchecked},
+                    seq__in={readings[index].seq for index in unchecked},
+                ).values_list("sensor_id", "seq")
+            )
+            for index in unchecked:
+                if (readings[index].sensor_id, readings[index].seq) in existing:
+                    readings[index], outcomes[index] = None, DUPLICATE
+                    dropped_db += 1
+
+        if dropped_window:
+            metrics.incr("ingest.duplicates.window", dropped_window)
+        if dropped_db:
+            metrics.incr("ingest.duplicates.db", dropped_db)
+
+    def _insert_individually(
+        self, readings: list[SensorReading | None], outcomes: list[str], records: list[dict]
+    ) -> None:
+        refs = self.resolve_sensors(record["device_id"] for record in records)
+        for index, reading in enumerate(readings):
+            if reading is None:
+                continue
+            ref = refs.get(records[index]["device_id"])
+            if ref is None:
+                readings[index], outcomes[index] = None, UNKNOWN_SENSOR
+                continue
+            reading.pk = None
+            reading.sensor_id = ref.id
+            try:
+                with transaction.atomic():
+                    ReadingSeq.objects.bulk_create(self._claims([reading]))
+                    reading.save(force_insert=True)
+            except IntegrityError:
+                readings[index], outcomes[index] = None, DUPLICATE
+                metrics.incr("ingest.duplicates.db")
+
+
+class BufferedIngest:
+    """
+    In-memory queue drained by a writer thread.
+    A batch is flushed once it reaches ``batch_size`` records or its oldest
+    record has waited ``flush_ms`` milliseconds, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        writer: TelemetryWriter,
+        batch_size: int = 500,
+        flush_ms: int = 1000,
+        max_queue: int | None = None,
+        on_flush: Callable[[int, float], None] | None = None,
+    ):
+        self.writer = writer
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = max(0, flush_ms) / 1000
+        self.on_flush = on_flush
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue or self.batch_size * 20)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, record: dict) -> None:
+        # Blocks when the writer falls behind so memory stays bounded.
+        self._queue.put(record)
+        metrics.incr("ingest.received")
+
+    def close(self, timeout: float | None = None) -> None:
+        """Stop accepting work, flush whatever is queued and join the writer thread."""
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        try:
+            while not (self._stop.is_set() and self._queue.empty()):
+                batch = self._collect()
+                if batch:
+                    self._flush(batch)
+        finally:
+            connections.close_all()
+
+    def _collect(self) -> list[dict]:
+        try:
+            batch = [self._queue.get(timeout=0.2)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: list[dict]) -> None:
+        close_old_connections()
+        started = time.perf_counter()
+        try:
+            written = sum(1 for reading in self.writer.write(batch) if reading is not None)
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to write batch of %d readings", len(batch))
+            metrics.incr("ingest.failed", len(batch))
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metrics.incr("ingest.flushes")
+        metrics.incr("ingest.written", written)
+        metrics.observe("ingest.flush", elapsed_ms)
+        if self.on_flush:
+            self.on_flush(written, elapsed_ms)
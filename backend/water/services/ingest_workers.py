@@ -0,0 +1,168 @@
+"""
+Multi-process MQTT ingest: one subscriber fans raw payloads out to worker
+processes, partitioned by a stable hash of the device segment of the topic.
+
+A device always lands on the same worker and each worker writes its queue in
+FIFO order, so readings of one device are never reordered. Each worker owns
+its DB connection, sensor cache and buffered writer.
+
+This module is imported by spawned children before Django is configured, so
+Django/app imports stay inside the worker function.
+"""
+import multiprocessing
+import queue
+import signal
+import sys
+import time
+import zlib
+from pathlib import Path
+
+STOP = None
+
+
+def partition_for(topic: str, workers: int) -> int:
+    """Stable partition index for ``biyokaab/<device_id>/telemetry`` style topics."""
+    parts = topic.split("/")
+    key = parts[1] if len(parts) >= 3 else topic
+    return zlib.crc32(key.encode("utf-8")) % workers
+
+
+def run_worker(index: int, inbox, batch_size: int, flush_ms: int, stats_interval: int, spool_dir: str = "") -> None:
+    # Ctrl+C reaches the whole process group; shutdown is driven by the supervisor's STOP sentinel.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+    from water.services.ingest import BufferedIngest, TelemetryError, TelemetryWriter, format_stats, parse_payload
+    from water.services.metrics import metrics
+    from water.services.spool import Spool, SpoolDrainer
+
+    def report():
+        for line in format_stats():
+            sys.stdout.write(f"[worker {index}] {line}\n")
+        sys.stdout.flush()
+
+    if spool_dir:
+        # One spool (and checkpoint row) per partition keeps each device's replay order.
+        drainer = SpoolDrainer(
+            Spool(Path(spool_dir) / f"worker-{index}"),
+            TelemetryWriter(source="MQTT"),
+            name=f"worker-{index}",
+            batch_size=batch_size,
+            idle_ms=flush_ms,
+        )
+        drainer.start()
+        buffer = None
+    else:
+        drainer = None
+        buffer = BufferedIngest(TelemetryWriter(source="MQTT"), batch_size=batch_size, flush_ms=flush_ms)
+        buffer.start()
+    last_report = time.monotonic()
+    try:
+        while True:
+            try:
+                item = inbox.get(timeout=1)
+            except queue.Empty:
+                item = ()
+            if item is STOP:
+                break
+            if item:
+                topic, payload = item
+                try:
+                    if drainer is not None:
+                        drainer.submit_payload(payload)
+                    else:
+                        for record in parse_payload(payload):
+                            buffer.submit(record)
+                except TelemetryError as exc:
+                    metrics.incr("ingest.rejected")
+                    sys.stderr.write(f"[worker {index}] Rejected message from {topic}: {exc}\n")
+            if stats_interval and time.monotonic() - last_report >= stats_interval:
+                report()
+                last_report = time.monotonic()
+    finally:
+        (drainer or buffer).close()
+        report()
+
+
+def orphaned_spools(spool_dir: str, workers: int) -> list[tuple[Path, str]]:
+    """
+    (directory, checkpoint name) of spools no worker of this run appends to:
+    ``worker-N`` directories beyond ``workers`` (all of them when running
+    single-process), and the top-level spool when running partitioned.
+    """
+    root = Path(spool_dir)
+    if not root.is_dir():
+        return []
+    orphans = []
+    if workers > 1 and any(root.glob("*.seg")):
+        orphans.append((root, "default"))
+    for path in sorted(root.glob("worker-*")):
+        index = path.name.removeprefix("worker-")
+        if path.is_dir() and index.isdigit() and (workers == 1 or int(index) >= workers):
+            orphans.append((path, path.name))
+    return orphans
+
+
+class PartitionedIngest:
+    """Supervisor side: owns the worker processes and their bounded inboxes."""
+
+    def __init__(
+        self,
+        workers: int,
+        batch_size: int = 500,
+        flush_ms: int = 1000,
+        stats_interval: int = 60,
+        spool_dir: str = "",
+    ):
+        self.workers = workers
+        self.inboxes = [multiprocessing.Queue(maxsize=batch_size * 20) for _ in range(workers)]
+        self.processes = [
+            multiprocessing.Process(
+                target=run_worker,
+                args=(index, inbox, batch_size, flush_ms, stats_interval, spool_dir),
+                name=f"mqtt-ingest-{index}",
+                daemon=False,
+            )
+            for index, inbox in enumerate(self.inboxes)
+        ]
+
+    def start(self) -> None:
+        from django.db import connections
+
+        # Forked children must not share the parent's DB sockets.
+        connections.close_all()
+        for process in self.processes:
+            process.start()
+
+    def submit(self, topic: str, payload: bytes) -> None:
+        # Blocks when a worker falls behind, which throttles paho instead of growing memory.
+        self.inboxes[partition_for(topic, self.workers)].put((topic, payload))
+
+    def alive(self) -> int:
+        return sum(1 for process in self.processes if process.is_alive())
+
+    def close(self, timeout: float = 30) -> None:
+        """Send STOP to every live worker, wait for them to flush, then kill stragglers."""
+        deadline = time.monotonic() + timeout
+        for process, inbox in zip(self.processes, self.inboxes):
+            if not process.is_alive():
+                # Nobody reads this inbox any more: don't wait on it, here or at interpreter exit.
+                inbox.cancel_join_thread()
+                continue
+            try:
+                inbox.put(STOP, timeout=max(0, deadline - time.monotonic()))
+            except queue.Full:
+                pass
+        for process in self.processes:
+            process.join(max(0, deadline - time.monotonic()))
+        for process in self.processes:
+            if process.is_alive():
+                # Workers ignore SIGTERM so they can flush; a hung one needs SIGKILL.
+                process.kill()
+                process.join()
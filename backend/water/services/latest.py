@@ -0,0 +1,165 @@
+"""
+Maintenance of SensorLatest, the newest-reading-per-sensor table that the
+status, dashboard and chat views read instead of the readings history.
+"""
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from water.models import Sensor, SensorLatest, SensorReading, TankGeometry, WaterStorage
+from water.services.dashboard_cache import dashboard_cache
+from water.services.events import event_hub, reading_event
+from water.services.tank_geometry import measure
+
+VALUE_FIELDS = (
+    "recorded_at",
+    "seq",
+    "distance_cm",
+    "water_level",
+    "humidity",
+    "temperature",
+    "soil_moisture",
+    "motion_detected",
+)
+# Tank level measured from distance_cm with the sensor's geometry (TankLevel field order).
+LEVEL_FIELDS = ("water_height_cm", "volume_liters", "percent_full", "capacity_liters")
+# Rows per INSERT: 15 parameters each keeps below SQLite's bound-parameter limit.
+UPSERT_CHUNK = 66
+
+
+def newest_per_sensor(readings: Iterable[SensorReading]) -> list[SensorReading]:
+    """Newest reading for each sensor; on equal timestamps the later one in the batch wins."""
+    newest: dict[int, SensorReading] = {}
+    for reading in readings:
+        current = newest.get(reading.sensor_id)
+        if current is None or reading.recorded_at >= current.recorded_at:
+            newest[reading.sensor_id] = reading
+    return list(newest.values())
+
+
+def upsert_latest(readings: Iterable[SensorReading], force: bool = False, notify: bool = True) -> int:
+    """
+    Fold ``readings`` into SensorLatest with ``INSERT ... ON CONFLICT DO UPDATE``
+    (PostgreSQL, SQLite >= 3.24). A row is only replaced by a reading at least
+    as new as the one it holds, so backfilled history never moves it
+    backwards; ``force`` replaces unconditionally. Call inside the
+    transaction that stored the readings.
+
+    Each row's tank level is measured here, once, with the sensor's
+    TankGeometry (one query per call), and storages linked to a geometry
+    take the new volume when the row changed.
+
+    With ``notify``, sensors whose row changed are published on the live
+    event bus, and their owners' cached dashboards dropped, once the
+    transaction commits. Where the database supports ``RETURNING``
+    (PostgreSQL, SQLite >= 3.35) that is exactly the rows the guard let
+    through; elsewhere every sensor in the batch.
+    """
+    rows = newest_per_sensor(readings)
+    if not rows:
+        return 0
+
+    geometries = TankGeometry.objects.in_bulk([reading.sensor_id for reading in rows])
+    levels = measure([geometries.get(reading.sensor_id) for reading in rows], [reading.distance_cm for reading in rows])
+    values = {
+        reading.sensor_id: {
+            **{name: getattr(reading, name) for name in VALUE_FIELDS},
+            **dict(zip(LEVEL_FIELDS, level or (None,) * len(LEVEL_FIELDS))),
+        }
+        for reading, level in zip(rows, levels)
+    }
+
+    quote = connection.ops.quote_name
+    table = quote(SensorLatest._meta.db_table)
+    columns = ["sensor_id", "reading_id", *VALUE_FIELDS, *LEVEL_FIELDS, "updated_at"]
+    fields = [SensorLatest._meta.get_field(column.removesuffix("_id")) for column in columns]
+    assignments = ", ".join(f"{quote(column)} = excluded.{quote(column)}" for column in columns[1:])
+    guard = "" if force else f" WHERE {table}.{quote('recorded_at')} <= excluded.{quote('recorded_at')}"
+    row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    returning = f" RETURNING {quote('sensor_id')}" if connection.features.can_return_rows_from_bulk_insert else ""
+
+    now = timezone.now()
+    changed: set[int] = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_CHUNK):
+            chunk = rows[start : start + UPSERT_CHUNK]
+            params = []
+            for reading in chunk:
+                row = [reading.sensor_id, reading.pk, *values[reading.sensor_id].values(), now]
+                params.extend(field.get_db_prep_save(value, connection) for field, value in zip(fields, row))
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quote(column) for column in columns)}) "
+                f"VALUES {', '.join([row_sql] * len(chunk))} "
+                f"ON CONFLICT ({quote('sensor_id')}) DO UPDATE SET {assignments}{guard}{returning}",
+                params,
+            )
+            if returning:
+                changed.update(sensor_id for (sensor_id,) in cursor.fetchall())
+            else:
+                changed.update(reading.sensor_id for reading in chunk)
+
+    storage_owners = sync_storages(
+        {sensor_id: geometry for sensor_id, geometry in geometries.items() if sensor_id in changed},
+        {sensor_id: values[sensor_id]["volume_liters"] for sensor_id in changed},
+    )
+    if changed and notify:
+        events = [
+            reading_event(reading.sensor_id, {"reading_id": reading.pk, **values[reading.sensor_id]})
+            for reading in rows
+            if reading.sensor_id in changed
+        ]
+        transaction.on_commit(lambda: event_hub.publish(events))
+        transaction.on_commit(lambda: dashboard_cache.invalidate_sensors(changed))
+    if storage_owners:
+        transaction.on_commit(lambda: dashboard_cache.invalidate(storage_owners))
+    return len(rows)
+
+
+def sync_storages(geometries: dict[int, TankGeometry], volumes: dict[int, float | None]) -> list[int]:
+    """
+    Set the current volume of storages linked to these sensors' geometries
+    (one UPDATE). ``updated_at`` is bumped too, so the risk board picks the
+    change up. Returns the user ids owning the updated storages.
+    """
+    now = timezone.now()
+    storages = [
+        WaterStorage(id=geometry.storage_id, current_volume_liters=Decimal(str(volumes[sensor_id])), updated_at=now)
+        for sensor_id, geometry in geometries.items()
+        if geometry.storage_id and volumes.get(sensor_id) is not None
+    ]
+    if not storages:
+        return []
+    WaterStorage.objects.bulk_update(storages, ["current_volume_liters", "updated_at"])
+    return list(
+        WaterStorage.objects.filter(id__in=[storage.id for storage in storages])
+        .values_list("system__owner__user_id", flat=True)
+        .distinct()
+    )
+
+
+def rebuild_latest(sensor_ids: Iterable[int] | None = None, chunk_size: int = 500) -> int:
+    """
+    Recompute SensorLatest from stored history (all sensors, or ``sensor_ids``).
+    Each sensor's newest reading comes off the (sensor, -recorded_at) index.
+    Returns the number of sensors that have a latest reading.
+    """
+    sensors = Sensor.objects.order_by("id")
+    if sensor_ids is not None:
+        sensors = sensors.filter(id__in=list(sensor_ids))
+    newest = SensorReading.objects.filter(sensor=OuterRef("pk")).order_by("-recorded_at", "-id").values("id")[:1]
+    pairs = list(sensors.annotate(newest_id=Subquery(newest)).values_list("id", "newest_id"))
+
+    total = 0
+    for start in range(0, len(pairs), chunk_size):
+        chunk = pairs[start : start + chunk_size]
+        with transaction.atomic():
+            SensorLatest.objects.filter(sensor_id__in=[sensor_id for sensor_id, reading_id in chunk if reading_id is None]).delete()
+            total += upsert_latest(
+                SensorReading.objects.filter(id__in=[reading_id for _, reading_id in chunk if reading_id is not None]),
+                force=True,
+                notify=False,
+            )
+    return total
@@ -0,0 +1,42 @@
+import threading
+from collections import defaultdict
+
+
+class IngestMetrics:
+    """Process-local counters and timings for the telemetry ingest path."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = defaultdict(int)
+        self._timings: dict[str, dict] = {}
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def observe(self, name: str, value_ms: float) -> None:
+        with self._lock:
+            timing = self._timings.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            timing["count"] += 1
+            timing["total_ms"] += value_ms
+            timing["max_ms"] = max(timing["max_ms"], value_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            timings = {
+                name: {
+                    "count": t["count"],
+                    "avg_ms": round(t["total_ms"] / t["count"], 2) if t["count"] else 0.0,
+                    "max_ms": round(t["max_ms"], 2),
+                }
+                for name, t in self._timings.items()
+            }
+            return {"counters": dict(self._counters), "timings": timings}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+
+metrics = IngestMetrics()
@@ -0,0 +1,112 @@
+"""
+Monthly range partitions of SensorReading on PostgreSQL.
+
+Migration 0011 turns ``water_sensorreading`` into a table partitioned by
+``recorded_at`` with one partition per UTC month plus a DEFAULT partition
+that catches anything outside them. The ORM keeps using the parent table,
+and PostgreSQL prunes partitions for queries that filter on recorded_at.
+``manage.py manage_partitions`` creates upcoming months ahead of time and
+archives and drops months past retention, which is far cheaper than deleting
+their rows. SQLite has no partitioning; there, prune_readings handles retention.
+"""
+import logging
+import re
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from water.models import SensorReading
+from water.services.archive import ARCHIVE_FIELDS, month_start, next_month, reading_archive
+
+logger = logging.getLogger(__name__)
+
+PARENT = SensorReading._meta.db_table
+DEFAULT_PARTITION = f"{PARENT}_default"
+PARTITION_PATTERN = re.compile(rf"^{PARENT}_y(\d{{4}})m(\d{{2}})$")
+
+
+def supported() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def is_partitioned() -> bool:
+    if not supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [PARENT])
+        return cursor.fetchone() is not None
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT}_y{month:%Y}m{month:%m}"
+
+
+def partitions() -> dict[str, datetime]:
+    """Monthly partitions currently attached to the parent, name -> month start (UTC)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [PARENT],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = {}
+    for name in names:
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            months[name] = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+    return months
+
+
+def ensure_partition(month: datetime) -> bool:
+    """
+    Create the partition for ``month`` if missing. Rows for that month that
+    already landed in the DEFAULT partition are moved into it first, since
+    PostgreSQL refuses to attach a range the default partition still holds.
+    """
+    month = month_start(month)
+    name = partition_name(month)
+    if name in partitions():
+        return False
+    quote = connection.ops.quote_name
+    bounds = [month, next_month(month)]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {quote(name)} (LIKE {quote(PARENT)} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {quote(DEFAULT_PARTITION)} "
+            f"WHERE recorded_at >= %s AND recorded_at < %s RETURNING *) "
+            f"INSERT INTO {quote(name)} SELECT * FROM moved",
+            bounds,
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(PARENT)} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+    logger.info("Created partition %s", name)
+    return True
+
+
+def drop_partition(name: str, month: datetime) -> int:
+    """
+    Export a monthly partition's rows to the cold archive per sensor, then
+    detach and drop it in one short transaction. Returns the archived count.
+    """
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(field) for field in ARCHIVE_FIELDS)
+    archived = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT DISTINCT sensor_id FROM {quote(name)}")
+        for (sensor_id,) in cursor.fetchall():
+            cursor.execute(f"SELECT {columns} FROM {quote(name)} WHERE sensor_id = %s ORDER BY recorded_at, id", [sensor_id])
+            archived += reading_archive.write(sensor_id, month, cursor.fetchall())
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {quote(PARENT)} DETACH PARTITION {quote(name)}")
+        cursor.execute(f"SELECT count(*) FROM {quote(name)}")
+        if cursor.fetchone()[0] != archived:
+            # Rows arrived after the export: keep the partition and retry next run.
+            raise RuntimeError(f"{name} changed while it was being archived")
+        cursor.execute(f"DROP TABLE {quote(name)}")
+    logger.info("Archived %d readings and dropped partition %s", archived, name)
+    return archived
@@ -0,0 +1,138 @@
+"""
+Monte Carlo days-of-supply projections.
+
+``ConstraintEngine`` divides stored water by demand and compares the result
+with one ``days_until_rainfall`` figure. This engine instead runs thousands
+of day-by-day scenarios at once (one NumPy vector per simulated day):
+
+- rainfall onset: the forecast scaled by a lognormal spread and shifted by
+  a few days of jitter, with a chance that the season's rains fail within
+  the horizon; both depend on the season (SEASON_PARAMS)
+- fog capture: the latest daily capture as the mean of a lognormal daily
+  yield, with a per-season coefficient of variation
+- demand: each category's daily need, reduced by its rationing level, times
+  a per-scenario level (day-to-day demand noise averages out over the
+  horizon, so it is not drawn)
+
+Tanks start at the available volume, fill with fog up to capacity and are
+drawn down by demand. A scenario is a depletion if they run dry before the
+rains arrive. Results are deterministic for a given seed.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from water.services.demand_engine import CATEGORIES
+
+# Bumped whenever the model or its parameters change, so cached projections are not reused.
+MODEL_VERSION = 1
+
+
+class SeasonParams(NamedTuple):
+    onset_spread: float  # sigma of the lognormal factor applied to the forecast onset
+    onset_jitter_days: float  # sd of the additive onset error, in days
+    failure_probability: float  # chance the rains do not arrive within the horizon
+    fog_cv: float  # day-to-day coefficient of variation of fog yield
+
+
+SEASON_PARAMS = {
+    "gu": SeasonParams(onset_spread=0.25, onset_jitter_days=4, failure_probability=0.10, fog_cv=0.6),
+    "dayr": SeasonParams(onset_spread=0.35, onset_jitter_days=6, failure_probability=0.20, fog_cv=0.6),
+    "xagaa": SeasonParams(onset_spread=0.45, onset_jitter_days=8, failure_probability=0.15, fog_cv=0.4),
+}
+# No climate snapshot: no rain expected, fog as variable as in the rainy seasons.
+DEFAULT_SEASON = SeasonParams(onset_spread=0.0, onset_jitter_days=0, failure_probability=1.0, fog_cv=0.6)
+
+# Coefficient of variation of each scenario's demand level.
+DEMAND_LEVEL_CV = 0.10
+
+PERCENTILES = (5, 25, 50, 75, 95)
+# Probability of running dry before the rains -> risk level (first threshold reached).
+RISK_THRESHOLDS = (("critical", 0.5), ("high", 0.2), ("moderate", 0.05))
+
+
+class ProjectionInputs(NamedTuple):
+    available_liters: float
+    capacity_liters: float
+    fog_capture_liters: float
+    demand_liters: tuple[float, ...]  # daily need per category, aligned with CATEGORIES
+    rationing: tuple[float, ...]  # fraction of each category's need cut, aligned with CATEGORIES
+    days_until_rainfall: int | None
+    season: str | None
+
+    @property
+    def daily_demand_liters(self) -> float:
+        return float(sum(need * (1 - cut) for need, cut in zip(self.demand_liters, self.rationing)))
+
+
+def _percentiles(values: np.ndarray) -> dict[str, float | None]:
+    # inverted_cdf picks actual samples, so "beyond the horizon" (inf) stays inf instead of poisoning interpolation.
+    points = np.percentile(values, PERCENTILES, method="inverted_cdf")
+    return {f"p{q}": None if np.isinf(point) else round(float(point), 2) for q, point in zip(PERCENTILES, points)}
+
+
+class SupplyProjectionEngine:
+    """Simulates stored water day by day across many scenarios and summarizes the depletion risk."""
+
+    def rainfall_onsets(self, inputs: ProjectionInputs, scenarios: int, rng: np.random.Generator) -> np.ndarray:
+        """Day each scenario's rains arrive (fractional; inf when they do not come)."""
+        params = SEASON_PARAMS.get(inputs.season, DEFAULT_SEASON)
+        if inputs.days_until_rainfall is None:
+            return np.full(scenarios, np.inf)
+        spread = np.exp(rng.normal(0.0, params.onset_spread, scenarios)) if params.onset_spread else 1.0
+        jitter = rng.normal(0.0, params.onset_jitter_days, scenarios) if params.onset_jitter_days else 0.0
+        onsets = np.maximum(inputs.days_until_rainfall * spread + jitter, 0.0)
+        return np.where(rng.random(scenarios) < params.failure_probability, np.inf, onsets)
+
+    def project(self, inputs: ProjectionInputs, scenarios: int = 5000, horizon_days: int = 90, seed: int = 0) -> dict:
+        rng = np.random.default_rng(seed)
+        params = SEASON_PARAMS.get(inputs.season, DEFAULT_SEASON)
+        onsets = self.rainfall_onsets(inputs, scenarios, rng)
+        demand_mean = inputs.daily_demand_liters
+        demand_level = demand_mean * np.maximum(rng.normal(1.0, DEMAND_LEVEL_CV, scenarios), 0.0)
+        fog_mean = max(inputs.fog_capture_liters, 0.0)
+        # Lognormal yield with mean fog_mean and the season's CV (cheaper to draw than a gamma).
+        fog_sigma = float(np.sqrt(np.log1p(params.fog_cv**2)))
+        capacity = max(inputs.capacity_liters, inputs.available_liters)
+
+        stock = np.full(scenarios, max(inputs.available_liters, 0.0))
+        depleted_on = np.full(scenarios, np.inf)
+        if demand_mean > 0 and not fog_mean:
+            # Constant drawdown: the tanks simply last stock / demand days.
+            lasts = np.divide(stock, demand_level, out=np.full(scenarios, np.inf), where=demand_level > 0)
+            depleted_on = np.where(lasts < horizon_days, lasts, np.inf)
+        elif demand_mean > 0:
+            for day in range(horizon_days):
+                if fog_sigma:
+                    fog = fog_mean * np.exp(rng.standard_normal(scenarios) * fog_sigma - fog_sigma**2 / 2)
+                else:
+                    fog = fog_mean
+                stock = np.minimum(stock + fog, capacity)
+                # Ran dry during this day: the fraction of the day's demand that was still covered.
+                dry = (stock < demand_level) & np.isinf(depleted_on)
+                depleted_on[dry] = day + stock[dry] / demand_level[dry]
+                stock = np.maximum(stock - demand_level, 0.0)
+
+        before_rain = depleted_on < onsets
+        depletion_days = np.where(before_rain, depleted_on, np.inf)
+        # P(dry by the end of day t, before the rains): the sorted depletion days counted at each day boundary.
+        curve = np.searchsorted(np.sort(depletion_days), np.arange(1, horizon_days + 1), side="right") / scenarios
+        probability = float(before_rain.mean())
+        risk_level = next((level for level, threshold in RISK_THRESHOLDS if probability >= threshold), "low")
+
+        return {
+            "scenarios": scenarios,
+            "horizon_days": horizon_days,
+            "daily_demand_liters": round(demand_mean, 2),
+            "probability_depleted_before_rain": round(probability, 4),
+            "risk_level": risk_level,
+            "depletion_probability": np.round(curve, 4).tolist(),
+            # Ignoring rain: how long the water lasts (None: beyond the horizon).
+            "days_of_supply": _percentiles(depleted_on),
+            "rainfall_onset_days": _percentiles(np.where(onsets < horizon_days, onsets, np.inf)),
+        }
+
+
+def split_demand(totals: dict[str, float]) -> tuple[float, ...]:
+    """DemandEngine ``totals`` as a tuple aligned with CATEGORIES."""
+    return tuple(float(totals.get(category, 0.0)) for category in CATEGORIES)
@@ -0,0 +1,119 @@
+"""
+Loads a profile's projection inputs and caches Monte Carlo projections.
+
+Inputs come from the same batch summary the dashboard figures match
+(``summarize_profiles``) plus the profile's storage capacity. A projection
+is cached under a fingerprint of its inputs, the scenario count, the
+horizon and the engine's MODEL_VERSION, and is seeded from that
+fingerprint: the same inputs give the same answer from any worker, and any
+change to them simply lands on a new key.
+"""
+import hashlib
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Sum
+
+from water.models import UserProfile, WaterDemandUnit, WaterStorage
+from water.services.batch_engines import summarize_profiles
+from water.services.constraint_engine import NO_RAINFALL
+from water.services.demand_engine import CATEGORIES, DemandEngine
+from water.services.projection_engine import MODEL_VERSION, ProjectionInputs, SupplyProjectionEngine, split_demand
+
+CACHE_PREFIX = "projection"
+
+
+def load_inputs(user_id: int) -> ProjectionInputs | None:
+    """The profile's current projection inputs, or None when it does not exist (6 queries)."""
+    summary = summarize_profiles(UserProfile.objects.filter(user_id=user_id))
+    if not len(summary["profile_ids"]):
+        return None
+    profile_id = int(summary["profile_ids"][0])
+    capacity = WaterStorage.objects.filter(system__owner_id=profile_id).aggregate(total=Sum("capacity_liters"))["total"]
+    days_until_rainfall = int(summary["days_until_rainfall"][0])
+    return ProjectionInputs(
+        available_liters=float(summary["available_liters"][0]),
+        capacity_liters=float(capacity or 0),
+        fog_capture_liters=float(summary["fog_capture_liters"][0]),
+        demand_liters=split_demand({category: summary["demand_totals"][category][0] for category in CATEGORIES}),
+        rationing=(0.0,) * len(CATEGORIES),
+        days_until_rainfall=None if days_until_rainfall == NO_RAINFALL else days_until_rainfall,
+        season=summary["season"][0],
+    )
+
+
+def with_changes(
+    inputs: ProjectionInputs,
+    demand_units: Iterable[WaterDemandUnit] | None = None,
+    rationing: dict[str, float] | None = None,
+) -> ProjectionInputs:
+    """What-if inputs: ``demand_units`` replace the profile's units, ``rationing`` cuts categories' needs."""
+    changes = {}
+    if demand_units is not None:
+        changes["demand_liters"] = split_demand(DemandEngine().daily_demand(demand_units)["totals"])
+    if rationing:
+        changes["rationing"] = tuple(float(rationing.get(category, 0.0)) for category in CATEGORIES)
+    return inputs._replace(**changes)
+
+
+def parse_rationing(value) -> dict[str, float]:
+    """A fraction for every category, or a {category: fraction} mapping; fractions in [0, 1]."""
+    if value in (None, ""):
+        return {}
+    if not isinstance(value, dict):
+        value = {category: value for category in CATEGORIES}
+    unknown = set(value) - set(CATEGORIES)
+    if unknown:
+        raise ValueError(f"rationing categories must be among {', '.join(CATEGORIES)}")
+    try:
+        levels = {category: float(level) for category, level in value.items()}
+    except (TypeError, ValueError):
+        raise ValueError("rationing levels must be numbers") from None
+    if not all(0 <= level <= 1 for level in levels.values()):
+        raise ValueError("rationing levels must be between 0 and 1")
+    return levels
+
+
+def _bounded_int(value, name: str, default: int, low: int, high: int) -> int:
+    if value in (None, ""):
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer") from None
+    if not low <= number <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return number
+
+
+def parse_run(scenarios=None, horizon_days=None) -> tuple[int, int]:
+    """(scenarios, horizon_days) from request values, defaulted and range-checked."""
+    return (
+        _bounded_int(scenarios, "scenarios", settings.PROJECTION_SCENARIOS, 100, settings.PROJECTION_MAX_SCENARIOS),
+        _bounded_int(horizon_days, "horizon_days", settings.PROJECTION_HORIZON_DAYS, 1, settings.PROJECTION_MAX_HORIZON_DAYS),
+    )
+
+
+def fingerprint(inputs: ProjectionInputs, scenarios: int, horizon_days: int) -> str:
+    return hashlib.blake2b(repr((MODEL_VERSION, tuple(inputs), scenarios, horizon_days)).encode(), digest_size=16).hexdigest()
+
+
+def project(inputs: ProjectionInputs, scenarios: int, horizon_days: int) -> tuple[dict, str]:
+    """(projection, fingerprint), from the cache when these exact inputs were projected recently."""
+    key = fingerprint(inputs, scenarios, horizon_days)
+    cache = caches["default"]
+    result = cache.get(f"{CACHE_PREFIX}:{key}")
+    if result is None:
+        result = SupplyProjectionEngine().project(inputs, scenarios, horizon_days, seed=int(key[:16], 16))
+        result["inputs"] = {
+            "available_liters": inputs.available_liters,
+            "capacity_liters": inputs.capacity_liters,
+            "fog_capture_liters": inputs.fog_capture_liters,
+            "demand": dict(zip(CATEGORIES, inputs.demand_liters)),
+            "rationing": dict(zip(CATEGORIES, inputs.rationing)),
+            "days_until_rainfall": inputs.days_until_rainfall,
+            "season": inputs.season,
+        }
+        cache.set(f"{CACHE_PREFIX}:{key}", result, settings.PROJECTION_CACHE_TTL_SECONDS)
+    return result, key
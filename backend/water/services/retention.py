@@ -0,0 +1,134 @@
+"""
+Tiered retention: raw readings for RETENTION_RAW_DAYS, hourly rollups for
+RETENTION_HOURLY_DAYS, daily rollups for RETENTION_DAILY_DAYS (0 = forever).
+Raw rows are exported to the cold archive before they are deleted.
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from water.models import ReadingChunk, ReadingSeq, SensorReading, SensorRollup
+from water.services.archive import ARCHIVE_FIELDS, month_start, next_month, reading_archive
+from water.services.chunks import chunk_rows
+from water.services.rollups import refresh_rollups
+
+logger = logging.getLogger(__name__)
+
+
+def cutoff_for(days: int) -> datetime | None:
+    return timezone.now() - timedelta(days=days) if days > 0 else None
+
+
+def backfill_conflict(name: str, days: int) -> str | None:
+    """
+    Why pruning at a ``days`` cutoff is unsafe, or None. Ingest rejects
+    re-sent readings through their ReadingSeq claims, and ``prune_seq_claims``
+    drops those claims at the raw retention cutoff, so that cutoff must lie
+    beyond the window in which backfilled readings are accepted; the extra day
+    covers requests validated just before the cut.
+    """
+    if days <= settings.IOT_MAX_BACKFILL_DAYS:
+        return (
+            f"{name}={days} must be greater than IOT_MAX_BACKFILL_DAYS={settings.IOT_MAX_BACKFILL_DAYS}: "
+            "backfilled readings re-sent after their seq claims are pruned would be stored twice"
+        )
+    return None
+
+
+def raw_cutoff() -> datetime | None:
+    """Readings older than this live only in the archive (once prune_readings has run)."""
+    return cutoff_for(settings.RETENTION_RAW_DAYS)
+
+
+def hourly_cutoff() -> datetime | None:
+    return cutoff_for(settings.RETENTION_HOURLY_DAYS)
+
+
+def _delete_ids(model, ids: list[int], chunk_size: int, pause: float) -> int:
+    # Small primary-key batches, each in its own short transaction, so ingest never waits long on locks.
+    deleted = 0
+    for start in range(0, len(ids), chunk_size):
+        with transaction.atomic():
+            deleted += model.objects.filter(id__in=ids[start : start + chunk_size]).delete()[1].get(
+                model._meta.label, 0
+            )
+        if pause:
+            time.sleep(pause)
+    return deleted
+
+
+def prune_readings(cutoff: datetime, chunk_size: int = 2000, pause: float = 0.0, dry_run: bool = False) -> dict:
+    """
+    Archive and delete readings recorded before ``cutoff``, one sensor/month
+    at a time, then do the same for expired compacted chunks and drop their
+    (sensor, seq) claims. Rollups are
+    refreshed first so they already cover every row that goes. Only the
+    exported ids are deleted, so rows arriving mid-run stay for the next one.
+    """
+    stats = {"sensors": 0, "archived": 0, "deleted": 0, "files": 0, "chunks": 0, "claims": 0}
+    if not dry_run:
+        refresh_rollups()
+
+    expired = SensorReading.objects.filter(recorded_at__lt=cutoff)
+    sensor_ids = list(expired.order_by().values_list("sensor_id", flat=True).distinct())
+    for sensor_id in sensor_ids:
+        stats["sensors"] += 1
+        oldest = expired.filter(sensor_id=sensor_id).order_by("recorded_at").values_list("recorded_at", flat=True).first()
+        month = month_start(oldest)
+        while month < cutoff:
+            upper = min(next_month(month), cutoff)
+            rows = list(
+                expired.filter(sensor_id=sensor_id, recorded_at__gte=month, recorded_at__lt=upper)
+                .order_by("recorded_at", "id")
+                .values_list(*ARCHIVE_FIELDS)
+            )
+            month = next_month(month)
+            if not rows:
+                continue
+            stats["archived"] += len(rows)
+            stats["files"] += 1
+            if dry_run:
+                continue
+            reading_archive.write(sensor_id, month_start(rows[0][1]), rows)
+            stats["deleted"] += _delete_ids(SensorReading, [row[0] for row in rows], chunk_size, pause)
+            logger.info("Archived %d readings of sensor %s up to %s", len(rows), sensor_id, upper.date())
+
+    # Compacted days that have fully expired go to the archive as well.
+    chunks = ReadingChunk.objects.filter(end_at__lt=cutoff, day__lt=cutoff.date()).order_by("sensor_id", "day")
+    for chunk in chunks.iterator(chunk_size=100):
+        rows = chunk_rows(bytes(chunk.data))
+        stats["archived"] += len(rows)
+        stats["chunks"] += 1
+        if dry_run:
+            continue
+        reading_archive.write(chunk.sensor_id, month_start(rows[0][1]), rows)
+        stats["deleted"] += len(rows)
+        chunk.delete()
+
+    stats["claims"] = prune_seq_claims(cutoff, chunk_size=chunk_size, pause=pause, dry_run=dry_run)
+    return stats
+
+
+def prune_seq_claims(cutoff: datetime, chunk_size: int = 2000, pause: float = 0.0, dry_run: bool = False) -> int:
+    """
+    Forget the (sensor, seq) claims of readings recorded before ``cutoff``.
+    Only safe beyond the backfill window (see ``backfill_conflict``): ingest
+    rejects anything that old, so those keys can no longer come back.
+    """
+    ids = list(ReadingSeq.objects.filter(recorded_at__lt=cutoff).order_by().values_list("id", flat=True))
+    if dry_run:
+        return len(ids)
+    return _delete_ids(ReadingSeq, ids, chunk_size, pause)
+
+
+def prune_rollups(resolution: str, cutoff: datetime, chunk_size: int = 2000, dry_run: bool = False) -> int:
+    ids = list(
+        SensorRollup.objects.filter(resolution=resolution, bucket__lt=cutoff).order_by().values_list("id", flat=True)
+    )
+    if dry_run:
+        return len(ids)
+    return _delete_ids(SensorRollup, ids, chunk_size, 0.0)
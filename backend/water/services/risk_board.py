@@ -0,0 +1,184 @@
+"""
+Regional drought-risk board: ProfileRisk rows recomputed incrementally.
+
+``refresh_risk_board`` recomputes only profiles whose inputs changed since
+its watermark, found from the change stamps the inputs already carry
+(SensorLatest / WaterStorage / WaterDemandUnit ``updated_at``, new
+ClimateSnapshots), rows that signals flagged ``stale`` (edits and deletions
+that leave no stamp) and profiles without a row yet. Candidates go through
+the batch engines a few thousand at a time and are upserted in one
+statement per batch.
+"""
+import base64
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from water.models import (
+    ClimateSnapshot,
+    Location,
+    ProfileRisk,
+    RiskWatermark,
+    SensorLatest,
+    UserProfile,
+    WaterDemandUnit,
+    WaterStorage,
+)
+from water.services.batch_engines import summarize_profiles
+from water.services.constraint_engine import NO_RAINFALL
+
+logger = logging.getLogger(__name__)
+
+WATERMARK = "risk_board"
+UPDATE_FIELDS = [
+    "location",
+    "region",
+    "available_liters",
+    "fog_capture_liters",
+    "human_liters",
+    "livestock_liters",
+    "crop_liters",
+    "total_daily_liters",
+    "days_of_supply",
+    "days_until_rainfall",
+    "season",
+    "risk_level",
+    "refreshed_at",
+]
+
+
+def changed_profiles(since) -> set[int]:
+    """Ids of profiles whose board row is missing, flagged stale or older than an input stamped after ``since``."""
+    candidates = [
+        UserProfile.objects.filter(risk__isnull=True).values_list("id", flat=True),
+        ProfileRisk.objects.filter(stale=True).values_list("profile_id", flat=True),
+    ]
+    if since is not None:
+        candidates += [
+            SensorLatest.objects.filter(updated_at__gt=since, sensor__system__isnull=False).values_list("sensor__system__owner_id", flat=True),
+            WaterStorage.objects.filter(updated_at__gt=since).values_list("system__owner_id", flat=True),
+            WaterDemandUnit.objects.filter(updated_at__gt=since).values_list("owner_id", flat=True),
+            UserProfile.objects.filter(
+                location__in=ClimateSnapshot.objects.filter(recorded_at__gt=since).values("location_id")
+            ).values_list("id", flat=True),
+        ]
+    else:
+        candidates.append(UserProfile.objects.values_list("id", flat=True))
+    return {profile_id for query in candidates for profile_id in query.distinct()}
+
+
+def _board_rows(summary: dict, regions: dict[int, str]) -> list[ProfileRisk]:
+    now = timezone.now()
+    totals = summary["demand_totals"]
+    return [
+        ProfileRisk(
+            profile_id=int(profile_id),
+            location_id=location_id,
+            region=regions.get(location_id, ""),
+            available_liters=float(summary["available_liters"][i]),
+            fog_capture_liters=float(summary["fog_capture_liters"][i]),
+            human_liters=float(totals["human"][i]),
+            livestock_liters=float(totals["livestock"][i]),
+            crop_liters=float(totals["crop"][i]),
+            total_daily_liters=float(summary["total_daily_liters"][i]),
+            days_of_supply=float(summary["days_of_supply"][i]),
+            days_until_rainfall=None if summary["days_until_rainfall"][i] == NO_RAINFALL else int(summary["days_until_rainfall"][i]),
+            season=summary["season"][i] or "",
+            risk_level=str(summary["risk_level"][i]),
+            refreshed_at=now,
+        )
+        for i, (profile_id, location_id) in enumerate(zip(summary["profile_ids"], summary["location_ids"]))
+    ]
+
+
+def refresh_risk_board(full: bool = False, batch_size: int = 5000, overlap_seconds: int = 60) -> dict:
+    """
+    Recompute changed profiles (every profile with ``full``) and advance the
+    watermark. It is set ``overlap_seconds`` before this run started, so rows
+    committed late by long transactions are picked up by the next run.
+    """
+    started = timezone.now()
+    watermark, _ = RiskWatermark.objects.get_or_create(name=WATERMARK)
+    profile_ids = sorted(changed_profiles(None if full else watermark.changed_through))
+    regions = dict(Location.objects.values_list("id", "region"))
+
+    for start in range(0, len(profile_ids), batch_size):
+        batch = profile_ids[start : start + batch_size]
+        # Clear flags before reading inputs: a change flagged mid-batch stays flagged for the next run.
+        ProfileRisk.objects.filter(profile_id__in=batch, stale=True).update(stale=False)
+        summary = summarize_profiles(UserProfile.objects.filter(id__in=batch))
+        with transaction.atomic():
+            ProfileRisk.objects.bulk_create(
+                _board_rows(summary, regions),
+                update_conflicts=True,
+                unique_fields=["profile"],
+                update_fields=UPDATE_FIELDS,
+            )
+
+    watermark.changed_through = started - timedelta(seconds=overlap_seconds)
+    watermark.save(update_fields=["changed_through", "updated_at"])
+    if profile_ids:
+        logger.info("Risk board: recomputed %d profiles", len(profile_ids))
+    return {"profiles": len(profile_ids), "watermark": watermark.changed_through}
+
+
+def mark_stale(profiles: QuerySet) -> int:
+    """Flag the board rows of ``profiles`` for the next refresh (for changes that leave no stamp)."""
+    return ProfileRisk.objects.filter(profile__in=profiles, stale=False).update(stale=True)
+
+
+def encode_cursor(row: ProfileRisk) -> str:
+    raw = f"{row.days_of_supply!r}|{row.profile_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        days, profile_id = raw.split("|")
+        return float(days), int(profile_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor") from None
+
+
+def parse_page_size(value: str | None) -> int:
+    if value in (None, ""):
+        return settings.RISK_BOARD_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValueError("page_size must be an integer") from None
+    if not 1 <= size <= settings.RISK_BOARD_MAX_PAGE_SIZE:
+        raise ValueError(f"page_size must be between 1 and {settings.RISK_BOARD_MAX_PAGE_SIZE}")
+    return size
+
+
+def board_page(
+    region: str | None = None,
+    location_id: int | None = None,
+    risk_levels: list[str] | None = None,
+    cursor: str | None = None,
+    page_size: int = 100,
+) -> tuple[list[ProfileRisk], str | None]:
+    """
+    One page of board rows, most at risk (fewest days of supply) first,
+    keyset-paginated on (days_of_supply, profile) so every page is an index
+    range scan whatever the fleet size. Returns (rows, next cursor).
+    """
+    rows = ProfileRisk.objects.select_related("profile").order_by("days_of_supply", "profile_id")
+    if region:
+        rows = rows.filter(region=region)
+    if location_id:
+        rows = rows.filter(location_id=location_id)
+    if risk_levels:
+        rows = rows.filter(risk_level__in=risk_levels)
+    if cursor:
+        days, profile_id = decode_cursor(cursor)
+        rows = rows.filter(Q(days_of_supply__gt=days) | Q(days_of_supply=days, profile_id__gt=profile_id))
+    page = list(rows[: page_size + 1])
+    next_cursor = encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+    return page[:page_size], next_cursor
@@ -0,0 +1,225 @@
+"""
+Incremental hourly/daily rollups of SensorReading into SensorRollup.
+
+``refresh_rollups`` walks readings by id past a stored watermark. Ids grow
+with every insert, so late-arriving (backfilled) rows are picked up like any
+other new row; only the hour buckets they fall into are recomputed from raw
+readings, and only the days containing those hours are re-merged from their
+hourly rollups.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from water.models import ReadingChunk, RollupWatermark, SensorReading, SensorRollup
+from water.services.archive import reading_archive
+from water.services.chunks import cold_readings
+
+METRICS = ("distance_cm", "water_level", "humidity", "temperature")
+HOUR = SensorRollup.Resolution.HOUR
+DAY = SensorRollup.Resolution.DAY
+WATERMARK = "sensor_rollups"
+
+
+def bucket_start(moment: datetime, resolution: str) -> datetime:
+    """Start of the local (TIME_ZONE) hour or day containing ``moment``."""
+    local = timezone.localtime(moment)
+    if resolution == HOUR:
+        return local.replace(minute=0, second=0, microsecond=0)
+    return timezone.make_aware(datetime.combine(local.date(), datetime.min.time()))
+
+
+def bucket_end(start: datetime, resolution: str) -> datetime:
+    if resolution == HOUR:
+        return start + timedelta(hours=1)
+    # Re-derive midnight so DST days are 23/25 hours long.
+    return bucket_start(start + timedelta(hours=26), DAY)
+
+
+class _Bucket:
+    """Running aggregate for one sensor/bucket; fed either raw readings or finer rollups."""
+
+    __slots__ = ("count", "last_at", "mins", "maxes", "sums", "counts", "lasts")
+
+    def __init__(self):
+        self.count = 0
+        self.last_at: datetime | None = None
+        self.mins = dict.fromkeys(METRICS)
+        self.maxes = dict.fromkeys(METRICS)
+        self.sums = dict.fromkeys(METRICS, 0.0)
+        self.counts = dict.fromkeys(METRICS, 0)
+        self.lasts = dict.fromkeys(METRICS)
+
+    def _bound(self, metric: str, low: float, high: float) -> None:
+        if self.mins[metric] is None or low < self.mins[metric]:
+            self.mins[metric] = low
+        if self.maxes[metric] is None or high > self.maxes[metric]:
+            self.maxes[metric] = high
+
+    def add_reading(self, recorded_at: datetime, values) -> None:
+        newest = self.last_at is None or recorded_at >= self.last_at
+        self.count += 1
+        if newest:
+            self.last_at = recorded_at
+        for metric, value in zip(METRICS, values):
+            if newest:
+                self.lasts[metric] = None if value is None else float(value)
+            if value is None:
+                continue
+            value = float(value)
+            self._bound(metric, value, value)
+            self.sums[metric] += value
+            self.counts[metric] += 1
+
+    def add_rollup(self, rollup: SensorRollup) -> None:
+        newest = self.last_at is None or rollup.last_at >= self.last_at
+        self.count += rollup.count
+        if newest:
+            self.last_at = rollup.last_at
+        for metric in METRICS:
+            if newest:
+                self.lasts[metric] = getattr(rollup, f"{metric}_last")
+            count = getattr(rollup, f"{metric}_count")
+            if not count:
+                continue
+            self._bound(metric, getattr(rollup, f"{metric}_min"), getattr(rollup, f"{metric}_max"))
+            self.sums[metric] += getattr(rollup, f"{metric}_avg") * count
+            self.counts[metric] += count
+
+    def to_rollup(self, sensor_id: int, resolution: str, bucket: datetime) -> SensorRollup:
+        rollup = SensorRollup(sensor_id=sensor_id, resolution=resolution, bucket=bucket, count=self.count, last_at=self.last_at)
+        for metric in METRICS:
+            count = self.counts[metric]
+            setattr(rollup, f"{metric}_min", self.mins[metric])
+            setattr(rollup, f"{metric}_max", self.maxes[metric])
+            setattr(rollup, f"{metric}_avg", self.sums[metric] / count if count else None)
+            setattr(rollup, f"{metric}_count", count)
+            setattr(rollup, f"{metric}_last", self.lasts[metric])
+        return rollup
+
+
+ROLLUP_UPDATE_FIELDS = ["count", "last_at", "updated_at"] + [
+    f"{metric}_{stat}" for metric in METRICS for stat in ("min", "max", "avg", "count", "last")
+]
+
+
+def _save(rollups: list[SensorRollup]) -> None:
+    SensorRollup.objects.bulk_create(
+        rollups,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["sensor", "resolution", "bucket"],
+        update_fields=ROLLUP_UPDATE_FIELDS,
+    )
+
+
+def _runs(buckets: list[datetime], resolution: str) -> list[tuple[datetime, datetime]]:
+    """Collapse sorted bucket starts into contiguous [start, end) ranges."""
+    runs: list[tuple[datetime, datetime]] = []
+    for start in buckets:
+        end = bucket_end(start, resolution)
+        if runs and runs[-1][1] == start:
+            runs[-1] = (runs[-1][0], end)
+        else:
+            runs.append((start, end))
+    return runs
+
+
+def recompute_hours(affected: dict[int, set[datetime]]) -> int:
+    """Rebuild the given (sensor -> hour starts) buckets from raw readings."""
+    rollups = []
+    if not affected:
+        return 0
+    oldest = min(min(hours) for hours in affected.values())
+    compacted = set(
+        ReadingChunk.objects.filter(sensor_id__in=affected.keys(), end_at__gte=oldest).values_list("sensor_id", flat=True)
+    )
+    for sensor_id, hours in affected.items():
+        for start, end in _runs(sorted(hours), HOUR):
+            buckets: dict[datetime, _Bucket] = defaultdict(_Bucket)
+            rows = (
+                SensorReading.objects.filter(sensor_id=sensor_id, recorded_at__gte=start, recorded_at__lt=end)
+                .order_by()
+                .values_list("recorded_at", *METRICS)
+            )
+            for recorded_at, *values in rows.iterator(chunk_size=5000):
+                buckets[bucket_start(recorded_at, HOUR)].add_reading(recorded_at, values)
+            if sensor_id in compacted or reading_archive.has_sensor(sensor_id):
+                # Late rows landing in an already compacted or pruned range: fold those readings back in.
+                live = set(rows.values_list("id", flat=True))
+                for reading in cold_readings(sensor_id, start, end):
+                    if reading.id not in live:
+                        buckets[bucket_start(reading.recorded_at, HOUR)].add_reading(
+                            reading.recorded_at, [getattr(reading, metric) for metric in METRICS]
+                        )
+            rollups.extend(bucket.to_rollup(sensor_id, HOUR, hour) for hour, bucket in buckets.items())
+    _save(rollups)
+    return len(rollups)
+
+
+def hourly_rollups(sensor_id: int, readings: list[SensorReading]) -> list[SensorRollup]:
+    """Unsaved hourly rollups computed from ``readings`` of one sensor."""
+    buckets: dict[datetime, _Bucket] = defaultdict(_Bucket)
+    for reading in readings:
+        buckets[bucket_start(reading.recorded_at, HOUR)].add_reading(
+            reading.recorded_at, [getattr(reading, metric) for metric in METRICS]
+        )
+    return [bucket.to_rollup(sensor_id, HOUR, hour) for hour, bucket in buckets.items()]
+
+
+def recompute_days(affected: dict[int, set[datetime]]) -> int:
+    """Re-merge the given (sensor -> day starts) buckets from their hourly rollups."""
+    rollups = []
+    for sensor_id, days in affected.items():
+        for start, end in _runs(sorted(days), DAY):
+            buckets: dict[datetime, _Bucket] = defaultdict(_Bucket)
+            hours = SensorRollup.objects.filter(
+                sensor_id=sensor_id, resolution=HOUR, bucket__gte=start, bucket__lt=end
+            ).order_by("bucket")
+            for hour in hours:
+                buckets[bucket_start(hour.bucket, DAY)].add_rollup(hour)
+            rollups.extend(bucket.to_rollup(sensor_id, DAY, day) for day, bucket in buckets.items())
+    _save(rollups)
+    return len(rollups)
+
+
+def refresh_rollups(batch_size: int = 20000, overlap: int = 0) -> dict:
+    """
+    Fold readings added since the watermark into SensorRollup, ``batch_size``
+    ids per transaction. ``overlap`` re-reads that many ids below the
+    watermark, for PostgreSQL setups where concurrent writers can commit
+    ids out of order; recomputing a bucket is idempotent.
+    """
+    watermark, _ = RollupWatermark.objects.get_or_create(name=WATERMARK)
+    position = max(0, watermark.last_reading_id - overlap)
+    high = SensorReading.objects.aggregate(high=Max("id"))["high"] or 0
+    stats = {"readings": 0, "hours": 0, "days": 0, "watermark": watermark.last_reading_id}
+
+    while position < high:
+        upper = min(position + batch_size, high)
+        hours: dict[int, set[datetime]] = defaultdict(set)
+        rows = SensorReading.objects.filter(id__gt=position, id__lte=upper).order_by().values_list("sensor_id", "recorded_at")
+        for sensor_id, recorded_at in rows.iterator(chunk_size=5000):
+            hours[sensor_id].add(bucket_start(recorded_at, HOUR))
+            stats["readings"] += 1
+        days = {sensor_id: {bucket_start(hour, DAY) for hour in starts} for sensor_id, starts in hours.items()}
+
+        with transaction.atomic():
+            stats["hours"] += recompute_hours(hours)
+            stats["days"] += recompute_days(days)
+            RollupWatermark.objects.filter(name=WATERMARK, last_reading_id__lt=upper).update(last_reading_id=upper)
+        position = upper
+
+    stats["watermark"] = max(stats["watermark"], high)
+    return stats
+
+
+def rebuild_rollups(batch_size: int = 20000) -> dict:
+    """Drop all rollups and recompute them from the full reading history."""
+    with transaction.atomic():
+        SensorRollup.objects.all().delete()
+        RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={"last_reading_id": 0})
+    return refresh_rollups(batch_size=batch_size)
@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Iterable, NamedTuple
+
+from django.conf import settings
+from django.db import connection
+
+from water.models import Sensor
+
+# Devices per auto-create INSERT: 2 parameters each keeps below SQLite's bound-parameter limit.
+INSERT_CHUNK = 400
+
+
+class SensorRef(NamedTuple):
+    id: int
+    device_id: str
+    system_id: int | None
+    deadband_distance_cm: float | None
+    deadband_humidity: Decimal | None
+    deadband_temperature: Decimal | None
+    heartbeat_seconds: int | None
+
+
+class SensorCache:
+    """
+    Bounded LRU of device_id -> Sensor ids shared by the ingest paths.
+    Entries expire after ``ttl`` seconds so other processes pick up admin
+    changes; in-process changes are invalidated immediately via signals.
+    """
+
+    fields = SensorRef._fields
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[SensorRef, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+
+    def get(self, device_id: str) -> SensorRef | None:
+        with self._lock:
+            entry = self._entries.get(device_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(device_id)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[device_id]
+            self.misses += 1
+            return None
+
+    def put(self, ref: SensorRef) -> None:
+        with self._lock:
+            self._entries[ref.device_id] = (ref, time.monotonic() + self.ttl)
+            self._entries.move_to_end(ref.device_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def resolve(self, device_id: str, create: bool = False, description: str = "") -> SensorRef | None:
+        return self.resolve_many([device_id], create=create, description=description).get(device_id)
+
+    def resolve_many(
+        self, device_ids: Iterable[str], create: bool = False, description: str = ""
+    ) -> dict[str, SensorRef]:
+        """
+        Map device_ids to SensorRefs: cached ids cost nothing, misses are
+        loaded with one query and, if ``create`` is set, unknown devices are
+        inserted with a conflict-tolerant INSERT.
+        """
+        resolved: dict[str, SensorRef] = {}
+        missing: set[str] = set()
+        for device_id in set(device_ids):
+            ref = self.get(device_id)
+            if ref is None:
+                missing.add(device_id)
+            else:
+                resolved[device_id] = ref
+        if not missing:
+            return resolved
+
+        loaded = self._load(missing)
+        unknown = missing - loaded.keys()
+        if unknown and create:
+            inserted = self._insert(unknown, description)
+            loaded.update(self._load(unknown))
+            with self._lock:
+                self.created += inserted
+
+        for ref in loaded.values():
+            self.put(ref)
+        resolved.update(loaded)
+        return resolved
+
+    def _insert(self, device_ids: set[str], description: str) -> int:
+        """
+        ``INSERT ... ON CONFLICT DO NOTHING`` so concurrent writers can race on
+        the unique device_id without either side failing. Returns the rows this
+        call inserted; devices another writer created first are not counted.
+        """
+        quote = connection.ops.quote_name
+        table = quote(Sensor._meta.db_table)
+        columns = ", ".join(quote(column) for column in ("device_id", "system_id", "description"))
+        ordered = sorted(device_ids)
+        inserted = 0
+        with connection.cursor() as cursor:
+            for start in range(0, len(ordered), INSERT_CHUNK):
+                chunk = ordered[start : start + INSERT_CHUNK]
+                cursor.execute(
+                    f"INSERT INTO {table} ({columns}) VALUES {', '.join(['(%s, NULL, %s)'] * len(chunk))} "
+                    f"ON CONFLICT ({quote('device_id')}) DO NOTHING",
+                    [value for device_id in chunk for value in (device_id, description)],
+                )
+                inserted += max(cursor.rowcount, 0)
+        return inserted
+
+    def _load(self, device_ids: set[str]) -> dict[str, SensorRef]:
+        rows = Sensor.objects.filter(device_id__in=device_ids).values_list(*self.fields)
+        return {row[1]: SensorRef(*row) for row in rows}
+
+    def invalidate(self, device_id: str | None = None, sensor_id: int | None = None) -> None:
+        with self._lock:
+            if device_id is not None:
+                self._entries.pop(device_id, None)
+            if sensor_id is not None:
+                stale = [key for key, (ref, _) in self._entries.items() if ref.id == sensor_id]
+                for key in stale:
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "created": self.created,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+sensor_cache = SensorCache(maxsize=settings.SENSOR_CACHE_SIZE, ttl=settings.SENSOR_CACHE_TTL_SECONDS)
@@ -0,0 +1,268 @@
+"""
+Durable on-disk spool between the MQTT receive path and the database.
+
+Payloads are appended to segmented log files (``<index>.seg``) with batched
+fsyncs; a drainer thread replays them into SensorReading. The drainer stores
+its (segment, offset) position in SpoolCheckpoint inside the same
+transaction as the inserted readings, so a crash at any point replays every
+record exactly once.
+"""
+import contextlib
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from pathlib import Path
+
+from django.db import close_old_connections, connections, transaction
+
+from water.models import SpoolCheckpoint
+from water.services.ingest import TelemetryError, TelemetryWriter, parse_payload
+from water.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# payload length, crc32 of payload, receive time (unix seconds)
+HEADER = struct.Struct(">IId")
+SEGMENT_SUFFIX = ".seg"
+
+
+class Spool:
+    """
+    Append-only segmented write-ahead log.
+    Every process start opens a fresh segment, so segments never get appended
+    to after a crash and a torn tail record only ever sits at a segment's end.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        segment_bytes: int = 64 * 1024 * 1024,
+        fsync_every: int = 500,
+        fsync_ms: int = 200,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.fsync_every = fsync_every
+        self.fsync_seconds = fsync_ms / 1000
+        self._lock = threading.Lock()
+        self._fd: int | None = None
+        self._segment = -1
+        self._size = 0
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        existing = self.segments()
+        self._open_segment((existing[-1] + 1) if existing else 0)
+
+    def segments(self) -> list[int]:
+        return sorted(int(path.stem) for path in self.directory.glob(f"*{SEGMENT_SUFFIX}"))
+
+    def path_for(self, segment: int) -> Path:
+        return self.directory / f"{segment:012d}{SEGMENT_SUFFIX}"
+
+    def _open_segment(self, segment: int) -> None:
+        if self._fd is not None:
+            os.fsync(self._fd)
+            os.close(self._fd)
+        self._segment = segment
+        self._fd = os.open(self.path_for(segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = os.fstat(self._fd).st_size
+        self._pending = 0
+        # Make the new directory entry itself durable.
+        dir_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def append(self, payload: bytes, received_at: float | None = None) -> None:
+        record = HEADER.pack(len(payload), zlib.crc32(payload), received_at or time.time()) + payload
+        with self._lock:
+            if self._size and self._size + len(record) > self.segment_bytes:
+                self._open_segment(self._segment + 1)
+            # A single unbuffered write makes the record visible to the drainer at once.
+            os.write(self._fd, record)
+            self._size += len(record)
+            self._pending += 1
+            if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_seconds:
+                self._sync()
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._pending:
+                self._sync()
+
+    def _sync(self) -> None:
+        os.fsync(self._fd)
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        metrics.incr("spool.fsyncs")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._fd = None
+
+    def read(self, segment: int, offset: int, limit: int) -> tuple[list[tuple[bytes, float]], int, int]:
+        """
+        Return up to ``limit`` (payload, received_at) records starting at
+        (segment, offset) plus the position just after the last one returned.
+        """
+        records: list[tuple[bytes, float]] = []
+        while len(records) < limit:
+            path = self.path_for(segment)
+            exhausted = True
+            if path.exists():
+                with open(path, "rb") as handle:
+                    handle.seek(offset)
+                    while len(records) < limit:
+                        header = handle.read(HEADER.size)
+                        if len(header) < HEADER.size:
+                            break
+                        length, crc, received_at = HEADER.unpack(header)
+                        payload = handle.read(length)
+                        if len(payload) < length or zlib.crc32(payload) != crc:
+                            break
+                        records.append((payload, received_at))
+                        offset += HEADER.size + length
+                    else:
+                        exhausted = False
+            if not exhausted:
+                break
+            # End of this segment (or a torn tail): move on only once a newer segment exists.
+            newer = [index for index in self.segments() if index > segment]
+            if not newer:
+                break
+            segment, offset = newer[0], 0
+        return records, segment, offset
+
+    def remove_before(self, segment: int) -> None:
+        for index in self.segments():
+            if index < segment:
+                self.path_for(index).unlink(missing_ok=True)
+
+
+class SpoolDrainer:
+    """Replays the spool into SensorReading, checkpointing in the same transaction."""
+
+    def __init__(
+        self,
+        spool: Spool,
+        writer: TelemetryWriter,
+        name: str = "default",
+        batch_size: int = 500,
+        idle_ms: int = 200,
+        max_backoff: float = 30.0,
+    ):
+        self.spool = spool
+        self.writer = writer
+        self.name = name
+        self.batch_size = max(1, batch_size)
+        self.idle_seconds = idle_ms / 1000
+        self.max_backoff = max_backoff
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"spool-drainer-{name}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit_payload(self, payload: bytes) -> None:
+        self.spool.append(payload)
+        metrics.incr("ingest.received")
+
+    def close(self, timeout: float | None = None) -> None:
+        """Drain what the database will take, then stop; anything left is replayed on next start."""
+        self._stop.set()
+        self._thread.join(timeout)
+        self.spool.close()
+
+    def drain(self) -> bool:
+        """
+        Replay everything spooled so far in the calling thread, for a spool
+        nothing appends to any more. True when no record is left behind.
+        """
+        self._stop.set()
+        self._run()
+        checkpoint = SpoolCheckpoint.objects.get(name=self.name)
+        records, _, _ = self.spool.read(checkpoint.segment, checkpoint.offset, 1)
+        self.spool.close()
+        return not records
+
+    def _run(self) -> None:
+        backoff = 0.0
+        try:
+            checkpoint, _ = SpoolCheckpoint.objects.get_or_create(name=self.name)
+            position = (checkpoint.segment, checkpoint.offset)
+            while True:
+                self.spool.sync()
+                records, segment, offset = self.spool.read(*position, self.batch_size)
+                if (segment, offset) == position:
+                    if self._stop.is_set():
+                        break
+                    time.sleep(self.idle_seconds)
+                    continue
+                try:
+                    self._commit(records, segment, offset)
+                except Exception:  # noqa: BLE001
+                    logger.exception("Spool drain failed; retrying from segment %s offset %s", *position)
+                    metrics.incr("spool.retries")
+                    if self._stop.is_set():
+                        break
+                    backoff = min(self.max_backoff, backoff * 2 or 0.5)
+                    self._stop.wait(backoff)
+                    continue
+                backoff = 0.0
+                if segment != position[0]:
+                    self.spool.remove_before(segment)
+                position = (segment, offset)
+        finally:
+            connections.close_all()
+
+    def _commit(self, records: list[tuple[bytes, float]], segment: int, offset: int) -> None:
+        close_old_connections()
+        parsed = []
+        for payload, received_at in records:
+            try:
+                readings = parse_payload(payload)
+            except TelemetryError as exc:
+                metrics.incr("ingest.rejected")
+                logger.warning("Dropping invalid spooled payload: %s", exc)
+                continue
+            # Replays after an outage keep the time the broker delivered the reading.
+            received = datetime.fromtimestamp(received_at, tz=dt_timezone.utc)
+            for record in readings:
+                record["recorded_at"] = record["recorded_at"] or received
+            parsed.extend(readings)
+        started = time.perf_counter()
+        with transaction.atomic():
+            written = sum(1 for reading in self.writer.write(parsed) if reading is not None)
+            SpoolCheckpoint.objects.filter(name=self.name).update(segment=segment, offset=offset)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metrics.incr("ingest.flushes")
+        metrics.incr("ingest.written", written)
+        metrics.observe("ingest.flush", elapsed_ms)
+
+
+def drain_spool(directory: str | Path, name: str, writer: TelemetryWriter, batch_size: int = 500) -> bool:
+    """
+    Replay a spool left behind by an earlier layout (e.g. a larger --workers)
+    and, once it is empty, delete its segments and checkpoint. Returns False
+    and keeps both when the database would not take every record.
+    """
+    drainer = SpoolDrainer(Spool(directory), writer, name=name, batch_size=batch_size)
+    if not drainer.drain():
+        return False
+    for segment in drainer.spool.segments():
+        drainer.spool.path_for(segment).unlink(missing_ok=True)
+    SpoolCheckpoint.objects.filter(name=name).delete()
+    with contextlib.suppress(OSError):
+        # The top-level spool directory still holds the workers' directories.
+        drainer.spool.directory.rmdir()
+    return True
@@ -0,0 +1,162 @@
+"""
+Tank geometry: water height, liters and percent full from a level sensor's
+distance reading.
+
+Ingest measures each sensor's newest distance once (``upsert_latest``) and
+stores the results on SensorLatest, so status reads only format stored
+numbers. Volumes follow the sensor's TankGeometry:
+
+- cylinder: upright, constant cross-section
+- horizontal_cylinder: lying on its side; liters grow fastest at half height
+- cone_bottom: a cylinder over a conical (frustum) bottom section
+- lookup: a measured height -> liters table, interpolated linearly
+
+Sensors without a geometry are measured as an upright cylinder of
+TANK_DEFAULT_HEIGHT_CM holding TANK_DEFAULT_CAPACITY_L. Rows are grouped by
+shape and computed as NumPy columns, so a gateway batch costs a handful of
+vector operations rather than one formula per sensor.
+"""
+import logging
+import math
+from typing import NamedTuple, Sequence
+
+import numpy as np
+from django.conf import settings
+
+from water.models import TankGeometry
+
+logger = logging.getLogger(__name__)
+
+LITERS_PER_CM3 = 0.001
+
+
+class TankLevel(NamedTuple):
+    water_height_cm: float
+    volume_liters: float
+    percent_full: float
+    capacity_liters: float
+
+
+def default_geometry() -> TankGeometry:
+    """Unsaved upright cylinder matching TANK_DEFAULT_HEIGHT_CM / TANK_DEFAULT_CAPACITY_L."""
+    height = settings.TANK_DEFAULT_HEIGHT_CM
+    radius = math.sqrt(settings.TANK_DEFAULT_CAPACITY_L / LITERS_PER_CM3 / (math.pi * height))
+    return TankGeometry(shape=TankGeometry.Shape.CYLINDER, height_cm=height, diameter_cm=2 * radius)
+
+
+def interior_height(geometry: TankGeometry) -> float:
+    """Bottom-to-brim height: the diameter of a horizontal cylinder, the top of a lookup table by default."""
+    if geometry.shape == TankGeometry.Shape.HORIZONTAL_CYLINDER:
+        return geometry.diameter_cm
+    if geometry.shape == TankGeometry.Shape.LOOKUP and not geometry.height_cm:
+        return float(geometry.calibration[-1][0])
+    return geometry.height_cm
+
+
+def validate_geometry(geometry: TankGeometry) -> None:
+    """Raise ValueError when the dimensions ``geometry.shape`` needs are missing or inconsistent."""
+    shape = TankGeometry.Shape
+    if geometry.sensor_offset_cm is None or geometry.sensor_offset_cm < 0:
+        raise ValueError("sensor_offset_cm must be zero or positive")
+    if geometry.shape != shape.LOOKUP and not (geometry.diameter_cm and geometry.diameter_cm > 0):
+        raise ValueError(f"A {geometry.shape} tank needs a positive diameter_cm")
+    if geometry.shape in (shape.CYLINDER, shape.CONE_BOTTOM) and not (geometry.height_cm and geometry.height_cm > 0):
+        raise ValueError(f"A {geometry.shape} tank needs a positive height_cm")
+    if geometry.shape == shape.HORIZONTAL_CYLINDER and not (geometry.length_cm and geometry.length_cm > 0):
+        raise ValueError("A horizontal_cylinder tank needs a positive length_cm")
+    if geometry.shape == shape.CONE_BOTTOM:
+        if not (geometry.cone_height_cm and 0 < geometry.cone_height_cm <= geometry.height_cm):
+            raise ValueError("cone_height_cm must be positive and at most height_cm")
+        if not 0 <= (geometry.outlet_diameter_cm or 0) < geometry.diameter_cm:
+            raise ValueError("outlet_diameter_cm must be zero or positive and below diameter_cm")
+    if geometry.shape == shape.LOOKUP:
+        if geometry.height_cm is not None and geometry.height_cm <= 0:
+            raise ValueError("height_cm must be positive when set")
+        try:
+            table = np.asarray(geometry.calibration, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("calibration must be a list of [water_height_cm, liters] pairs") from None
+        if table.ndim != 2 or table.shape[1] != 2 or len(table) < 2:
+            raise ValueError("calibration must be a list of at least two [water_height_cm, liters] pairs")
+        if np.any(np.diff(table[:, 0]) <= 0) or np.any(np.diff(table[:, 1]) < 0) or np.any(table < 0):
+            raise ValueError("calibration heights must increase and liters must not decrease (no negatives)")
+
+
+def _volumes(geometries: Sequence[TankGeometry], heights: np.ndarray) -> np.ndarray:
+    """Liters held at each water height (cm), each row in its own geometry."""
+    shape = TankGeometry.Shape
+    shapes = np.array([geometry.shape for geometry in geometries], dtype=object)
+    liters = np.zeros(len(geometries))
+
+    def column(attribute: str, rows: np.ndarray) -> np.ndarray:
+        return np.array([getattr(geometries[i], attribute) or 0.0 for i in rows], dtype=np.float64)
+
+    rows = np.flatnonzero(shapes == shape.CYLINDER)
+    if len(rows):
+        radius = column("diameter_cm", rows) / 2
+        liters[rows] = np.pi * radius**2 * heights[rows] * LITERS_PER_CM3
+
+    rows = np.flatnonzero(shapes == shape.HORIZONTAL_CYLINDER)
+    if len(rows):
+        radius, length, h = column("diameter_cm", rows) / 2, column("length_cm", rows), heights[rows]
+        # Circular segment area below the surface, times the tank's length.
+        segment = radius**2 * np.arccos(np.clip((radius - h) / radius, -1, 1)) - (radius - h) * np.sqrt(np.maximum(2 * radius * h - h**2, 0))
+        liters[rows] = segment * length * LITERS_PER_CM3
+
+    rows = np.flatnonzero(shapes == shape.CONE_BOTTOM)
+    if len(rows):
+        radius, outlet = column("diameter_cm", rows) / 2, column("outlet_diameter_cm", rows) / 2
+        cone, h = column("cone_height_cm", rows), heights[rows]
+        in_cone = np.minimum(h, cone)
+        surface = outlet + (radius - outlet) * in_cone / cone
+        frustum = np.pi * in_cone / 3 * (outlet**2 + outlet * surface + surface**2)
+        liters[rows] = (frustum + np.pi * radius**2 * np.maximum(h - cone, 0)) * LITERS_PER_CM3
+
+    for i in np.flatnonzero(shapes == shape.LOOKUP):
+        table = np.asarray(geometries[i].calibration, dtype=np.float64)
+        liters[i] = np.interp(heights[i], table[:, 0], table[:, 1])
+    return liters
+
+
+def _usable(geometry: TankGeometry) -> bool:
+    # The admin form rejects these through TankGeometry.clean(); a row saved around them
+    # is measured as the default tank rather than failing the whole ingest batch.
+    try:
+        validate_geometry(geometry)
+    except ValueError as exc:
+        logger.warning("Ignoring invalid tank geometry of sensor %s: %s", geometry.sensor_id, exc)
+        return False
+    return True
+
+
+def measure(geometries: Sequence[TankGeometry | None], distances: Sequence[float | None]) -> list[TankLevel | None]:
+    """
+    Tank level for each (geometry, distance_cm) pair; None geometries use
+    the default tank, None distances give None. The water height is the
+    mount height (brim plus sensor offset) minus the distance, within the tank.
+    """
+    fallback = None
+    geometries = list(geometries)
+    for i, geometry in enumerate(geometries):
+        if geometry is None or not _usable(geometry):
+            geometries[i] = fallback = fallback or default_geometry()
+    if not geometries:
+        return []
+
+    tops = np.array([interior_height(geometry) for geometry in geometries], dtype=np.float64)
+    offsets = np.array([geometry.sensor_offset_cm or 0.0 for geometry in geometries], dtype=np.float64)
+    known = np.array([distance is not None for distance in distances])
+    distance = np.array([distance if distance is not None else np.nan for distance in distances], dtype=np.float64)
+    heights = np.clip(np.nan_to_num(tops + offsets - distance, nan=0.0), 0, tops)
+
+    capacities = _volumes(geometries, tops)
+    volumes = np.minimum(_volumes(geometries, heights), capacities)
+    percents = np.divide(volumes * 100, capacities, out=np.zeros_like(volumes), where=capacities > 0)
+    return [
+        TankLevel(round(float(h), 2), round(float(v), 2), round(float(p), 2), round(float(c), 2)) if ok else None
+        for ok, h, v, p, c in zip(known, heights, volumes, percents, capacities)
+    ]
+
+
+def capacity_liters(geometry: TankGeometry) -> float:
+    return round(float(_volumes([geometry], np.array([interior_height(geometry)], dtype=np.float64))[0]), 2)
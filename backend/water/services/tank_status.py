@@ -0,0 +1,29 @@
+"""
+Tank fill status from a sensor's latest reading. Water height, volume and
+percent full were measured at ingest with the sensor's TankGeometry and
+stored on SensorLatest (water/services/tank_geometry.py); this only formats them.
+"""
+from water.models import SensorLatest
+
+
+def tank_status(device_id: str, latest: SensorLatest | None) -> tuple[dict | None, str | None]:
+    """(status payload, None) for the device, or (None, reason) when there is no usable reading."""
+    if not latest:
+        return None, f"No sensor readings found for device {device_id}"
+
+    if latest.distance_cm is None:
+        return None, f"No distance_cm data available for device {device_id}"
+    if latest.volume_liters is None:
+        return None, f"Tank level not measured yet for device {device_id}; run manage.py rebuild_sensor_latest"
+
+    return {
+        "device_id": device_id,
+        "last_update": latest.recorded_at.isoformat(),
+        "water_volume_l": round(latest.volume_liters, 1),
+        "tank_capacity_l": latest.capacity_liters,
+        "percent_full": round(latest.percent_full, 1),
+        "distance_cm": round(float(latest.distance_cm), 1),
+        "water_height_cm": round(latest.water_height_cm, 1),
+        "humidity": float(latest.humidity) if latest.humidity else None,
+        "temperature_c": float(latest.temperature) if latest.temperature else None,
+    }, None
@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from water.models import (
+    ClimateSnapshot,
+    Location,
+    ProfileRisk,
+    Sensor,
+    SensorLatest,
+    SensorReading,
+    TankGeometry,
+    UserProfile,
+    WaterDemandUnit,
+    WaterStorage,
+    WaterSystem,
+)
+from water.services.dashboard_cache import dashboard_cache
+from water.services.latest import upsert_latest
+from water.services.risk_board import mark_stale
+from water.services.sensor_cache import sensor_cache
+from water.services.tank_geometry import capacity_liters
+
+
+@receiver(post_save, sender=Sensor)
+@receiver(post_delete, sender=Sensor)
+def invalidate_sensor_cache(sender, instance: Sensor, **kwargs):
+    # Drop by id too: an admin edit may have changed the device_id itself.
+    sensor_cache.invalidate(device_id=instance.device_id, sensor_id=instance.id)
+
+
+@receiver(post_save, sender=SensorReading)
+def track_latest_reading(sender, instance: SensorReading, raw: bool = False, **kwargs):
+    # Ingest upserts SensorLatest itself after bulk_create; this covers admin and one-off saves.
+    if not raw:
+        upsert_latest([instance])
+
+
+def _invalidate_dashboards(profiles) -> None:
+    # Resolve owners now, while cascaded parents still exist; drop their summaries once committed.
+    mark_stale(profiles)
+    user_ids = list(profiles.values_list("user_id", flat=True))
+    if user_ids:
+        transaction.on_commit(lambda: dashboard_cache.invalidate(user_ids))
+
+
+@receiver(post_save, sender=WaterStorage)
+@receiver(post_delete, sender=WaterStorage)
+@receiver(post_save, sender=Sensor)
+@receiver(post_delete, sender=Sensor)
+def invalidate_system_dashboard(sender, instance, **kwargs):
+    if instance.system_id:
+        _invalidate_dashboards(UserProfile.objects.filter(water_systems=instance.system_id))
+
+
+@receiver(post_save, sender=WaterSystem)
+@receiver(post_delete, sender=WaterSystem)
+@receiver(post_save, sender=WaterDemandUnit)
+@receiver(post_delete, sender=WaterDemandUnit)
+def invalidate_owner_dashboard(sender, instance, **kwargs):
+    _invalidate_dashboards(UserProfile.objects.filter(id=instance.owner_id))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_dashboard(sender, instance: UserProfile, **kwargs):
+    ProfileRisk.objects.filter(profile_id=instance.id).update(stale=True)
+    transaction.on_commit(lambda: dashboard_cache.invalidate([instance.user_id]))
+
+
+@receiver(post_save, sender=ClimateSnapshot)
+@receiver(post_delete, sender=ClimateSnapshot)
+def invalidate_climate_dashboards(sender, instance: ClimateSnapshot, **kwargs):
+    _invalidate_dashboards(UserProfile.objects.filter(location_id=instance.location_id))
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def invalidate_location_dashboards(sender, instance: Location, raw: bool = False, **kwargs):
+    # Board rows copy the region. Deleting a location nulls profiles' FK without saving them,
+    # so resolve the profiles before the delete.
+    if not raw:
+        _invalidate_dashboards(UserProfile.objects.filter(location_id=instance.id))
+
+
+@receiver(post_save, sender=TankGeometry)
+@receiver(post_delete, sender=TankGeometry)
+def remeasure_tank(sender, instance: TankGeometry, raw: bool = False, origin=None, **kwargs):
+    # A sensor being deleted takes its geometry and latest row with it: nothing to re-measure.
+    if raw or (origin is not None and getattr(origin, "model", type(origin)) is not TankGeometry):
+        return
+    # Re-measure the stored level with the new geometry (the default one once deleted); this also
+    # resyncs a linked storage, bumps the status ETags and pushes the new level to live streams.
+    latest = SensorLatest.objects.filter(sensor_id=instance.sensor_id).first()
+    if latest:
+        upsert_latest([latest.as_reading()], force=True)
+    if kwargs["signal"] is post_save and instance.storage_id:
+        storage = WaterStorage.objects.get(id=instance.storage_id)
+        capacity = Decimal(str(capacity_liters(instance)))
+        if storage.capacity_liters != capacity:
+            storage.capacity_liters = capacity
+            storage.save(update_fields=["capacity_liters", "updated_at"])
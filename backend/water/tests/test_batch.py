@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from water.models import Sensor, SensorReading, SensorRollup
+from water.services.chunks import compact_readings
+from water.services.retention import hourly_cutoff, prune_rollups
+from water.services.rollups import refresh_rollups
+
+DEVICES = ["AQUA001", "AQUA002", "AQUA003", "AQUA004", "AQUA005"]
+
+
+@override_settings(RETENTION_HOURLY_DAYS=2)
+class BatchViewTests(TestCase):
+    history_url = "/api/sensors/history/"
+    status_url = "/api/devices/status/"
+
+    def setUp(self):
+        now = timezone.now()
+        for number, device_id in enumerate(DEVICES):
+            sensor = Sensor.objects.create(device_id=device_id)
+            # Four days back, every 90 minutes, so both the compacted and the rollup-pruned past are covered.
+            for step in range(64):
+                SensorReading.objects.create(
+                    sensor=sensor, recorded_at=now - timedelta(minutes=90 * step + number), distance_cm=30.0 + number + step % 9
+                )
+        refresh_rollups()
+        compact_readings(now - timedelta(days=3))
+        prune_rollups(SensorRollup.Resolution.HOUR, hourly_cutoff())
+
+    def batch(self, path: str, devices: list[str], **params) -> dict:
+        response = self.client.get(f"{path}batch/", {"device_ids": ",".join(devices), **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_query_count_does_not_grow_with_devices(self):
+        cases = [
+            (self.history_url, {}, 2),
+            (self.history_url, {"range": "24h", "resolution": "raw"}, 3),
+            (self.history_url, {"range": "7d", "resolution": "day"}, 2),
+            # Hours older than RETENTION_HOURLY_DAYS are rebuilt from readings and chunks.
+            (self.history_url, {"range": "4d", "resolution": "hour"}, 4),
+            (self.status_url, {}, 1),
+        ]
+        for path, params, queries in cases:
+            for devices in (DEVICES[:1], DEVICES):
+                with self.subTest(path=path, params=params, devices=len(devices)), self.assertNumQueries(queries):
+                    self.batch(path, devices, **params)
+
+    def test_missing_devices_are_reported(self):
+        body = self.batch(self.history_url, ["AQUA002", "NOPE", "AQUA001"])
+
+        self.assertEqual(body["missing"], ["NOPE"])
+        self.assertEqual(sorted(body["devices"]), ["AQUA001", "AQUA002"])
+        self.assertEqual(self.batch(self.status_url, ["NOPE"]), {"devices": {}, "missing": ["NOPE"]})
+
+    def test_history_matches_the_single_device_view(self):
+        for params, key in (
+            ({"range": "24h", "resolution": "raw"}, "readings"),
+            ({"range": "4d", "resolution": "raw"}, "readings"),
+            ({"range": "4d", "resolution": "hour"}, "buckets"),
+            ({"range": "7d", "resolution": "day"}, "buckets"),
+        ):
+            body = self.batch(self.history_url, DEVICES, **params)
+            for device_id in DEVICES:
+                with self.subTest(params=params, device_id=device_id):
+                    single = self.client.get(self.history_url, {"device_id": device_id, **params}).json()
+                    self.assertEqual(body["devices"][device_id][key], single[key])
+                    self.assertTrue(single[key])
+
+    def test_newest_pages_match_the_single_device_view(self):
+        body = self.batch(self.history_url, DEVICES, page_size=7)
+
+        for device_id in DEVICES:
+            with self.subTest(device_id=device_id):
+                single = self.client.get(self.history_url, {"device_id": device_id, "page_size": 7}).json()
+                self.assertEqual(body["devices"][device_id]["readings"], single["readings"])
+
+    def test_pruned_hours_are_rebuilt(self):
+        hours = self.batch(self.history_url, DEVICES[:1], range="4d", resolution="hour")["devices"]["AQUA001"]["buckets"]
+
+        # One reading every 90 minutes fills two of every three hours, stored or not.
+        self.assertGreater(len(hours), 60)
+        self.assertLess(SensorRollup.objects.filter(sensor__device_id="AQUA001", resolution=SensorRollup.Resolution.HOUR).count(), 40)
+
+    def test_status_matches_the_single_device_view(self):
+        body = self.batch(self.status_url, DEVICES)
+
+        for device_id in DEVICES:
+            with self.subTest(device_id=device_id):
+                entry = dict(body["devices"][device_id])
+                latest = entry.pop("latest")
+                self.assertEqual(entry, self.client.get(self.status_url, {"device_id": device_id}).json())
+                self.assertEqual(latest["distance_cm"], 30.0 + DEVICES.index(device_id))
@@ -0,0 +1,99 @@
+import io
+import zlib
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from water.checks import check_backfill_window
+from water.models import ReadingChunk, Sensor, SensorReading
+from water.services.chunks import chunk_rows, compact_readings, day_bounds, encode_chunk
+
+DAY = datetime(2026, 1, 5, tzinfo=dt_timezone.utc)
+
+
+def _row(index: int, **values) -> tuple:
+    row = {
+        "id": 100 + index,
+        "recorded_at": DAY + timedelta(minutes=15 * index, microseconds=index),
+        "seq": index + 1,
+        "distance_cm": 42.125 + index / 3,
+        "water_level": Decimal("1.25"),
+        "humidity": Decimal("55.10"),
+        "temperature": Decimal("-3.05"),
+        "soil_moisture": None,
+        "motion_detected": index % 2 == 0,
+    }
+    row.update(values)
+    return tuple(row.values())
+
+
+class ChunkCodecTests(SimpleTestCase):
+    def test_round_trip_is_lossless(self):
+        rows = [_row(0), _row(1, seq=None, distance_cm=None), _row(2, humidity=None, water_level=Decimal("999999.99"))]
+        self.assertEqual(chunk_rows(encode_chunk(rows)), rows)
+
+    def test_single_row(self):
+        rows = [_row(0)]
+        self.assertEqual(chunk_rows(encode_chunk(rows)), rows)
+
+    def test_regular_sampling_compresses_well(self):
+        rows = [_row(index) for index in range(96)]
+        self.assertLess(len(encode_chunk(rows)), 20 * len(rows))
+
+    def test_unknown_encoding_is_refused(self):
+        with self.assertRaisesMessage(ValueError, "Unknown reading chunk encoding 9"):
+            chunk_rows(zlib.compress(b"\x09\x00\x00\x00\x01"))
+
+
+class CompactReadingsTests(TestCase):
+    def setUp(self):
+        self.sensor = Sensor.objects.create(device_id="AQUA001")
+
+    def _reading(self, when: datetime, seq: int, distance: float = 40.0) -> SensorReading:
+        return SensorReading.objects.create(sensor=self.sensor, recorded_at=when, seq=seq, distance_cm=distance)
+
+    def test_packs_whole_days_and_deletes_the_raw_rows(self):
+        self._reading(DAY + timedelta(hours=1), 1)
+        self._reading(DAY + timedelta(hours=2), 2)
+        kept = self._reading(DAY + timedelta(days=1, hours=1), 3)
+
+        stats = compact_readings(day_bounds((DAY + timedelta(days=1)).date())[0])
+
+        self.assertEqual((stats["chunks"], stats["readings"]), (1, 2))
+        self.assertEqual(list(SensorReading.objects.values_list("id", flat=True)), [kept.id])
+        chunk = ReadingChunk.objects.get(sensor=self.sensor)
+        self.assertEqual((chunk.day, chunk.count), (DAY.date(), 2))
+        self.assertEqual([row[2] for row in chunk_rows(bytes(chunk.data))], [1, 2])
+
+    def test_rerun_merges_into_the_existing_chunk(self):
+        before = day_bounds((DAY + timedelta(days=1)).date())[0]
+        self._reading(DAY + timedelta(hours=1), 1)
+        compact_readings(before)
+        self._reading(DAY + timedelta(hours=3), 2, distance=38.5)
+
+        compact_readings(before)
+
+        chunk = ReadingChunk.objects.get(sensor=self.sensor)
+        self.assertEqual(chunk.count, 2)
+        self.assertEqual([(row[2], row[3]) for row in chunk_rows(bytes(chunk.data))], [(1, 40.0), (2, 38.5)])
+        self.assertFalse(SensorReading.objects.exists())
+
+
+@override_settings(IOT_MAX_BACKFILL_DAYS=30)
+class BackfillWindowTests(TestCase):
+    @override_settings(CHUNK_COMPACT_AFTER_DAYS=2)
+    def test_compaction_inside_the_window_passes_the_checks(self):
+        self.assertEqual(check_backfill_window(None), [])
+
+    def test_command_accepts_a_cutoff_inside_the_window(self):
+        sensor = Sensor.objects.create(device_id="AQUA001")
+        SensorReading.objects.create(sensor=sensor, recorded_at=timezone.now() - timedelta(days=9), seq=1, distance_cm=40.0)
+
+        call_command("compact_readings", "--older-than-days", "7", stdout=io.StringIO())
+
+        self.assertEqual(ReadingChunk.objects.get(sensor=sensor).count, 1)
+        self.assertFalse(SensorReading.objects.exists())
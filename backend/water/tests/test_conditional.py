@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+
+from water.models import Sensor, SensorReading, UserProfile, WaterPlan
+
+
+class ActivePlanETagTests(TestCase):
+    url = "/api/plans/active/"
+
+    def setUp(self):
+        user = get_user_model().objects.create(username="amina")
+        self.profile = UserProfile.objects.create(user=user, user_type=UserProfile.UserType.FARMER)
+        self.plan = WaterPlan.objects.create(
+            owner=self.profile, plan_text="Ration irrigation", date_start=date(2026, 10, 1), date_end=date(2026, 10, 14)
+        )
+
+    def get(self, **headers):
+        return self.client.get(self.url, {"user_id": self.profile.user_id}, headers=headers)
+
+    def test_unchanged_plan_is_not_modified(self):
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Cache-Control"], "no-cache")
+
+        again = self.get(if_none_match=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], first["ETag"])
+        self.assertEqual(again.content, b"")
+
+    def test_edited_plan_changes_the_etag(self):
+        etag = self.get()["ETag"]
+        self.plan.plan_text = "Preserve drinking water first"
+        self.plan.save()
+
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["plan_text"], "Preserve drinking water first")
+
+    def test_replaced_plan_changes_the_etag(self):
+        etag = self.get()["ETag"]
+        WaterPlan.objects.filter(pk=self.plan.pk).update(status=WaterPlan.Status.ARCHIVED, updated_at=timezone.now())
+        WaterPlan.objects.create(owner=self.profile, plan_text="New", date_start=date(2026, 10, 15), date_end=date(2026, 10, 28))
+
+        response = self.get(if_none_match=etag)
+        self.assertEqual((response.status_code, response.json()["plan_text"]), (200, "New"))
+
+    def test_if_modified_since(self):
+        last_modified = self.get()["Last-Modified"]
+
+        self.assertEqual(self.get(if_modified_since=last_modified).status_code, 304)
+        earlier = http_date((self.plan.updated_at - timedelta(minutes=5)).timestamp())
+        self.assertEqual(self.get(if_modified_since=earlier).status_code, 200)
+
+    def test_no_active_plan(self):
+        WaterPlan.objects.update(status=WaterPlan.Status.ARCHIVED)
+        response = self.get()
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("ETag", response)
+
+
+class DeviceStatusETagTests(TestCase):
+    url = "/api/devices/status/"
+
+    def setUp(self):
+        self.sensor = Sensor.objects.create(device_id="AQUA001")
+        SensorReading.objects.create(sensor=self.sensor, distance_cm=40.0, seq=1)
+
+    def get(self, **headers):
+        return self.client.get(self.url, {"device_id": "AQUA001"}, headers=headers)
+
+    def test_new_reading_changes_the_etag(self):
+        etag = self.get()["ETag"]
+        self.assertEqual(self.get(if_none_match=etag).status_code, 304)
+
+        SensorReading.objects.create(sensor=self.sensor, distance_cm=55.0, seq=2)
+
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["distance_cm"], 55.0)
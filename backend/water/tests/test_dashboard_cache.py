@@ -0,0 +1,177 @@
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from water.models import (
+    ClimateSnapshot,
+    Location,
+    Sensor,
+    SensorReading,
+    UserProfile,
+    WaterDemandUnit,
+    WaterStorage,
+    WaterSystem,
+)
+from water.services import dashboard_cache as dashboard_cache_module
+from water.services.dashboard_cache import DashboardCache, dashboard_cache
+from water.services.events import EventHub
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "dashboard-tests"},
+    "other": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "dashboard-tests-other"},
+}
+
+
+def use_local_hub(test) -> EventHub:
+    hub = EventHub()
+    for target in ("water.services.dashboard_cache.event_hub", "water.services.latest.event_hub"):
+        patcher = mock.patch(target, hub)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    return hub
+
+
+@override_settings(CACHES=CACHES, EVENT_BUS="local")
+class GetOrBuildTests(SimpleTestCase):
+    def setUp(self):
+        self.hub = use_local_hub(self)
+        self.cache = DashboardCache()
+        self.cache.cache.clear()
+
+    def test_built_once_then_served(self):
+        build = mock.Mock(return_value={"tanks": 1})
+
+        first = self.cache.get_or_build(7, build)
+        second = self.cache.get_or_build(7, build)
+
+        self.assertEqual(first, second)
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_none_is_not_cached(self):
+        build = mock.Mock(return_value=None)
+
+        self.cache.get_or_build(7, build)
+        self.cache.get_or_build(7, build)
+
+        self.assertEqual(build.call_count, 2)
+
+    def test_concurrent_misses_build_once(self):
+        builds = []
+        callers = 8
+        barrier = threading.Barrier(callers)
+        results = [None] * callers
+
+        def build():
+            builds.append(threading.get_ident())
+            time.sleep(0.2)
+            return {"tanks": len(builds)}
+
+        def load(index: int):
+            barrier.wait()
+            results[index] = self.cache.get_or_build(7, build)
+
+        with mock.patch.object(dashboard_cache_module, "WAIT_INTERVAL", 0.01):
+            threads = [threading.Thread(target=load, args=(index,)) for index in range(callers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual({summary["tanks"] for summary, _ in results}, {1})
+        self.assertEqual(self.cache.waits, callers - 1)
+
+    def test_invalidation_during_a_build_is_never_served(self):
+        def stale_build():
+            # A reading lands while the summary is being computed from the old state.
+            self.cache.invalidate([7])
+            return {"tanks": "stale"}
+
+        summary, version = self.cache.get_or_build(7, stale_build)
+        self.assertEqual(summary, {"tanks": "stale"})  # the caller that built it still gets its result
+
+        fresh, fresh_version = self.cache.get_or_build(7, lambda: {"tanks": "fresh"})
+        self.assertEqual(fresh, {"tanks": "fresh"})
+        self.assertNotEqual(fresh_version, version)
+        self.assertEqual(self.cache.get_or_build(7, lambda: {"tanks": "again"})[0], {"tanks": "fresh"})
+
+    def test_waiter_does_not_take_a_summary_built_for_an_old_version(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_build():
+            started.set()
+            release.wait(5)
+            return {"tanks": "stale"}
+
+        builder = threading.Thread(target=self.cache.get_or_build, args=(7, slow_build))
+        with mock.patch.object(dashboard_cache_module, "WAIT_INTERVAL", 0.01):
+            builder.start()
+            started.wait(5)
+            self.cache.invalidate([7])
+            release.set()
+            builder.join(5)
+
+            summary, _ = self.cache.get_or_build(7, lambda: {"tanks": "fresh"})
+
+        self.assertEqual(summary, {"tanks": "fresh"})
+
+    def test_invalidation_reaches_other_processes(self):
+        other = DashboardCache("other")
+        other.get_or_build(7, lambda: {"tanks": 1})
+        self.cache.get_or_build(7, lambda: {"tanks": 1})
+
+        self.cache.invalidate([7])
+
+        rebuild = mock.Mock(return_value={"tanks": 2})
+        self.assertEqual(other.get_or_build(7, rebuild)[0], {"tanks": 2})
+        rebuild.assert_called_once()
+
+
+@override_settings(CACHES=CACHES, EVENT_BUS="local")
+class InvalidationPathTests(TestCase):
+    def setUp(self):
+        use_local_hub(self)
+        dashboard_cache.cache.clear()
+        self.location = Location.objects.create(name="Hargeisa", region="Woqooyi Galbeed")
+        self.user = get_user_model().objects.create(username="amina")
+        self.profile = UserProfile.objects.create(user=self.user, user_type=UserProfile.UserType.FARMER, location=self.location)
+        self.system = WaterSystem.objects.create(name="Home", system_type=WaterSystem.SystemType.FIXED_FOG_NET, owner=self.profile)
+        self.storage = WaterStorage.objects.create(system=self.system, capacity_liters=Decimal(2000))
+        self.unit = WaterDemandUnit.objects.create(
+            owner=self.profile, category=WaterDemandUnit.DemandCategory.HUMAN, name="Family", daily_need_liters=Decimal(40)
+        )
+        self.sensor = Sensor.objects.create(device_id="AQUA001", system=self.system)
+
+    def assertDropsSummary(self, change, drops: bool = True):
+        dashboard_cache.get_or_build(self.user.id, lambda: {"tanks": "before"})
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        summary, _ = dashboard_cache.get_or_build(self.user.id, lambda: {"tanks": "after"})
+        self.assertEqual(summary, {"tanks": "after" if drops else "before"})
+
+    def test_storage(self):
+        self.storage.current_volume_liters = Decimal(900)
+        self.assertDropsSummary(self.storage.save)
+        self.assertDropsSummary(self.storage.delete)
+
+    def test_demand_unit(self):
+        self.unit.daily_need_liters = Decimal(60)
+        self.assertDropsSummary(self.unit.save)
+        self.assertDropsSummary(self.unit.delete)
+
+    def test_climate_snapshot(self):
+        elsewhere = Location.objects.create(name="Burao", region="Togdheer")
+        self.assertDropsSummary(
+            lambda: ClimateSnapshot.objects.create(location=elsewhere, season=ClimateSnapshot.Season.GU, days_until_rainfall=20), drops=False
+        )
+        self.assertDropsSummary(lambda: ClimateSnapshot.objects.create(location=self.location, season=ClimateSnapshot.Season.GU, days_until_rainfall=20))
+
+    def test_new_latest_reading(self):
+        stray = Sensor.objects.create(device_id="AQUA999")
+        self.assertDropsSummary(lambda: SensorReading.objects.create(sensor=stray, distance_cm=40.0), drops=False)
+        self.assertDropsSummary(lambda: SensorReading.objects.create(sensor=self.sensor, distance_cm=40.0))
@@ -0,0 +1,60 @@
+from django.test import SimpleTestCase
+
+from water.services.dedup import DedupWindow, derive_seq
+
+
+class DedupWindowTests(SimpleTestCase):
+    def test_window_slides_per_device(self):
+        window = DedupWindow(size=3)
+        for seq in (1, 2, 3, 4):
+            window.remember(1, seq)
+
+        self.assertFalse(window.contains(1, 1))  # pushed out by 4
+        self.assertTrue(all(window.contains(1, seq) for seq in (2, 3, 4)))
+        self.assertFalse(window.contains(2, 4))
+
+    def test_least_recent_device_is_evicted(self):
+        window = DedupWindow(size=8, max_devices=2)
+        window.remember(1, 10)
+        window.remember(2, 20)
+        window.remember(1, 11)  # device 1 is now the most recent
+        window.remember(3, 30)
+
+        self.assertFalse(window.contains(2, 20))
+        self.assertTrue(window.contains(1, 10) and window.contains(3, 30))
+
+    def test_is_new_needs_a_known_device_counter(self):
+        window = DedupWindow(size=2)
+        self.assertFalse(window.is_new(1, 5))  # never checked against the database
+
+        window.remember(1, -42)  # derived keys say nothing about the counter
+        self.assertFalse(window.is_new(1, 5))
+
+        for seq in (5, 6, 7):
+            window.remember(1, seq)
+        self.assertTrue(window.is_new(1, 8))
+        # 5 has left the window, but the highest counter still rules it out without a query.
+        self.assertFalse(window.is_new(1, 5))
+        self.assertFalse(window.is_new(1, -1))
+
+    def test_clear(self):
+        window = DedupWindow()
+        window.remember(1, 1)
+        window.clear()
+
+        self.assertFalse(window.contains(1, 1) or window.is_new(1, 2))
+
+
+class DeriveSeqTests(SimpleTestCase):
+    record = {"device_id": "AQUA001", "recorded_at": "2026-10-01T06:00:00+00:00", "distance_cm": 42.5, "humidity": "61.20"}
+
+    def test_content_key(self):
+        seq = derive_seq(self.record)
+
+        self.assertLess(seq, 0)
+        self.assertEqual(derive_seq(dict(self.record)), seq)
+        self.assertNotEqual(derive_seq({**self.record, "distance_cm": 42.6}), seq)
+        self.assertNotEqual(derive_seq({**self.record, "recorded_at": "2026-10-01T06:01:00+00:00"}), seq)
+
+    def test_no_device_timestamp_no_key(self):
+        self.assertIsNone(derive_seq({**self.record, "recorded_at": None}))
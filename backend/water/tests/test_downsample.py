@@ -0,0 +1,124 @@
+import math
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+
+from water.models import Sensor, SensorReading
+from water.services.chunks import compact_readings, day_bounds
+from water.services.downsample import LTTB, METHODS, MINMAX, downsample, lttb
+from water.services.history import downsampled_series
+
+DAY = datetime(2026, 1, 5, tzinfo=dt_timezone.utc)
+
+
+def reference_lttb(x: list[float], y: list[float], threshold: int) -> list[int]:
+    """Plain LTTB as published (Steinarsson, 2013), one point at a time."""
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return list(range(size))
+    every = (size - 2) / (threshold - 2)
+    selected, a = [0], 0
+    for bucket in range(threshold - 2):
+        avg_start = math.floor((bucket + 1) * every) + 1
+        avg_end = min(math.floor((bucket + 2) * every) + 1, size)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+        best, best_area = None, -1.0
+        for index in range(math.floor(bucket * every) + 1, math.floor((bucket + 1) * every) + 1):
+            area = abs((x[a] - avg_x) * (y[index] - y[a]) - (x[a] - x[index]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = index, area
+        selected.append(best)
+        a = best
+    selected.append(size - 1)
+    return selected
+
+
+class DownsampleTests(SimpleTestCase):
+    def series(self, size: int, seed: int = 7) -> tuple[np.ndarray, np.ndarray]:
+        rng = np.random.default_rng(seed)
+        x = np.cumsum(rng.uniform(30, 90, size))
+        y = np.cumsum(rng.normal(0, 1, size)) + np.where(rng.random(size) < 0.01, 25.0, 0.0)
+        return x, y
+
+    def test_selection_is_bounded_sorted_and_keeps_both_ends(self):
+        for method in METHODS:
+            for size, points in ((1000, 3), (1000, 4), (1000, 10), (1001, 99), (5000, 500), (10, 9)):
+                with self.subTest(method=method, size=size, points=points):
+                    x, y = self.series(size)
+                    kept = downsample(x, y, points, method)
+
+                    self.assertLessEqual(len(kept), points)
+                    self.assertEqual((kept[0], kept[-1]), (0, size - 1))
+                    self.assertTrue(np.all(np.diff(kept) > 0))
+
+    def test_short_series_is_returned_whole(self):
+        x, y = self.series(20)
+        for method in METHODS:
+            with self.subTest(method=method):
+                self.assertEqual(list(downsample(x, y, 20, method)), list(range(20)))
+                self.assertEqual(list(downsample(x, y, 50, method)), list(range(20)))
+
+    def test_lttb_matches_the_reference(self):
+        for seed, size, points in ((1, 100, 10), (2, 1000, 37), (3, 2000, 500), (4, 503, 502), (5, 50, 3)):
+            with self.subTest(size=size, points=points):
+                x, y = self.series(size, seed)
+                self.assertEqual(list(lttb(x, y, points)), reference_lttb(list(x), list(y), points))
+
+    def test_minmax_keeps_every_bucket_extreme(self):
+        x, y = self.series(5000)
+        kept = downsample(x, y, 100, MINMAX)
+
+        self.assertIn(int(np.argmin(y)), kept)
+        self.assertIn(int(np.argmax(y)), kept)
+        self.assertEqual(len(kept), 100)
+
+
+class DownsampledSeriesTests(TestCase):
+    def setUp(self):
+        self.sensor = Sensor.objects.create(device_id="AQUA001")
+        rng = np.random.default_rng(3)
+        # Three days of readings every seven minutes, written newest first.
+        self.readings = [
+            SensorReading.objects.create(
+                sensor=self.sensor,
+                recorded_at=DAY + timedelta(minutes=7 * index),
+                distance_cm=float(value),
+                humidity=Decimal(f"{50 + value / 10:.2f}"),
+            )
+            for index, value in reversed(list(enumerate(np.cumsum(rng.normal(0, 2, 600)))))
+        ]
+        self.readings.reverse()
+
+    def expected(self, metric: str, points: int) -> list[int]:
+        x = [reading.recorded_at.timestamp() for reading in self.readings]
+        y = [float(getattr(reading, metric)) for reading in self.readings]
+        return [self.readings[index].id for index in reference_lttb(x, y, points)]
+
+    def test_matches_lttb_over_every_reading(self):
+        for metric in ("distance_cm", "humidity"):
+            with self.subTest(metric=metric):
+                readings, source = downsampled_series(self.sensor, DAY, DAY + timedelta(days=4), metric, 40, LTTB)
+
+                self.assertEqual(source, 600)
+                self.assertEqual([reading.id for reading in readings], self.expected(metric, 40))
+
+    def test_compacted_days_join_the_selection(self):
+        compact_readings(day_bounds((DAY + timedelta(days=1)).date())[0])
+
+        readings, source = downsampled_series(self.sensor, DAY, DAY + timedelta(days=4), "distance_cm", 40, LTTB)
+
+        self.assertEqual(source, 600)
+        self.assertEqual([reading.id for reading in readings], self.expected("distance_cm", 40))
+        self.assertEqual(readings[0].distance_cm, self.readings[0].distance_cm)
+
+    def test_readings_without_the_metric_are_skipped(self):
+        SensorReading.objects.filter(id__in=[reading.id for reading in self.readings[:100]]).update(humidity=None)
+
+        readings, source = downsampled_series(self.sensor, DAY, DAY + timedelta(days=4), "humidity", 10, MINMAX)
+
+        self.assertEqual(source, 500)
+        self.assertEqual(readings[0].id, self.readings[100].id)
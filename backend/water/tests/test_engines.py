@@ -0,0 +1,164 @@
+import random
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from water.models import ClimateSnapshot, SensorLatest, WaterDemandUnit, WaterStorage
+from water.services.availability_engine import WaterAvailabilityEngine
+from water.services.constraint_engine import NO_RAINFALL, ConstraintEngine
+from water.services.demand_engine import CATEGORIES, DemandEngine
+
+
+@dataclass
+class Profile:
+    volumes: list[str] = field(default_factory=list)
+    levels: list[str | None] = field(default_factory=list)
+    units: list[tuple[str, str, int]] = field(default_factory=list)
+    rainfall: int | None = None
+
+
+def random_profile(rng: random.Random) -> Profile:
+    def amount(top: int) -> str:
+        return f"{rng.randrange(top * 100) / 100:.2f}"
+
+    return Profile(
+        volumes=[amount(50_000) for _ in range(rng.randrange(4))],
+        levels=[rng.choice([None, amount(500)]) for _ in range(rng.randrange(3))],
+        units=[(rng.choice(CATEGORIES), amount(300), rng.randrange(1, 60)) for _ in range(rng.randrange(4))],
+        rainfall=rng.choice([None, rng.randrange(0, 60)]),
+    )
+
+
+def single(need: str, rainfall: int | None, volume: str) -> Profile:
+    return Profile(volumes=[volume], units=[("human", need, 1)], rainfall=rainfall)
+
+
+BOUNDARIES = [
+    # Days of supply ending in an exact .xx5 round half to even.
+    single("10", None, "1.25"),
+    single("10", None, "1.35"),
+    single("10", 30, "0.05"),
+    single("2", 30, "0.25"),
+    single("8", 30, "100.04"),
+    # Exactly on, and one cent under, each risk threshold.
+    single("10", None, "30"),
+    single("10", None, "29.99"),
+    single("10", None, "70"),
+    single("10", None, "69.99"),
+    single("10", 12, "50"),
+    single("10", 12, "49.99"),
+    single("10", 12, "120"),
+    single("10", 12, "119.99"),
+    single("0.03", 4, "0.12"),
+    # No demand at all.
+    Profile(volumes=["500"]),
+    Profile(volumes=["500"], rainfall=5),
+    Profile(volumes=["500"], rainfall=0),
+    Profile(units=[("crop", "0", 3)], rainfall=0),
+    Profile(),
+    # Rain due today.
+    single("10", 0, "0"),
+    single("10", 0, "5"),
+    # No climate snapshot, and only fog capture.
+    Profile(levels=["12.5", None, "0"], units=[("livestock", "1.5", 7)]),
+    single("1", None, "0"),
+]
+
+
+class BatchEngineTests(SimpleTestCase):
+    def scalar(self, profile: Profile) -> dict:
+        storages = [WaterStorage(current_volume_liters=Decimal(volume), capacity_liters=Decimal(100_000)) for volume in profile.volumes]
+        latest = {
+            index: SensorLatest(water_level=None if level is None else Decimal(level)) for index, level in enumerate(profile.levels)
+        }
+        units = [WaterDemandUnit(category=category, daily_need_liters=Decimal(need), count=count) for category, need, count in profile.units]
+        climate = None if profile.rainfall is None else ClimateSnapshot(days_until_rainfall=profile.rainfall, season="gu")
+
+        availability = WaterAvailabilityEngine().calculate(storages, latest)
+        demand = DemandEngine().daily_demand(units)
+        constraints = ConstraintEngine().evaluate(availability["available_liters"], demand["total_daily_liters"], climate)
+        return {
+            "available_liters": availability["available_liters"],
+            "fog_capture_liters": availability["fog_capture_liters"],
+            "totals": demand["totals"],
+            "total_daily_liters": demand["total_daily_liters"],
+            "days_of_supply": constraints["days_of_supply"],
+            "days_until_rainfall": constraints["days_until_rainfall"],
+            "risk_level": constraints["risk_level"],
+        }
+
+    def batch(self, profiles: list[Profile]) -> list[dict]:
+        """The batch engines fed the way ``summarize_profiles`` feeds them: float columns, owners out of order."""
+        owner_ids = list(range(len(profiles), 0, -1))
+        storages = [(owner, float(volume)) for owner, profile in zip(owner_ids, profiles) for volume in profile.volumes]
+        readings = [
+            (owner, None if level is None else float(level)) for owner, profile in zip(owner_ids, profiles) for level in profile.levels
+        ]
+        units = [(owner, *unit) for owner, profile in zip(owner_ids, profiles) for unit in profile.units]
+
+        availability = WaterAvailabilityEngine().calculate_batch(
+            owner_ids,
+            (owner for owner, _ in storages),
+            [volume for _, volume in storages],
+            (owner for owner, _ in readings),
+            [level for _, level in readings],
+        )
+        demand = DemandEngine().daily_demand_batch(
+            owner_ids,
+            (unit[0] for unit in units),
+            [unit[1] for unit in units],
+            [float(unit[2]) for unit in units],
+            (unit[3] for unit in units),
+        )
+        ordered = [profiles[owner_ids.index(owner)] for owner in availability["owner_ids"]]
+        constraints = ConstraintEngine().evaluate_batch(
+            availability["available_liters"],
+            demand["total_daily_liters"],
+            [profile.rainfall for profile in ordered],
+        )
+
+        results = [None] * len(profiles)
+        for row, owner in enumerate(availability["owner_ids"]):
+            rainfall = int(constraints["days_until_rainfall"][row])
+            results[owner_ids.index(owner)] = {
+                "available_liters": float(availability["available_liters"][row]),
+                "fog_capture_liters": float(availability["fog_capture_liters"][row]),
+                "totals": {category: float(demand["totals"][category][row]) for category in CATEGORIES},
+                "total_daily_liters": float(demand["total_daily_liters"][row]),
+                "days_of_supply": float(constraints["days_of_supply"][row]),
+                "days_until_rainfall": None if rainfall == NO_RAINFALL else rainfall,
+                "risk_level": str(constraints["risk_level"][row]),
+            }
+        return results
+
+    def assertEnginesAgree(self, profiles: list[Profile]):
+        for profile, batched in zip(profiles, self.batch(profiles)):
+            with self.subTest(profile=profile):
+                self.assertEqual(batched, self.scalar(profile))
+
+    def test_boundary_profiles(self):
+        self.assertEnginesAgree(BOUNDARIES)
+
+    def test_boundaries_land_where_the_scalar_engine_puts_them(self):
+        results = self.batch(BOUNDARIES[:4])
+
+        self.assertEqual([result["days_of_supply"] for result in results], [0.12, 0.14, 0.0, 0.12])
+        self.assertEqual(
+            [result["risk_level"] for result in self.batch(BOUNDARIES[5:9])], ["high", "critical", "moderate", "high"]
+        )
+
+    def test_random_profiles(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            self.assertEnginesAgree([random_profile(rng) for _ in range(200)])
+
+    def test_rainfall_column_as_an_array(self):
+        rainfall = np.array([NO_RAINFALL, 0, 4])
+        as_array = ConstraintEngine().evaluate_batch([30.0] * 3, [10.0] * 3, rainfall)
+        as_list = ConstraintEngine().evaluate_batch([30.0] * 3, [10.0] * 3, [None, 0, 4])
+
+        self.assertEqual(list(as_array["risk_level"]), ["high", "low", "high"])
+        self.assertEqual(list(as_array["risk_level"]), list(as_list["risk_level"]))
+        self.assertEqual(list(as_array["days_until_rainfall"]), list(as_list["days_until_rainfall"]))
@@ -0,0 +1,169 @@
+import asyncio
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from water.models import Sensor, SensorReading
+from water.services.events import EventHub, latest_from_event, reading_event
+
+
+def event(sensor_id: int, distance: float) -> dict:
+    return reading_event(sensor_id, {"reading_id": int(distance), "distance_cm": distance})
+
+
+@override_settings(EVENT_BUS="local")
+class SubscriptionTests(SimpleTestCase):
+    def setUp(self):
+        self.hub = EventHub()
+
+    def test_slow_client_gets_the_newest_event_per_sensor(self):
+        subscription = self.hub.subscribe({1, 2})
+        for distance in (40.0, 41.0, 42.0):
+            subscription.deliver(event(1, distance))
+        subscription.deliver(event(2, 50.0))
+        subscription.deliver(event(1, 43.0))
+
+        drained = subscription.drain()
+
+        self.assertEqual([(item["sensor_id"], item["distance_cm"]) for item in drained], [(2, 50.0), (1, 43.0)])
+        self.assertEqual(subscription.coalesced, 3)
+        self.assertEqual(subscription.drain(), [])
+
+    def test_wait_times_out_empty(self):
+        subscription = self.hub.subscribe({1})
+
+        self.assertEqual(subscription.wait(0.01), [])
+        subscription.deliver(event(1, 40.0))
+        self.assertEqual(len(subscription.wait(1)), 1)
+
+    def test_wait_async(self):
+        subscription = self.hub.subscribe({1})
+
+        async def scenario():
+            self.assertEqual(await subscription.wait_async(0.01), [])
+            asyncio.get_running_loop().call_later(0.01, subscription.deliver, event(1, 40.0))
+            return await subscription.wait_async(1)
+
+        self.assertEqual([item["distance_cm"] for item in asyncio.run(scenario())], [40.0])
+
+
+@override_settings(EVENT_BUS="local")
+class EventHubTests(SimpleTestCase):
+    def setUp(self):
+        self.hub = EventHub()
+
+    def test_dispatch_filters_by_sensor(self):
+        first, second = self.hub.subscribe({1}), self.hub.subscribe({2, 3})
+
+        self.hub.dispatch([event(1, 40.0), event(3, 41.0), event(4, 42.0)])
+
+        self.assertEqual([item["sensor_id"] for item in first.drain()], [1])
+        self.assertEqual([item["sensor_id"] for item in second.drain()], [3])
+
+    def test_listeners_see_every_event_and_a_failing_one_is_isolated(self):
+        seen = []
+        self.hub.add_listener(mock.Mock(side_effect=RuntimeError("boom")))
+        self.hub.add_listener(seen.extend)
+        subscription = self.hub.subscribe({1})
+
+        with self.assertLogs("water.services.events", "ERROR"):
+            self.hub.dispatch([event(1, 40.0), {"type": "other", "user_ids": [5]}])
+
+        self.assertEqual([item["type"] for item in seen], ["reading", "other"])
+        self.assertEqual(len(subscription.drain()), 1)
+
+    def test_closed_subscription_gets_nothing(self):
+        subscription = self.hub.subscribe({1})
+        subscription.close()
+
+        self.hub.dispatch([event(1, 40.0)])
+
+        self.assertEqual(subscription.drain(), [])
+        self.assertEqual(self.hub.stats(), {"backend": "local", "subscriptions": 0})
+
+    def test_publish_round_trips_through_json(self):
+        subscription = self.hub.subscribe({1})
+        moment = timezone.now().replace(microsecond=123000)  # DjangoJSONEncoder keeps milliseconds
+
+        self.hub.publish([reading_event(1, {"reading_id": 9, "recorded_at": moment, "humidity": Decimal("55.10")})])
+
+        latest = latest_from_event(subscription.drain()[0])
+        self.assertEqual((latest.sensor_id, latest.reading_id, latest.recorded_at, latest.humidity), (1, 9, moment, Decimal("55.10")))
+
+    def test_malformed_message_is_dropped(self):
+        with self.assertLogs("water.services.events", "WARNING"):
+            self.hub.dispatch_message(b"{not json")
+
+
+@override_settings(EVENT_BUS="local", LIVE_STREAM_HEARTBEAT_SECONDS=0)
+class LiveStreamViewTests(TestCase):
+    url = "/api/stream/"
+
+    def setUp(self):
+        self.hub = EventHub()
+        for target in ("water.views.live.event_hub", "water.services.latest.event_hub"):
+            patcher = mock.patch(target, self.hub)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.sensor = Sensor.objects.create(device_id="AQUA001")
+        Sensor.objects.create(device_id="AQUA002")
+
+    def store(self, sensor: Sensor, distance: float, minutes_ago: int = 0) -> SensorReading:
+        with self.captureOnCommitCallbacks(execute=True):
+            return SensorReading.objects.create(
+                sensor=sensor, recorded_at=timezone.now() - timedelta(minutes=minutes_ago), distance_cm=distance
+            )
+
+    @staticmethod
+    def events(frame: bytes) -> list[tuple[str, object]]:
+        parsed = []
+        for block in frame.decode().split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+            if "event" in lines:
+                parsed.append((lines["event"], json.loads(lines["data"])))
+        return parsed
+
+    def open(self, **params):
+        response = self.client.get(self.url, params, HTTP_ACCEPT="text/event-stream")
+        self.addCleanup(response.close)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return response, iter(response.streaming_content)
+
+    def test_snapshot_then_pushes(self):
+        self.store(self.sensor, 40.0, minutes_ago=5)
+        response, frames = self.open(device_ids="AQUA001,AQUA002,NOPE")
+
+        first = next(frames)
+        self.assertTrue(first.startswith(b"retry: 3000\n\n"))
+        snapshot = self.events(first)
+        self.assertEqual([(name, data.get("device_id")) for name, data in snapshot[:2]], [("status", "AQUA001"), ("status", "AQUA002")])
+        self.assertEqual(snapshot[0][1]["reading"]["distance_cm"], 40.0)
+        self.assertIsNone(snapshot[1][1]["reading"])
+        self.assertEqual(snapshot[2], ("missing", ["NOPE"]))
+
+        self.assertEqual(next(frames), b": ping\n\n")
+        reading = self.store(self.sensor, 35.0)
+        pushed = self.events(next(frames))
+
+        self.assertEqual([(name, data["device_id"], data["reading"]["id"]) for name, data in pushed], [("status", "AQUA001", reading.id)])
+        self.assertEqual(pushed[0][1]["reading"]["distance_cm"], 35.0)
+        self.assertIsNotNone(pushed[0][1]["status"])
+
+    def test_closing_the_response_ends_the_subscription(self):
+        response, frames = self.open(device_ids="AQUA001")
+        next(frames)
+        self.assertEqual(self.hub.stats()["subscriptions"], 1)
+
+        response.close()
+
+        self.assertEqual(self.hub.stats()["subscriptions"], 0)
+
+    def test_scope_errors(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"device_ids": "NOPE"}).status_code, 404)
+        with override_settings(LIVE_STREAM_MAX_CONNECTIONS=0):
+            self.assertEqual(self.client.get(self.url, {"device_ids": "AQUA001"}).status_code, 503)
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.test import TestCase
+
+from water.models import ReadingChunk, Sensor, SensorReading
+from water.services.chunks import compact_readings, day_bounds
+from water.services.history import decode_cursor, raw_page
+
+DAY = datetime(2026, 1, 5, tzinfo=dt_timezone.utc)
+
+
+class RawPageTests(TestCase):
+    def setUp(self):
+        self.sensor = Sensor.objects.create(device_id="AQUA001")
+        # Four days of six readings, two sharing each timestamp so the id breaks ties.
+        self.readings = [
+            SensorReading.objects.create(
+                sensor=self.sensor, recorded_at=DAY + timedelta(days=day, hours=4 * (slot // 2)), distance_cm=float(day * 10 + slot)
+            )
+            for day in range(4)
+            for slot in range(6)
+        ]
+        self.newest_first = [reading.id for reading in sorted(self.readings, key=lambda r: (r.recorded_at, r.id), reverse=True)]
+
+    def walk(self, page_size: int, start=None, end=None) -> list[int]:
+        seen, cursor = [], None
+        while True:
+            page, next_cursor = raw_page(self.sensor, start, end, cursor and decode_cursor(cursor), page_size)
+            self.assertLessEqual(len(page), page_size)
+            seen.extend(reading.id for reading in page)
+            if next_cursor is None:
+                return seen
+            cursor = next_cursor
+
+    def test_pages_walk_every_reading_once(self):
+        for page_size in (1, 5, 24, 100):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(page_size), self.newest_first)
+
+    def test_range(self):
+        start, end = DAY + timedelta(days=1), DAY + timedelta(days=2, hours=4)
+        moments = {reading.id: reading.recorded_at for reading in self.readings}
+        expected = [reading_id for reading_id in self.newest_first if start <= moments[reading_id] < end]
+
+        self.assertEqual(self.walk(3, start, end), expected)
+        self.assertEqual(len(expected), 8)
+
+    def test_pages_cross_into_compacted_days(self):
+        compact_readings(day_bounds((DAY + timedelta(days=2)).date())[0])
+        self.assertEqual(ReadingChunk.objects.count(), 2)
+        self.assertEqual(SensorReading.objects.count(), 12)
+
+        for page_size in (1, 5, 7, 100):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(page_size), self.newest_first)
+
+    def test_page_straddling_the_boundary_keeps_cold_values(self):
+        compact_readings(day_bounds((DAY + timedelta(days=2)).date())[0])
+
+        page, _ = raw_page(self.sensor, None, None, None, 15)
+
+        self.assertEqual([reading.id for reading in page], self.newest_first[:15])
+        oldest = page[-1]
+        self.assertEqual((oldest.sensor, oldest.distance_cm), (self.sensor, 13.0))
+
+    def test_range_entirely_in_the_cold_tier(self):
+        compact_readings(day_bounds((DAY + timedelta(days=3)).date())[0])
+        start, end = DAY, DAY + timedelta(days=1)
+
+        self.assertEqual(self.walk(4, start, end), self.newest_first[-6:])
+
+    def test_bad_cursor(self):
+        with self.assertRaisesMessage(ValueError, "Invalid cursor"):
+            decode_cursor("bm90LWEtY3Vyc29y")
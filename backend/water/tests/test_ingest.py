@@ -0,0 +1,203 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from water.models import ReadingChunk, ReadingSeq, Sensor, SensorLatest, SensorReading
+from water.services.chunks import compact_readings
+from water.services.deadband import deadband
+from water.services.dedup import dedup_window
+from water.services.ingest import DUPLICATE, STORED, SUPPRESSED, UNKNOWN_SENSOR, TelemetryWriter, parse_record
+from water.services.retention import prune_seq_claims
+
+
+class IngestTestCase(TestCase):
+    def setUp(self):
+        self.sensor = Sensor.objects.create(device_id="AQUA001")
+        self.writer = TelemetryWriter(auto_create=False)
+        for state in (dedup_window, deadband):
+            state.clear()
+            self.addCleanup(state.clear)
+        patcher = mock.patch.object(deadband, "enabled", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, seq: int | None, minutes_ago: int = 10, distance: float = 40.0, **fields) -> dict:
+        payload = {"device_id": "AQUA001", "distance_cm": distance, "ts": int(time.time()) - 60 * minutes_ago, **fields}
+        if seq is not None:
+            payload["seq"] = seq
+        return parse_record(payload)
+
+    def write(self, *records: dict) -> list[str]:
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.writer.write_detailed(list(records))[1]
+
+
+class SeqClaimTests(IngestTestCase):
+    def test_every_stored_reading_claims_its_seq(self):
+        self.assertEqual(self.write(self.record(1), self.record(2, minutes_ago=5)), [STORED, STORED])
+
+        self.assertEqual(sorted(ReadingSeq.objects.values_list("sensor_id", "seq")), [(self.sensor.id, 1), (self.sensor.id, 2)])
+
+    def test_resend_with_another_timestamp_is_a_duplicate(self):
+        # A partitioned table's (sensor, seq, recorded_at) index would accept this one.
+        self.write(self.record(7, minutes_ago=10))
+        dedup_window.clear()
+
+        self.assertEqual(self.write(self.record(7, minutes_ago=3)), [DUPLICATE])
+        self.assertEqual(SensorReading.objects.count(), 1)
+
+    def test_claim_outlives_the_raw_row(self):
+        self.write(self.record(7))
+        SensorReading.objects.all().delete()  # compacted or archived
+        dedup_window.clear()
+
+        self.assertEqual(self.write(self.record(7)), [DUPLICATE])
+        self.assertFalse(SensorReading.objects.exists())
+
+    def test_backfill_resent_after_compaction_is_a_duplicate(self):
+        self.write(self.record(7, minutes_ago=60 * 24 * 3))
+        compact_readings(timezone.now() - timedelta(days=1))
+        dedup_window.clear()
+
+        self.assertEqual(self.write(self.record(7, minutes_ago=60 * 24 * 3)), [DUPLICATE])
+        self.assertEqual(ReadingChunk.objects.get().count, 1)
+        self.assertFalse(SensorReading.objects.exists())
+
+    def test_claim_conflict_falls_back_to_row_by_row(self):
+        # Another writer claimed seq 7 between our duplicate check and our insert.
+        ReadingSeq.objects.create(sensor=self.sensor, seq=7, recorded_at=timezone.now())
+        with mock.patch.object(TelemetryWriter, "_drop_duplicates"):
+            outcomes = self.write(self.record(7), self.record(8, minutes_ago=5))
+
+        self.assertEqual(outcomes, [DUPLICATE, STORED])
+        self.assertEqual(list(SensorReading.objects.values_list("seq", flat=True)), [8])
+
+    def test_readings_without_seq_claim_nothing(self):
+        record = self.record(None)
+        record["recorded_at"], record["seq"] = None, None  # live reading, stamped on arrival
+
+        self.assertEqual(self.write(record, dict(record)), [STORED, STORED])
+        self.assertFalse(ReadingSeq.objects.exists())
+
+    def test_prune_forgets_only_old_claims(self):
+        now = timezone.now()
+        ReadingSeq.objects.create(sensor=self.sensor, seq=1, recorded_at=now - timedelta(days=100))
+        ReadingSeq.objects.create(sensor=self.sensor, seq=2, recorded_at=now - timedelta(days=1))
+
+        self.assertEqual(prune_seq_claims(now - timedelta(days=90), dry_run=True), 1)
+        self.assertEqual(ReadingSeq.objects.count(), 2)
+        self.assertEqual(prune_seq_claims(now - timedelta(days=90)), 1)
+        self.assertEqual(list(ReadingSeq.objects.values_list("seq", flat=True)), [2])
+
+
+class DeadbandTests(IngestTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(deadband, "enabled", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unchanged_reading_is_suppressed_but_becomes_latest(self):
+        outcomes = self.write(self.record(1, minutes_ago=10), self.record(2, minutes_ago=5, distance=40.2))
+
+        self.assertEqual(outcomes, [STORED, SUPPRESSED])
+        self.assertEqual(list(SensorReading.objects.values_list("seq", flat=True)), [1])
+        latest = SensorLatest.objects.get(sensor=self.sensor)
+        self.assertEqual((latest.distance_cm, latest.reading_id), (40.2, None))
+
+    def test_movement_and_heartbeat_are_stored(self):
+        outcomes = self.write(
+            self.record(1, minutes_ago=40),
+            self.record(2, minutes_ago=35, distance=45.0),
+            self.record(3, minutes_ago=5, distance=45.0),  # 30 minutes > the 15 minute heartbeat
+        )
+
+        self.assertEqual(outcomes, [STORED, STORED, STORED])
+
+    def test_backfilled_history_is_kept(self):
+        self.write(self.record(5, minutes_ago=5))
+
+        self.assertEqual(self.write(self.record(4, minutes_ago=60)), [STORED])
+
+    def test_suppressed_seq_is_not_claimed(self):
+        self.write(self.record(1, minutes_ago=10), self.record(2, minutes_ago=5))
+
+        self.assertEqual(list(ReadingSeq.objects.values_list("seq", flat=True)), [1])
+
+    def test_disabled_stores_everything(self):
+        with mock.patch.object(deadband, "enabled", False):
+            self.assertEqual(self.write(self.record(1, minutes_ago=10), self.record(2, minutes_ago=5)), [STORED, STORED])
+
+
+class SensorIngestViewTests(IngestTestCase):
+    url = "/api/iot/ingest/"
+
+    def post(self, **payload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                self.url, {"sensor": "AQUA001", "distance_cm": 40.0, **payload}, content_type="application/json"
+            )
+
+    def test_stored_reading(self):
+        response = self.post(seq=1)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["X-Reading-Outcome"], STORED)
+        self.assertEqual(response.json()["id"], SensorReading.objects.get().id)
+
+    def test_duplicate_keeps_the_created_shape(self):
+        first = self.post(seq=1).json()
+        response = self.post(seq=1)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["X-Reading-Outcome"], DUPLICATE)
+        self.assertEqual(set(response.json()), set(first))
+        self.assertIsNone(response.json()["id"])
+        self.assertEqual(SensorReading.objects.count(), 1)
+
+    def test_suppressed_keeps_the_created_shape(self):
+        with mock.patch.object(deadband, "enabled", True):
+            self.post(seq=1)
+            response = self.post(seq=2, distance_cm=40.1)
+
+        self.assertEqual((response.status_code, response["X-Reading-Outcome"]), (201, SUPPRESSED))
+        self.assertEqual(response.json()["distance_cm"], 40.1)
+
+    def test_unknown_sensor(self):
+        self.assertEqual(self.post(sensor="NOPE").status_code, 404)
+
+    def test_invalid_reading(self):
+        self.assertEqual(self.post(seq=-1).status_code, 400)
+
+
+class SensorBatchIngestViewTests(IngestTestCase):
+    url = "/api/iot/ingest/batch/"
+
+    def post(self, rows):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, rows, content_type="application/json")
+
+    def test_outcomes_are_counted_per_row(self):
+        reading = {"device_id": "AQUA001", "distance_cm": 40.0, "seq": 1}
+        body = self.post([reading, reading, {**reading, "device_id": "NOPE"}, "junk"]).json()
+
+        self.assertEqual((body["accepted"], body["duplicates"], body["rejected"]), (1, 1, 2))
+        self.assertEqual([result["status"] for result in body["results"]], ["accepted", "duplicate", "rejected", "rejected"])
+
+    def test_sensor_deleted_mid_request_is_rejected(self):
+        write_detailed = TelemetryWriter.write_detailed
+
+        def delete_then_write(writer, records):
+            Sensor.objects.filter(device_id="AQUA001").delete()
+            readings, outcomes = write_detailed(writer, records)
+            self.assertEqual(outcomes, [UNKNOWN_SENSOR])
+            return readings, outcomes
+
+        with mock.patch.object(TelemetryWriter, "write_detailed", autospec=True, side_effect=delete_then_write):
+            body = self.post([{"device_id": "AQUA001", "distance_cm": 40.0, "seq": 1}]).json()
+
+        self.assertEqual((body["accepted"], body["duplicates"], body["rejected"]), (0, 0, 1))
+        self.assertEqual(body["results"], [{"index": 0, "status": "rejected", "error": "Unknown sensor device_id"}])
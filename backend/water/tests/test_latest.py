@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from water.models import Sensor, SensorLatest, SensorReading
+from water.services.latest import LEVEL_FIELDS, UPSERT_CHUNK, VALUE_FIELDS, rebuild_latest, upsert_latest
+
+# Oldest SQLite builds still in use bind at most 999 parameters per statement.
+SQLITE_MAX_PARAMS = 999
+
+
+class SensorLatestTests(TestCase):
+    def setUp(self):
+        self.sensor = Sensor.objects.create(device_id="AQUA001")
+        self.now = timezone.now()
+
+    def reading(self, seq: int | None, minutes_ago: int, save: bool = True, **fields) -> SensorReading:
+        reading = SensorReading(
+            sensor=self.sensor, seq=seq, recorded_at=self.now - timedelta(minutes=minutes_ago), distance_cm=40.0, **fields
+        )
+        if save:
+            reading.save()
+        return reading
+
+    def test_upsert_keeps_the_newest_seq(self):
+        with transaction.atomic():
+            upsert_latest([self.reading(2, minutes_ago=5), self.reading(1, minutes_ago=10)])
+            upsert_latest([self.reading(0, minutes_ago=60)])  # backfill never moves it backwards
+
+        latest = SensorLatest.objects.get(sensor=self.sensor)
+        self.assertEqual(latest.seq, 2)
+        self.assertEqual(latest.as_reading().seq, 2)
+
+    def test_suppressed_reading_keeps_its_seq(self):
+        with transaction.atomic():
+            upsert_latest([self.reading(3, minutes_ago=1, save=False)])
+
+        latest = SensorLatest.objects.get(sensor=self.sensor)
+        self.assertEqual((latest.reading_id, latest.seq), (None, 3))
+
+    def test_as_reading_carries_every_value(self):
+        with transaction.atomic():
+            upsert_latest([self.reading(4, minutes_ago=1, humidity="55.10", motion_detected=True)])
+
+        latest = SensorLatest.objects.select_related("sensor").get(sensor=self.sensor)
+        reading = latest.as_reading()
+        self.assertEqual(
+            {name: getattr(reading, name) for name in VALUE_FIELDS}, {name: getattr(latest, name) for name in VALUE_FIELDS}
+        )
+        self.assertEqual((reading.id, reading.sensor), (latest.reading_id, self.sensor))
+
+    def test_rebuild_restores_seq_from_history(self):
+        self.reading(7, minutes_ago=10)
+        newest = self.reading(8, minutes_ago=2)
+        SensorLatest.objects.filter(sensor=self.sensor).update(reading=None, recorded_at=self.now, seq=99)
+
+        self.assertEqual(rebuild_latest(), 1)
+
+        latest = SensorLatest.objects.get(sensor=self.sensor)
+        self.assertEqual((latest.reading_id, latest.seq), (newest.id, 8))
+
+    def test_upsert_spans_several_statements(self):
+        sensors = Sensor.objects.bulk_create(Sensor(device_id=f"BULK{index}") for index in range(UPSERT_CHUNK + 5))
+        readings = [
+            SensorReading(sensor=sensor, seq=sensor.id, recorded_at=self.now, distance_cm=30.0) for sensor in sensors
+        ]
+
+        with transaction.atomic():
+            self.assertEqual(upsert_latest(readings), len(sensors))
+
+        self.assertEqual(SensorLatest.objects.filter(seq__isnull=False).count(), len(sensors))
+
+    def test_chunk_stays_below_the_parameter_limit(self):
+        columns = 2 + len(VALUE_FIELDS) + len(LEVEL_FIELDS) + 1  # sensor_id, reading_id, ..., updated_at
+        self.assertLessEqual(columns * UPSERT_CHUNK, SQLITE_MAX_PARAMS)
@@ -0,0 +1,68 @@
+import gzip
+import io
+import json
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import ParseError
+
+from water.parsers import GzipJSONParser, NDJSONParser
+
+
+def _context(encoding: str = "") -> dict:
+    return {"request": SimpleNamespace(META={"HTTP_CONTENT_ENCODING": encoding} if encoding else {})}
+
+
+class _CountingStream(io.BytesIO):
+    """Compressed request body that records how much of it was consumed."""
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.consumed = self.tell()
+        return data
+
+
+@override_settings(IOT_BATCH_MAX_BYTES=1024)
+class NDJSONParserTests(SimpleTestCase):
+    def parse(self, body: bytes, encoding: str = ""):
+        return NDJSONParser().parse(io.BytesIO(body), parser_context=_context(encoding))
+
+    def test_parses_one_object_per_line_skipping_blanks(self):
+        rows = self.parse(b'{"device_id": "A"}\n\n{"device_id": "B"}')
+        self.assertEqual([row["device_id"] for row in rows], ["A", "B"])
+
+    def test_gzip_body(self):
+        rows = self.parse(gzip.compress(b'{"device_id": "A"}\n{"device_id": "B"}\n'), encoding="gzip")
+        self.assertEqual(len(rows), 2)
+
+    def test_reports_the_bad_line(self):
+        with self.assertRaisesMessage(ParseError, "line 2"):
+            self.parse(b'{"device_id": "A"}\n{oops\n')
+
+    def test_body_over_the_limit_is_refused(self):
+        body = b"".join(json.dumps({"device_id": f"D{i}"}).encode() + b"\n" for i in range(200))
+        with self.assertRaisesMessage(ParseError, "exceeds 1024 bytes"):
+            self.parse(body)
+
+    def test_newline_free_gzip_bomb_stops_at_the_limit(self):
+        compressed = _CountingStream(gzip.compress(b"a" * (64 * 1024 * 1024)))
+        with self.assertRaisesMessage(ParseError, "exceeds 1024 bytes"):
+            NDJSONParser().parse(compressed, parser_context=_context("gzip"))
+        # 64 MB of inflated input compresses to ~64 KB; only a sliver of it may have been read.
+        self.assertLess(compressed.consumed, 16 * 1024)
+
+    def test_unsupported_encoding(self):
+        with self.assertRaises(Exception):
+            self.parse(b"{}", encoding="br")
+
+
+@override_settings(IOT_BATCH_MAX_BYTES=1024)
+class GzipJSONParserTests(SimpleTestCase):
+    def test_gzip_json(self):
+        body = io.BytesIO(gzip.compress(b'[{"device_id": "A"}]'))
+        self.assertEqual(GzipJSONParser().parse(body, parser_context=_context("gzip")), [{"device_id": "A"}])
+
+    def test_gzip_bomb_is_refused(self):
+        body = io.BytesIO(gzip.compress(b" " * (8 * 1024 * 1024)))
+        with self.assertRaisesMessage(ParseError, "exceeds 1024 bytes"):
+            GzipJSONParser().parse(body, parser_context=_context("gzip"))
@@ -0,0 +1,159 @@
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase
+
+from water.models import Location, UserProfile, WaterDemandUnit, WaterStorage, WaterSystem
+from water.services.demand_engine import CATEGORIES
+from water.services.projection_engine import ProjectionInputs, SupplyProjectionEngine
+from water.services.projections import fingerprint, parse_rationing, parse_run
+
+
+def inputs(**changes) -> ProjectionInputs:
+    """1000 L in store, 100 L/day of human demand, no fog and no rain expected."""
+    demand = tuple(100.0 if category == "human" else 0.0 for category in CATEGORIES)
+    defaults = ProjectionInputs(
+        available_liters=1000.0,
+        capacity_liters=2000.0,
+        fog_capture_liters=0.0,
+        demand_liters=demand,
+        rationing=(0.0,) * len(CATEGORIES),
+        days_until_rainfall=None,
+        season=None,
+    )
+    return defaults._replace(**changes)
+
+
+class SupplyProjectionEngineTests(SimpleTestCase):
+    engine = SupplyProjectionEngine()
+
+    def test_dry_season_drawdown(self):
+        result = self.engine.project(inputs(), scenarios=1000, horizon_days=30, seed=1)
+
+        self.assertEqual((result["probability_depleted_before_rain"], result["risk_level"]), (1.0, "critical"))
+        self.assertAlmostEqual(result["days_of_supply"]["p50"], 10.0, delta=0.5)
+        self.assertIsNone(result["rainfall_onset_days"]["p50"])
+        curve = result["depletion_probability"]
+        self.assertEqual(len(curve), 30)
+        self.assertEqual(curve, sorted(curve))
+        self.assertEqual((curve[4], curve[-1]), (0.0, 1.0))
+
+    def test_same_seed_same_projection(self):
+        fog = inputs(fog_capture_liters=60.0, days_until_rainfall=12, season="gu")
+
+        self.assertEqual(self.engine.project(fog, 500, 30, seed=7), self.engine.project(fog, 500, 30, seed=7))
+
+    def test_rains_before_the_tanks_run_dry(self):
+        result = self.engine.project(inputs(available_liters=5000.0, days_until_rainfall=5, season="gu"), 1000, 90, seed=1)
+
+        # Only the scenarios where the gu rains fail (10%) run dry, after about 50 days.
+        self.assertLess(result["probability_depleted_before_rain"], 0.2)
+        self.assertEqual(result["risk_level"], "moderate")
+        self.assertEqual(result["depletion_probability"][40], 0.0)
+
+    def test_no_demand_never_runs_dry(self):
+        result = self.engine.project(inputs(demand_liters=(0.0,) * len(CATEGORIES)), 200, 30)
+
+        self.assertEqual((result["probability_depleted_before_rain"], result["risk_level"]), (0.0, "low"))
+        self.assertIsNone(result["days_of_supply"]["p5"])
+
+    def test_rationing_cuts_demand(self):
+        rationed = inputs(rationing=tuple(0.5 if category == "human" else 0.0 for category in CATEGORIES))
+
+        result = self.engine.project(rationed, 1000, 30, seed=1)
+        self.assertEqual(result["daily_demand_liters"], 50.0)
+        self.assertAlmostEqual(result["days_of_supply"]["p50"], 20.0, delta=1.0)
+
+
+class ProjectionParsingTests(SimpleTestCase):
+    def test_parse_run(self):
+        self.assertEqual(parse_run("200", "30"), (200, 30))
+        for scenarios, horizon_days, message in (
+            ("many", None, "scenarios must be an integer"),
+            ("10", None, "scenarios must be between"),
+            (None, "0", "horizon_days must be between"),
+        ):
+            with self.subTest(message=message), self.assertRaisesMessage(ValueError, message):
+                parse_run(scenarios, horizon_days)
+
+    def test_parse_rationing(self):
+        self.assertEqual(parse_rationing(None), {})
+        self.assertEqual(parse_rationing("0.25"), {category: 0.25 for category in CATEGORIES})
+        self.assertEqual(parse_rationing({"crop": 0.5}), {"crop": 0.5})
+        for value, message in (({"cars": 0.5}, "must be among"), ({"crop": "half"}, "must be numbers"), (1.5, "between 0 and 1")):
+            with self.subTest(value=value), self.assertRaisesMessage(ValueError, message):
+                parse_rationing(value)
+
+    def test_fingerprint_follows_the_inputs(self):
+        self.assertEqual(fingerprint(inputs(), 100, 30), fingerprint(inputs(), 100, 30))
+        self.assertNotEqual(fingerprint(inputs(), 100, 30), fingerprint(inputs(available_liters=999.0), 100, 30))
+        self.assertNotEqual(fingerprint(inputs(), 100, 30), fingerprint(inputs(), 100, 31))
+
+
+class ProjectionViewTestCase(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        location = Location.objects.create(name="Hargeisa", region="Woqooyi Galbeed")
+        user = get_user_model().objects.create(username="amina")
+        self.profile = UserProfile.objects.create(user=user, user_type=UserProfile.UserType.FARMER, location=location)
+        system = WaterSystem.objects.create(
+            name="Net", system_type=WaterSystem.SystemType.FIXED_FOG_NET, owner=self.profile, location=location
+        )
+        WaterStorage.objects.create(system=system, capacity_liters=Decimal(2000), current_volume_liters=Decimal(1000))
+        WaterDemandUnit.objects.create(
+            owner=self.profile, category=WaterDemandUnit.DemandCategory.HUMAN, name="Family", count=5, daily_need_liters=Decimal(20)
+        )
+
+
+class SupplyProjectionViewTests(ProjectionViewTestCase):
+    url = "/api/projections/"
+
+    def get(self, params=None, **headers):
+        return self.client.get(self.url, {"user_id": self.profile.user_id, "scenarios": 200, **(params or {})}, headers=headers)
+
+    def test_projection_and_etag(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["scenarios"], body["daily_demand_liters"]), (200, 100.0))
+        self.assertEqual(body["inputs"]["available_liters"], 1000.0)
+
+        self.assertEqual(self.get(if_none_match=response["ETag"]).status_code, 304)
+        WaterDemandUnit.objects.update(count=10)
+        changed = self.get(if_none_match=response["ETag"])
+        self.assertEqual((changed.status_code, changed.json()["daily_demand_liters"]), (200, 200.0))
+
+    def test_invalid_parameters(self):
+        for params in ({"user_id": "abc"}, {"user_id": 999_999}, {"scenarios": 5}, {"horizon_days": "soon"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(params).status_code, 400)
+
+
+class WhatIfProjectionViewTests(ProjectionViewTestCase):
+    url = "/api/projections/what-if/"
+
+    def post(self, **data):
+        payload = {"user_id": self.profile.user_id, "scenarios": 200, **data}
+        return self.client.post(self.url, json.dumps(payload), content_type="application/json")
+
+    def test_rationing(self):
+        response = self.post(rationing={"human": 0.5})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["baseline"]["daily_demand_liters"], body["what_if"]["daily_demand_liters"]), (100.0, 50.0))
+        self.assertEqual(body["what_if"]["inputs"]["rationing"]["human"], 0.5)
+
+    def test_demand_units_replace_the_profile_units(self):
+        units = [{"category": "livestock", "name": "Goats", "count": 10, "daily_need_liters": "5.00"}]
+
+        body = self.post(demand_units=units).json()
+        self.assertEqual(body["what_if"]["inputs"]["demand"], {**{category: 0.0 for category in CATEGORIES}, "livestock": 50.0})
+        self.assertEqual(WaterDemandUnit.objects.count(), 1)
+
+    def test_invalid_requests(self):
+        for data in ({"rationing": 2}, {"demand_units": [{"category": "cars"}]}, {"user_id": 999_999}, {"user_id": None}):
+            with self.subTest(data=data):
+                self.assertEqual(self.post(**data).status_code, 400)
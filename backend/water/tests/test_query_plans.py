@@ -0,0 +1,21 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+
+class CheckQueryPlansTests(TestCase):
+    def test_hot_queries_use_their_indexes(self):
+        out = StringIO()
+        call_command("check_query_plans", stdout=out, stderr=StringIO())
+
+        self.assertNotIn("✗", out.getvalue())
+
+    def test_dropped_index_fails_the_check(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX climate_location_recent_idx")
+
+        with self.assertRaisesMessage(CommandError, "climate snapshot: does not use climate_location_recent_idx"):
+            call_command("check_query_plans", stdout=StringIO(), stderr=StringIO())
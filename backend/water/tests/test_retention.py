@@ -0,0 +1,102 @@
+import tempfile
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from water.checks import check_backfill_window
+from water.models import ReadingChunk, Sensor, SensorReading
+from water.services.archive import ReadingArchive
+from water.services.chunks import compact_readings, day_bounds
+from water.services.retention import prune_readings
+
+MONTH = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _row(reading_id: int, hours: int, distance: float | None = 40.0, seq: int | None = None) -> tuple:
+    return (reading_id, MONTH + timedelta(hours=hours), seq, distance, None, Decimal("55.10"), None, None, False)
+
+
+class ReadingArchiveTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.archive = ReadingArchive(directory.name)
+
+    def test_round_trip(self):
+        self.archive.write(1, MONTH, [_row(1, 1, seq=7), _row(2, 2, distance=None)])
+
+        readings = self.archive.read(1, MONTH, MONTH + timedelta(days=31))
+        self.assertEqual(
+            [(r.id, r.seq, r.distance_cm, r.humidity) for r in readings],
+            [(1, 7, 40.0, Decimal("55.10")), (2, None, None, Decimal("55.10"))],
+        )
+
+    def test_merge_keeps_one_copy_per_id_in_time_order(self):
+        self.archive.write(1, MONTH, [_row(1, 1), _row(3, 3)])
+        # A rerun re-exports row 3 and adds an earlier row that arrived late.
+        self.archive.write(1, MONTH, [_row(3, 3), _row(2, 2)])
+
+        readings = self.archive.read(1, MONTH, MONTH + timedelta(days=31))
+        self.assertEqual([reading.id for reading in readings], [1, 2, 3])
+
+    def test_read_window_and_ids(self):
+        self.archive.write(1, MONTH, [_row(1, 1), _row(2, 30), _row(3, 60)])
+
+        self.assertEqual([r.id for r in self.archive.read(1, MONTH + timedelta(hours=2), MONTH + timedelta(hours=61))], [2, 3])
+        self.assertEqual([r.id for r in self.archive.read(1, MONTH, MONTH + timedelta(days=31), ids={3})], [3])
+        self.assertEqual(self.archive.read(2, MONTH, MONTH + timedelta(days=31)), [])
+        self.assertEqual(self.archive.oldest_month(1), MONTH)
+
+
+class PruneReadingsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.archive = ReadingArchive(directory.name)
+        patcher = mock.patch("water.services.retention.reading_archive", self.archive)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sensor = Sensor.objects.create(device_id="AQUA001")
+
+    def test_archives_then_deletes_expired_rows_and_chunks(self):
+        for hours, seq in ((1, 1), (25, 2), (24 * 40, 3)):
+            SensorReading.objects.create(sensor=self.sensor, recorded_at=MONTH + timedelta(hours=hours), seq=seq, distance_cm=40.0)
+        compact_readings(day_bounds((MONTH + timedelta(days=1)).date())[0])
+
+        stats = prune_readings(MONTH + timedelta(days=20))
+
+        self.assertEqual((stats["archived"], stats["chunks"]), (2, 1))
+        self.assertFalse(ReadingChunk.objects.exists())
+        self.assertEqual(list(SensorReading.objects.values_list("seq", flat=True)), [3])
+        archived = self.archive.read(self.sensor.id, MONTH, MONTH + timedelta(days=31))
+        self.assertEqual([reading.seq for reading in archived], [1, 2])
+
+    def test_dry_run_changes_nothing(self):
+        SensorReading.objects.create(sensor=self.sensor, recorded_at=MONTH, seq=1)
+
+        stats = prune_readings(MONTH + timedelta(days=1), dry_run=True)
+
+        self.assertEqual((stats["archived"], stats["deleted"]), (1, 0))
+        self.assertEqual(SensorReading.objects.count(), 1)
+        self.assertFalse(self.archive.has_sensor(self.sensor.id))
+
+
+@override_settings(IOT_MAX_BACKFILL_DAYS=30, CHUNK_COMPACT_AFTER_DAYS=31)
+class RawRetentionWindowTests(TestCase):
+    @override_settings(RETENTION_RAW_DAYS=30)
+    def test_raw_retention_inside_the_window_is_a_startup_error(self):
+        self.assertEqual([error.id for error in check_backfill_window(None)], ["water.E002"])
+
+    @override_settings(RETENTION_RAW_DAYS=0)
+    def test_keeping_raw_readings_forever_passes(self):
+        self.assertEqual(check_backfill_window(None), [])
+
+    def test_commands_refuse_raw_days_inside_the_window(self):
+        for command in ("prune_readings", "manage_partitions"):
+            with self.subTest(command=command), self.assertRaisesMessage(CommandError, "IOT_MAX_BACKFILL_DAYS=30"):
+                call_command(command, "--raw-days", "30")
+
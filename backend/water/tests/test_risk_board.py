@@ -0,0 +1,98 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from water.models import Location, ProfileRisk, UserProfile, WaterDemandUnit, WaterStorage, WaterSystem
+from water.services.risk_board import board_page, decode_cursor, refresh_risk_board
+
+
+class RiskBoardTestCase(TestCase):
+    def setUp(self):
+        self.location = Location.objects.create(name="Hargeisa", region="Woqooyi Galbeed")
+        self.profiles = [self.profile(f"farmer{index}", liters=1000 * (index + 1)) for index in range(5)]
+        refresh_risk_board(full=True)
+
+    def profile(self, username: str, liters: int) -> UserProfile:
+        user = get_user_model().objects.create(username=username)
+        profile = UserProfile.objects.create(user=user, user_type=UserProfile.UserType.FARMER, location=self.location)
+        system = WaterSystem.objects.create(
+            name="Net", system_type=WaterSystem.SystemType.FIXED_FOG_NET, owner=profile, location=self.location
+        )
+        WaterStorage.objects.create(system=system, capacity_liters=Decimal(10000), current_volume_liters=Decimal(liters))
+        WaterDemandUnit.objects.create(
+            owner=profile, category=WaterDemandUnit.DemandCategory.HUMAN, name="Family", count=5, daily_need_liters=Decimal(20)
+        )
+        return profile
+
+
+class LocationStalenessTests(RiskBoardTestCase):
+    def test_region_edit_marks_the_location_rows_stale(self):
+        self.location.region = "Togdheer"
+        self.location.save()
+
+        self.assertEqual(ProfileRisk.objects.filter(stale=True).count(), 5)
+        refresh_risk_board()
+        self.assertEqual(set(ProfileRisk.objects.values_list("region", "stale")), {("Togdheer", False)})
+
+    def test_other_locations_are_left_alone(self):
+        other = Location.objects.create(name="Burao", region="Togdheer")
+        other.region = "Sanaag"
+        other.save()
+
+        self.assertFalse(ProfileRisk.objects.filter(stale=True).exists())
+
+    def test_deleted_location_is_cleared_from_the_board(self):
+        self.location.delete()
+
+        self.assertEqual(ProfileRisk.objects.filter(stale=True).count(), 5)
+        refresh_risk_board()
+        self.assertEqual(set(ProfileRisk.objects.values_list("location_id", "region")), {(None, "")})
+
+
+class BoardPaginationTests(RiskBoardTestCase):
+    def test_pages_walk_every_row_once_most_at_risk_first(self):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = board_page(cursor=cursor, page_size=2)
+            seen.extend(rows)
+            if cursor is None:
+                break
+
+        self.assertEqual([row.profile_id for row in seen], [profile.id for profile in self.profiles])
+        days = [row.days_of_supply for row in seen]
+        self.assertEqual(days, sorted(days))
+
+    def test_ties_are_broken_by_profile(self):
+        ProfileRisk.objects.update(days_of_supply=10.0)
+
+        first, cursor = board_page(page_size=3)
+        second, last = board_page(cursor=cursor, page_size=3)
+
+        self.assertEqual([row.profile_id for row in first + second], sorted(profile.id for profile in self.profiles))
+        self.assertIsNone(last)
+
+    def test_filters(self):
+        self.assertEqual(board_page(region="Togdheer")[0], [])
+        self.assertEqual(len(board_page(location_id=self.location.id)[0]), 5)
+
+    def test_bad_cursor(self):
+        with self.assertRaisesMessage(ValueError, "Invalid cursor"):
+            decode_cursor("not-a-cursor")
+
+
+class RegionRiskViewTests(RiskBoardTestCase):
+    url = "/api/regions/risk/"
+
+    def test_cursor_pages(self):
+        first = self.client.get(self.url, {"page_size": 3}).json()
+        second = self.client.get(self.url, {"page_size": 3, "cursor": first["next_cursor"]}).json()
+
+        self.assertEqual(len(first["results"]) + len(second["results"]), 5)
+        self.assertIsNone(second["next_cursor"])
+        self.assertEqual(first["results"][0]["region"], "Woqooyi Galbeed")
+
+    def test_invalid_parameters(self):
+        for params in ({"page_size": 0}, {"risk_level": "apocalyptic"}, {"cursor": "%%%"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from water.models import RollupWatermark, Sensor, SensorReading, SensorRollup
+from water.services.chunks import compact_readings
+from water.services.rollups import DAY, HOUR, WATERMARK, rebuild_rollups, refresh_rollups
+
+# 10:00 local time (TIME_ZONE), well outside any retention window.
+TEN = timezone.make_aware(datetime(2026, 1, 5, 10))
+
+
+class RefreshRollupsTests(TestCase):
+    def setUp(self):
+        self.sensor = Sensor.objects.create(device_id="AQUA001")
+
+    def reading(self, minutes: int, distance: float, **fields) -> SensorReading:
+        return SensorReading.objects.create(
+            sensor=self.sensor, recorded_at=TEN + timedelta(minutes=minutes), distance_cm=distance, **fields
+        )
+
+    def rollup(self, resolution: str, bucket: datetime) -> SensorRollup:
+        return SensorRollup.objects.get(sensor=self.sensor, resolution=resolution, bucket=bucket)
+
+    def snapshot(self) -> list[tuple]:
+        fields = [field.attname for field in SensorRollup._meta.concrete_fields if field.name not in ("id", "updated_at")]
+        return list(SensorRollup.objects.order_by("resolution", "bucket").values_list(*fields))
+
+    def test_hours_and_days(self):
+        self.reading(5, 40.0)
+        self.reading(35, 50.0)
+        last = self.reading(70, 60.0, humidity="55.10")
+
+        stats = refresh_rollups()
+
+        self.assertEqual((stats["readings"], stats["hours"], stats["days"], stats["watermark"]), (3, 2, 1, last.id))
+        hour = self.rollup(HOUR, TEN)
+        self.assertEqual(
+            (hour.count, hour.distance_cm_min, hour.distance_cm_max, hour.distance_cm_avg, hour.distance_cm_last),
+            (2, 40.0, 50.0, 45.0, 50.0),
+        )
+        self.assertEqual((hour.humidity_count, hour.humidity_avg), (0, None))
+        day = self.rollup(DAY, TEN.replace(hour=0))
+        self.assertEqual((day.count, day.distance_cm_avg, day.distance_cm_last, day.humidity_avg), (3, 50.0, 60.0, 55.1))
+        self.assertEqual(RollupWatermark.objects.get(name=WATERMARK).last_reading_id, last.id)
+
+    def test_backfilled_reading_recomputes_only_its_hour(self):
+        self.reading(5, 40.0)
+        self.reading(35, 50.0)
+        self.reading(70, 60.0)
+        refresh_rollups()
+        untouched = self.rollup(HOUR, TEN + timedelta(hours=1)).updated_at
+
+        # Arrives last, but was recorded first in its hour.
+        self.reading(1, 30.0)
+        stats = refresh_rollups()
+
+        self.assertEqual((stats["readings"], stats["hours"], stats["days"]), (1, 1, 1))
+        hour = self.rollup(HOUR, TEN)
+        self.assertEqual((hour.count, hour.distance_cm_min, hour.distance_cm_last), (3, 30.0, 50.0))
+        self.assertEqual(self.rollup(HOUR, TEN + timedelta(hours=1)).updated_at, untouched)
+        self.assertEqual(self.rollup(DAY, TEN.replace(hour=0)).count, 4)
+
+    def test_nothing_new_is_a_no_op(self):
+        self.reading(5, 40.0)
+        refresh_rollups()
+
+        self.assertEqual(refresh_rollups()["readings"], 0)
+        self.assertEqual(refresh_rollups(overlap=1)["readings"], 1)  # re-read below the watermark, same result
+        self.assertEqual(self.rollup(HOUR, TEN).count, 1)
+
+    def test_small_batches_match_a_rebuild(self):
+        for minutes in range(0, 60 * 30, 50):
+            self.reading(minutes, 40.0 + minutes % 7)
+
+        refresh_rollups(batch_size=3)
+        batched = self.snapshot()
+        rebuild_rollups()
+
+        self.assertEqual(self.snapshot(), batched)
+        self.assertEqual(SensorRollup.objects.filter(resolution=DAY).count(), 2)
+
+    def test_late_reading_in_a_compacted_hour_keeps_the_packed_ones(self):
+        self.reading(5, 40.0)
+        refresh_rollups()
+        compact_readings(TEN + timedelta(days=2))
+        self.assertFalse(SensorReading.objects.exists())
+
+        self.reading(20, 50.0)
+        refresh_rollups()
+
+        hour = self.rollup(HOUR, TEN)
+        self.assertEqual((hour.count, hour.distance_cm_min, hour.distance_cm_max), (2, 40.0, 50.0))
@@ -0,0 +1,42 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from water.models import Sensor
+from water.services.sensor_cache import INSERT_CHUNK, SensorCache
+
+
+class SensorCacheTests(TestCase):
+    def setUp(self):
+        self.cache = SensorCache()
+
+    def test_auto_create(self):
+        refs = self.cache.resolve_many(["AQUA001", "AQUA002"], create=True, description="Auto-created")
+
+        self.assertEqual(set(refs), {"AQUA001", "AQUA002"})
+        self.assertEqual(self.cache.stats()["created"], 2)
+        self.assertEqual(Sensor.objects.get(device_id="AQUA001").description, "Auto-created")
+        self.assertEqual(self.cache.resolve("AQUA001"), refs["AQUA001"])
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_lost_insert_race_is_not_counted(self):
+        # Another writer creates AQUA001 between this cache's lookup and its insert.
+        Sensor.objects.create(device_id="AQUA001")
+        loads = [lambda device_ids: {}, self.cache._load]
+
+        with mock.patch.object(self.cache, "_load", side_effect=lambda device_ids: loads.pop(0)(device_ids)):
+            refs = self.cache.resolve_many(["AQUA001", "AQUA002"], create=True)
+
+        self.assertEqual(set(refs), {"AQUA001", "AQUA002"})
+        self.assertEqual(self.cache.stats()["created"], 1)
+        self.assertEqual(Sensor.objects.count(), 2)
+
+    def test_insert_spans_several_statements(self):
+        device_ids = [f"BULK{index}" for index in range(INSERT_CHUNK + 5)]
+
+        self.assertEqual(len(self.cache.resolve_many(device_ids, create=True)), len(device_ids))
+        self.assertEqual(self.cache.stats()["created"], len(device_ids))
+
+    def test_unknown_without_create(self):
+        self.assertIsNone(self.cache.resolve("AQUA001"))
+        self.assertFalse(Sensor.objects.exists())
@@ -0,0 +1,146 @@
+import json
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TransactionTestCase
+
+from water.models import Sensor, SensorReading, SpoolCheckpoint
+from water.services.deadband import deadband
+from water.services.dedup import dedup_window
+from water.services.ingest import TelemetryWriter
+from water.services.ingest_workers import PartitionedIngest, orphaned_spools
+from water.services.spool import Spool, SpoolDrainer, drain_spool
+
+
+class SpoolDrainerTests(TransactionTestCase):
+    """Real commits and rollbacks: the drainer's checkpoint shares the ingest transaction."""
+
+    def setUp(self):
+        self.sensor = Sensor.objects.create(device_id="AQUA001")
+        dedup_window.clear()
+        deadband.clear()
+        self.addCleanup(dedup_window.clear)
+        self.addCleanup(deadband.clear)
+        patcher = mock.patch.object(deadband, "enabled", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.spool = Spool(directory.name)
+        self.addCleanup(self.spool.close)
+        self.drainer = SpoolDrainer(self.spool, TelemetryWriter(auto_create=False), name="test")
+        SpoolCheckpoint.objects.create(name="test")
+
+    def _records(self):
+        start = int(time.time()) - 600
+        payloads = [
+            {"device_id": "AQUA001", "distance_cm": 40.0, "seq": 1, "ts": start},
+            {"device_id": "AQUA001", "distance_cm": 40.0, "seq": 2, "ts": start + 60},
+            {"device_id": "AQUA001", "distance_cm": 55.0, "seq": 3, "ts": start + 120},
+        ]
+        return [(json.dumps(payload).encode(), time.time()) for payload in payloads]
+
+    def test_commit_stores_readings_and_moves_checkpoint(self):
+        self.drainer._commit(self._records(), 0, 123)
+
+        self.assertEqual(SensorReading.objects.filter(sensor=self.sensor).count(), 3)
+        checkpoint = SpoolCheckpoint.objects.get(name="test")
+        self.assertEqual((checkpoint.segment, checkpoint.offset), (0, 123))
+        self.assertTrue(dedup_window.contains(self.sensor.id, 3))
+
+    def test_replay_after_failed_checkpoint_stores_the_rows(self):
+        records = self._records()
+        with mock.patch.object(SpoolCheckpoint.objects, "filter", side_effect=DatabaseError("checkpoint update failed")):
+            with self.assertRaises(DatabaseError):
+                self.drainer._commit(records, 0, 123)
+
+        self.assertFalse(SensorReading.objects.exists())
+        self.assertFalse(dedup_window.contains(self.sensor.id, 1))
+        self.assertIsNone(deadband.last_seen(self.sensor.id))
+
+        with mock.patch.object(deadband, "enabled", True):
+            self.drainer._commit(records, 0, 123)
+
+        # The unchanged second reading is deadband-suppressed on the replay too; nothing is dropped as a duplicate.
+        self.assertEqual(
+            sorted(SensorReading.objects.filter(sensor=self.sensor).values_list("seq", flat=True)), [1, 3]
+        )
+        self.assertEqual(SpoolCheckpoint.objects.get(name="test").offset, 123)
+
+    def test_invalid_payloads_are_skipped(self):
+        records = [(b"not json", time.time()), *self._records()[:1]]
+        self.drainer._commit(records, 0, 10)
+
+        self.assertEqual(SensorReading.objects.count(), 1)
+        self.assertEqual(SpoolCheckpoint.objects.get(name="test").offset, 10)
+
+
+class OrphanedSpoolTests(TransactionTestCase):
+    """Spools a run with a different --workers count left behind."""
+
+    def setUp(self):
+        self.sensor = Sensor.objects.create(device_id="AQUA001")
+        dedup_window.clear()
+        self.addCleanup(dedup_window.clear)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+
+    def spool(self, path: Path, *seqs: int) -> None:
+        spool = Spool(path)
+        for seq in seqs:
+            spool.append(json.dumps({"device_id": "AQUA001", "distance_cm": 40.0 + seq, "seq": seq}).encode())
+        spool.close()
+
+    def test_orphans_depend_on_the_worker_count(self):
+        for index in range(4):
+            self.spool(self.root / f"worker-{index}")
+        (self.root / "worker-notes").mkdir()
+
+        self.assertEqual([name for _, name in orphaned_spools(self.root, 2)], ["worker-2", "worker-3"])
+        self.assertEqual(len(orphaned_spools(self.root, 1)), 4)
+        self.assertEqual(orphaned_spools(self.root, 4), [])
+
+        self.spool(self.root)
+        self.assertEqual(orphaned_spools(self.root, 4), [(self.root, "default")])
+        self.assertEqual(orphaned_spools(self.root / "missing", 2), [])
+
+    def test_drain_replays_and_removes_the_spool(self):
+        self.spool(self.root / "worker-3", 1, 2, 3)
+        SpoolCheckpoint.objects.create(name="worker-3")
+
+        self.assertTrue(drain_spool(self.root / "worker-3", "worker-3", TelemetryWriter(auto_create=False), batch_size=2))
+
+        self.assertEqual(sorted(SensorReading.objects.values_list("seq", flat=True)), [1, 2, 3])
+        self.assertFalse((self.root / "worker-3").exists())
+        self.assertFalse(SpoolCheckpoint.objects.filter(name="worker-3").exists())
+
+    def test_failed_drain_keeps_the_spool(self):
+        self.spool(self.root / "worker-3", 1)
+        writer = TelemetryWriter(auto_create=False)
+
+        with mock.patch.object(writer, "write", side_effect=DatabaseError("database is down")):
+            with self.assertLogs("water.services.spool", "ERROR"):
+                self.assertFalse(drain_spool(self.root / "worker-3", "worker-3", writer))
+
+        self.assertFalse(SensorReading.objects.exists())
+        self.assertTrue(Spool(self.root / "worker-3").segments())
+        self.assertEqual(SpoolCheckpoint.objects.get(name="worker-3").offset, 0)
+
+
+class PartitionedIngestCloseTests(SimpleTestCase):
+    def test_dead_worker_with_a_full_inbox_does_not_block(self):
+        partitions = PartitionedIngest(1, batch_size=1)
+        partitions.processes = [multiprocessing.Process(target=int)]
+        partitions.processes[0].start()
+        partitions.processes[0].join()
+        for _ in range(20):
+            partitions.inboxes[0].put_nowait(("biyokaab/AQUA001/telemetry", b"{}"))
+
+        started = time.monotonic()
+        partitions.close(timeout=5)
+        self.assertLess(time.monotonic() - started, 1)
@@ -0,0 +1,112 @@
+import math
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+
+from water.models import Sensor, SensorLatest, SensorReading, TankGeometry
+from water.services.tank_geometry import measure, validate_geometry
+
+# 100 cm tall, 1000 L: the diameter of an upright cylinder holding 10 L per cm.
+DIAMETER_1000L = 2 * math.sqrt(10_000 / math.pi)
+
+
+@override_settings(TANK_DEFAULT_HEIGHT_CM=100, TANK_DEFAULT_CAPACITY_L=200)
+class MeasureTests(TestCase):
+    def test_shapes_at_half_height(self):
+        geometries = [
+            TankGeometry(shape=TankGeometry.Shape.CYLINDER, height_cm=100, diameter_cm=DIAMETER_1000L),
+            TankGeometry(shape=TankGeometry.Shape.HORIZONTAL_CYLINDER, diameter_cm=100, length_cm=200),
+            TankGeometry(shape=TankGeometry.Shape.LOOKUP, calibration=[[0, 0], [40, 100], [100, 400]]),
+            None,
+        ]
+        levels = measure(geometries, [50.0, 50.0, 50.0, 50.0])
+
+        self.assertEqual((levels[0].volume_liters, levels[0].percent_full), (500.0, 50.0))
+        # Half the height of a horizontal cylinder is half its volume.
+        self.assertAlmostEqual(levels[1].volume_liters, levels[1].capacity_liters / 2, places=1)
+        self.assertEqual(levels[2].volume_liters, 150.0)  # interpolated between 100 L at 40 cm and 400 L at 100 cm
+        self.assertEqual((levels[3].capacity_liters, levels[3].volume_liters), (200.0, 100.0))
+
+    def test_sensor_offset_and_bounds(self):
+        geometry = TankGeometry(shape=TankGeometry.Shape.CYLINDER, height_cm=100, diameter_cm=DIAMETER_1000L, sensor_offset_cm=20)
+        over, empty, unknown = measure([geometry] * 3, [10.0, 500.0, None])
+
+        self.assertEqual((over.water_height_cm, over.percent_full), (100.0, 100.0))
+        self.assertEqual(empty.volume_liters, 0.0)
+        self.assertIsNone(unknown)
+
+    def test_invalid_geometry_is_measured_as_the_default_tank(self):
+        broken = TankGeometry(sensor_id=7, shape=TankGeometry.Shape.CYLINDER, diameter_cm=50)  # no height
+
+        with self.assertLogs("water.services.tank_geometry", "WARNING"):
+            (level,) = measure([broken], [50.0])
+        self.assertEqual(level.capacity_liters, 200.0)
+
+
+class TankGeometryValidationTests(TestCase):
+    def setUp(self):
+        self.sensor = Sensor.objects.create(device_id="AQUA001")
+
+    def test_clean(self):
+        TankGeometry(sensor=self.sensor, shape=TankGeometry.Shape.CYLINDER, height_cm=100, diameter_cm=80).clean()
+        for geometry, message in (
+            (TankGeometry(shape=TankGeometry.Shape.CYLINDER, diameter_cm=80), "needs a positive height_cm"),
+            (TankGeometry(shape=TankGeometry.Shape.HORIZONTAL_CYLINDER, diameter_cm=80), "needs a positive length_cm"),
+            (TankGeometry(shape=TankGeometry.Shape.LOOKUP, calibration=[[10, 5], [5, 10]]), "heights must increase"),
+            (
+                TankGeometry(shape=TankGeometry.Shape.CONE_BOTTOM, height_cm=100, diameter_cm=80, cone_height_cm=120),
+                "at most height_cm",
+            ),
+        ):
+            with self.subTest(message=message), self.assertRaisesMessage(ValidationError, message):
+                geometry.clean()
+
+    def test_full_clean_rejects_an_unusable_geometry(self):
+        with self.assertRaisesMessage(ValidationError, "needs a positive height_cm"):
+            TankGeometry(sensor=self.sensor, shape=TankGeometry.Shape.CYLINDER, diameter_cm=80).full_clean()
+
+        geometry = TankGeometry.objects.create(sensor=self.sensor, height_cm=100, diameter_cm=80)
+        geometry.shape = TankGeometry.Shape.HORIZONTAL_CYLINDER
+        with self.assertRaisesMessage(ValidationError, "needs a positive length_cm"):
+            geometry.full_clean()
+        geometry.length_cm = 200
+        geometry.full_clean()
+
+    def test_lookup_height_must_be_positive_when_set(self):
+        calibration = [[0, 0], [40, 100], [100, 400]]
+        validate_geometry(TankGeometry(shape=TankGeometry.Shape.LOOKUP, calibration=calibration))
+        validate_geometry(TankGeometry(shape=TankGeometry.Shape.LOOKUP, height_cm=120, calibration=calibration))
+        for height in (0, -50):
+            geometry = TankGeometry(sensor_id=self.sensor.pk, shape=TankGeometry.Shape.LOOKUP, height_cm=height, calibration=calibration)
+            with self.subTest(height=height):
+                with self.assertRaisesMessage(ValueError, "height_cm must be positive"):
+                    validate_geometry(geometry)
+                # Saved around clean(), it is measured as the default tank instead of a negative water height.
+                with self.assertLogs("water.services.tank_geometry", "WARNING"):
+                    (level,) = measure([geometry], [10.0])
+                self.assertGreaterEqual(level.water_height_cm, 0)
+
+    def test_admin_form_uses_clean(self):
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin)
+        data = {"sensor": self.sensor.pk, "shape": "cylinder", "diameter_cm": 80, "sensor_offset_cm": 0, "outlet_diameter_cm": 0, "calibration": "[]"}
+
+        response = self.client.post("/admin/water/tankgeometry/add/", data)
+        self.assertContains(response, "needs a positive height_cm")
+        self.assertFalse(TankGeometry.objects.exists())
+
+        response = self.client.post("/admin/water/tankgeometry/add/", {**data, "height_cm": 100})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(TankGeometry.objects.filter(sensor=self.sensor).exists())
+
+
+class RemeasureTests(TestCase):
+    def test_saving_a_geometry_remeasures_the_latest_reading(self):
+        sensor = Sensor.objects.create(device_id="AQUA001")
+        SensorReading.objects.create(sensor=sensor, distance_cm=50.0)
+
+        TankGeometry.objects.create(sensor=sensor, height_cm=100, diameter_cm=DIAMETER_1000L)
+
+        latest = SensorLatest.objects.get(sensor=sensor)
+        self.assertEqual((latest.capacity_liters, latest.volume_liters), (1000.0, 500.0))
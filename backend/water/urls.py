@@ -4,19 +4,37 @@ from water.views import (
     ActivePlanView,
     AIChatView,
     DashboardSummaryView,
+    DeviceStatusBatchView,
     DeviceStatusView,
     GenerateWaterPlanView,
+    IngestMetricsView,
     LatestReadingView,
+    LiveStreamView,
+    ReadingExportView,
+    RegionRiskView,
+    SensorBatchIngestView,
+    SensorHistoryBatchView,
     SensorHistoryView,
     SensorIngestView,
+    SupplyProjectionView,
+    WhatIfProjectionView,
 )
 
 urlpatterns = [
     path("iot/ingest/", SensorIngestView.as_view(), name="sensor-ingest"),
+    path("iot/ingest/batch/", SensorBatchIngestView.as_view(), name="sensor-ingest-batch"),
+    path("iot/metrics/", IngestMetricsView.as_view(), name="ingest-metrics"),
     path("dashboard/", DashboardSummaryView.as_view(), name="dashboard-summary"),
     path("sensors/history/", SensorHistoryView.as_view(), name="sensor-history"),
+    path("sensors/history/batch/", SensorHistoryBatchView.as_view(), name="sensor-history-batch"),
     path("devices/status/", DeviceStatusView.as_view(), name="device-status"),
+    path("devices/status/batch/", DeviceStatusBatchView.as_view(), name="device-status-batch"),
     path("readings/latest/", LatestReadingView.as_view(), name="latest-reading"),
+    path("readings/export/", ReadingExportView.as_view(), name="reading-export"),
+    path("stream/", LiveStreamView.as_view(), name="live-stream"),
+    path("regions/risk/", RegionRiskView.as_view(), name="region-risk"),
+    path("projections/", SupplyProjectionView.as_view(), name="supply-projection"),
+    path("projections/what-if/", WhatIfProjectionView.as_view(), name="what-if-projection"),
     path("plans/generate/", GenerateWaterPlanView.as_view(), name="generate-plan"),
     path("plans/active/", ActivePlanView.as_view(), name="active-plan"),
     path("ai/chat/", AIChatView.as_view(), name="ai-chat"),
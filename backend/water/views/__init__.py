@@ -1,8 +1,13 @@
 from .ai_chat import AIChatView
+from .batch import DeviceStatusBatchView, SensorHistoryBatchView
 from .dashboard import DashboardSummaryView
 from .device_status import DeviceStatusView, LatestReadingView
-from .ingest import SensorIngestView
+from .export import ReadingExportView
+from .ingest import IngestMetricsView, SensorBatchIngestView, SensorIngestView
+from .live import LiveStreamView
 from .plans import ActivePlanView, GenerateWaterPlanView
+from .projections import SupplyProjectionView, WhatIfProjectionView
+from .risk import RegionRiskView
 from .sensors import SensorHistoryView
 
 __all__ = [
@@ -11,8 +16,17 @@ __all__ = [
     "DeviceStatusView",
     "LatestReadingView",
     "SensorIngestView",
+    "SensorBatchIngestView",
+    "IngestMetricsView",
     "GenerateWaterPlanView",
     "ActivePlanView",
     "SensorHistoryView",
+    "ReadingExportView",
+    "DeviceStatusBatchView",
+    "SensorHistoryBatchView",
+    "LiveStreamView",
+    "RegionRiskView",
+    "SupplyProjectionView",
+    "WhatIfProjectionView",
 ]
 
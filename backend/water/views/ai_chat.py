@@ -5,9 +5,10 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from water.models import ClimateSnapshot, SensorReading, UserProfile, WaterStorage
+from water.models import SensorLatest, UserProfile, WaterStorage
 from water.services.ai_planner import AIPlannerService
 from water.services.availability_engine import WaterAvailabilityEngine
+from water.services.batch_engines import current_climate
 from water.services.demand_engine import DemandEngine
 
 logger = logging.getLogger(__name__)
@@ -94,25 +95,17 @@ class AIChatView(APIView):
         """Build context from user's water system data."""
         storages = list(WaterStorage.objects.filter(system__owner=profile))
         
-        latest_readings = {}
-        readings_qs = (
-            SensorReading.objects.filter(sensor__system__owner=profile)
-            .select_related("sensor")
-            .order_by("sensor_id", "-recorded_at")
-        )
-        for reading in readings_qs:
-            if reading.sensor_id not in latest_readings:
-                latest_readings[reading.sensor_id] = reading
+        latest_readings = {
+            latest.sensor_id: latest for latest in SensorLatest.objects.filter(sensor__system__owner=profile)
+        }
 
         availability = WaterAvailabilityEngine().calculate(storages, latest_readings)
         demand_result = DemandEngine().daily_demand(profile.demand_units.all())
 
-        climate = None
+        climate = current_climate(profile.location_id)
         climate_info = "Not available"
-        if profile.location:
-            climate = ClimateSnapshot.objects.filter(location=profile.location).first()
-            if climate:
-                climate_info = f"{climate.season} season, {climate.days_until_rainfall} days until rainfall"
+        if climate:
+            climate_info = f"{climate.season} season, {climate.days_until_rainfall} days until rainfall"
 
         total_capacity = sum(float(s.capacity_liters) for s in storages)
 
@@ -0,0 +1,139 @@
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from water.models import Sensor
+from water.serializers import SensorReadingSerializer
+from water.services.history import (
+    RAW,
+    RESOLUTIONS,
+    latest_readings_many,
+    parse_page_size,
+    parse_range,
+    pick_resolution,
+    raw_series_many,
+    rollup_series_many,
+)
+from water.services.tank_status import tank_status
+from water.views.conditional import ConditionalGetMixin
+
+
+def _select_sensors(request, queryset):
+    """
+    Sensors named by ``device_ids`` (comma separated, or repeated ``device_id``),
+    ``system_id`` or ``user_id`` (every sensor the user owns), in one query.
+    Returns (sensors, missing device ids, error response).
+    """
+    params = request.query_params
+    device_ids = [
+        device_id
+        for value in params.getlist("device_ids") + params.getlist("device_id")
+        for device_id in value.split(",")
+        if device_id
+    ]
+    system_id, user_id = params.get("system_id"), params.get("user_id")
+    if not (device_ids or system_id or user_id):
+        return None, [], Response({"detail": "device_ids, system_id or user_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(device_ids) > settings.BATCH_MAX_DEVICES:
+        return None, [], Response(
+            {"detail": f"At most {settings.BATCH_MAX_DEVICES} devices per request"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        if device_ids:
+            queryset = queryset.filter(device_id__in=device_ids)
+        if system_id:
+            queryset = queryset.filter(system_id=int(system_id))
+        if user_id:
+            queryset = queryset.filter(system__owner__user_id=int(user_id))
+    except ValueError:
+        return None, [], Response({"detail": "system_id and user_id must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+    sensors = list(queryset.order_by("device_id")[: settings.BATCH_MAX_DEVICES])
+    found = {sensor.device_id for sensor in sensors}
+    return sensors, [device_id for device_id in device_ids if device_id not in found], None
+
+
+class DeviceStatusBatchView(ConditionalGetMixin, APIView):
+    """
+    Tank status and latest raw reading for many devices in one response,
+    from a single query over Sensor joined to SensorLatest. Devices without
+    a usable reading carry a ``detail`` instead of a status.
+    """
+
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, *args, **kwargs):
+        sensors, missing, error = _select_sensors(request, Sensor.objects.select_related("latest"))
+        if error:
+            return error
+
+        stamps = [(sensor.id, getattr(sensor, "latest", None) and sensor.latest.updated_at) for sensor in sensors]
+        changed = [stamp for _, stamp in stamps if stamp]
+        not_modified = self.not_modified(request, self.validator("status-batch", stamps, missing), max(changed, default=None))
+        if not_modified:
+            return not_modified
+
+        devices = {}
+        for sensor in sensors:
+            latest = getattr(sensor, "latest", None)
+            payload, problem = tank_status(sensor.device_id, latest)
+            entry = payload or {"device_id": sensor.device_id, "detail": problem}
+            entry["latest"] = SensorReadingSerializer(latest.as_reading()).data if latest else None
+            devices[sensor.device_id] = entry
+        return Response({"devices": devices, "missing": missing})
+
+
+class SensorHistoryBatchView(APIView):
+    """
+    History for many devices in one response, with a constant number of
+    queries. Without a range each device gets its newest ``page_size`` raw
+    readings (newest first); with ``range`` or ``start``/``end`` every device
+    gets the same resolution, as in SensorHistoryView.
+    """
+
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, *args, **kwargs):
+        sensors, missing, error = _select_sensors(request, Sensor.objects.all())
+        if error:
+            return error
+
+        params = request.query_params
+        if not (params.get("range") or params.get("start")):
+            try:
+                page_size = parse_page_size(params.get("page_size"))
+            except ValueError as exc:
+                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            readings = latest_readings_many(sensors, page_size)
+            devices = {
+                sensor.device_id: {"readings": SensorReadingSerializer(readings.get(sensor.id, []), many=True).data}
+                for sensor in sensors
+            }
+            return Response({"resolution": RAW, "devices": devices, "missing": missing})
+
+        try:
+            start, end = parse_range(params.get("range"), params.get("start"), params.get("end"))
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        resolution = params.get("resolution", "auto")
+        if resolution == "auto":
+            resolution = pick_resolution(start, end)
+        elif resolution not in RESOLUTIONS:
+            return Response(
+                {"detail": f"resolution must be auto or one of {', '.join(RESOLUTIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if resolution == RAW:
+            series = raw_series_many(sensors, start, end)
+            devices = {
+                sensor.device_id: {"readings": SensorReadingSerializer(series[sensor.id], many=True).data} for sensor in sensors
+            }
+        else:
+            series = rollup_series_many(sensors, resolution, start, end)
+            devices = {sensor.device_id: {"buckets": series[sensor.id]} for sensor in sensors}
+        body = {"resolution": resolution, "start": start.isoformat(), "end": end.isoformat()}
+        return Response({**body, "devices": devices, "missing": missing})
@@ -1,16 +1,20 @@
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from water.models import ClimateSnapshot, SensorReading, UserProfile, WaterStorage
+from water.models import SensorLatest, UserProfile, WaterStorage
 from water.serializers import WaterStorageSerializer
 from water.services.availability_engine import WaterAvailabilityEngine
+from water.services.batch_engines import current_climate
 from water.services.constraint_engine import ConstraintEngine
+from water.services.dashboard_cache import dashboard_cache
 from water.services.demand_engine import DemandEngine
+from water.views.conditional import ConditionalGetMixin
 
 
-class DashboardSummaryView(APIView):
+class DashboardSummaryView(ConditionalGetMixin, APIView):
     """
-    Returns aggregated state for the dashboard.
+    Returns aggregated state for the dashboard, cached per user and
+    invalidated when its inputs change (water/services/dashboard_cache.py).
     Pulls from services only; no AI here.
     """
 
@@ -18,10 +22,26 @@ class DashboardSummaryView(APIView):
     permission_classes = []
 
     def get(self, request, *args, **kwargs):
-        user_id = request.query_params.get("user_id")
+        try:
+            user_id = int(request.query_params.get("user_id", ""))
+        except ValueError:
+            return Response({"detail": "user_id missing or not found"}, status=400)
+
+        # Served from the per-user cache; only invalidation (signals, ingest) forces a rebuild.
+        summary, version = dashboard_cache.get_or_build(user_id, lambda: self.build_summary(user_id))
+        if summary is None:
+            return Response({"detail": "user_id missing or not found"}, status=400)
+
+        not_modified = self.not_modified(request, self.validator("dashboard", user_id, version))
+        if not_modified:
+            return not_modified
+        return Response(summary)
+
+    @staticmethod
+    def build_summary(user_id: int) -> dict | None:
         profile = UserProfile.objects.filter(user_id=user_id).select_related("location").first()
         if not profile:
-            return Response({"detail": "user_id missing or not found"}, status=400)
+            return None
 
         storages = (
             WaterStorage.objects.filter(system__owner=profile)
@@ -29,22 +49,14 @@ class DashboardSummaryView(APIView):
             .prefetch_related("system__sensors")
         )
 
-        latest_readings = {}
-        readings_qs = (
-            SensorReading.objects.filter(sensor__system__owner=profile)
-            .select_related("sensor")
-            .order_by("sensor_id", "-recorded_at")
-        )
-        for reading in readings_qs:
-            if reading.sensor_id not in latest_readings:
-                latest_readings[reading.sensor_id] = reading
+        latest_readings = {
+            latest.sensor_id: latest for latest in SensorLatest.objects.filter(sensor__system__owner=profile)
+        }
 
         availability = WaterAvailabilityEngine().calculate(storages, latest_readings)
         demand_result = DemandEngine().daily_demand(profile.demand_units.all())
 
-        climate = None
-        if profile.location:
-            climate = ClimateSnapshot.objects.filter(location=profile.location).first()
+        climate = current_climate(profile.location_id)
 
         constraints = ConstraintEngine().evaluate(
             available_liters=availability["available_liters"],
@@ -52,12 +64,9 @@ class DashboardSummaryView(APIView):
             climate=climate,
         )
 
-        return Response(
-            {
-                "storages": WaterStorageSerializer(storages, many=True).data,
-                "availability": availability,
-                "demand": demand_result,
-                "constraints": constraints,
-            }
-        )
-
+        return {
+            "storages": WaterStorageSerializer(storages, many=True).data,
+            "availability": availability,
+            "demand": demand_result,
+            "constraints": constraints,
+        }
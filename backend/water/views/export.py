@@ -0,0 +1,51 @@
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from water.services.export import CONTENT_TYPES, CSV, FORMATS, export_rows, export_sensors, stream_export
+from water.services.history import parse_moment
+
+
+class ReadingExportView(APIView):
+    """
+    Stream the full reading history of one device (``device_id``), water
+    system (``system_id``) or region (``region``) as CSV or NDJSON
+    (``output``; DRF reserves ``format``), optionally limited by ``start``/``end`` and gzipped on the
+    fly (``gzip=1``). Memory use does not grow with the number of rows.
+    """
+
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        device_id, system_id, region = params.get("device_id"), params.get("system_id"), params.get("region")
+        if not (device_id or system_id or region):
+            return Response({"detail": "device_id, system_id or region is required"}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = params.get("output", CSV)
+        if fmt not in FORMATS:
+            return Response({"detail": f"output must be one of {', '.join(FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start = parse_moment(params["start"]) if params.get("start") else None
+            end = parse_moment(params["end"]) if params.get("end") else None
+            system_id = int(system_id) if system_id else None
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        sensors = list(export_sensors(device_id, system_id, region).values_list("id", "device_id"))
+        if not sensors:
+            return Response({"detail": "No sensors match the export scope"}, status=status.HTTP_404_NOT_FOUND)
+
+        gzip = params.get("gzip") in ("1", "true", "yes")
+        scope = device_id or (f"system-{system_id}" if system_id else region)
+        filename = f"readings-{scope}-{timezone.now():%Y%m%d}.{fmt}" + (".gz" if gzip else "")
+        response = StreamingHttpResponse(
+            stream_export(export_rows(sensors, start, end), fmt, gzip),
+            content_type="application/gzip" if gzip else CONTENT_TYPES[fmt],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        # Keep proxies from buffering the whole export before passing it on.
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -1,9 +1,27 @@
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from water.models import Sensor
+from water.models import SensorReading
+from water.parsers import GzipJSONParser, NDJSONParser
 from water.serializers import SensorReadingSerializer
+from water.services.dedup import derive_seq
+from water.services.ingest import SUPPRESSED, UNKNOWN_SENSOR, TelemetryError, TelemetryWriter, parse_record
+from water.services.metrics import metrics
+from water.services.sensor_cache import sensor_cache
+
+READING_FIELDS = (
+    "recorded_at",
+    "seq",
+    "distance_cm",
+    "water_level",
+    "humidity",
+    "temperature",
+    "soil_moisture",
+    "motion_detected",
+)
 
 
 class SensorIngestView(APIView):
@@ -17,14 +35,124 @@ class SensorIngestView(APIView):
 
     def post(self, request, *args, **kwargs):
         device_id = request.data.get("sensor")
-        try:
-            Sensor.objects.get(device_id=device_id)
-        except Sensor.DoesNotExist:
+        if not device_id or sensor_cache.resolve(str(device_id)) is None:
             return Response({"detail": "Unknown sensor device_id"}, status=status.HTTP_404_NOT_FOUND)
 
         serializer = SensorReadingSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        data = serializer.validated_data
+        record = {field: data.get(field) for field in READING_FIELDS}
+        record["device_id"] = data["sensor"].device_id
+        record["motion_detected"] = data.get("motion_detected", False)
+        if record["seq"] is None:
+            record["seq"] = derive_seq(record)
+
+        # Same write path as MQTT/batch ingest, so dedup and deadband apply here too.
+        readings, outcomes = TelemetryWriter(auto_create=False, source="HTTP").write_detailed([record])
+        # A duplicate or deadband-suppressed reading keeps the 201 body (without an id);
+        # only the X-Reading-Outcome header tells it apart from a stored one.
+        reading = readings[0] or SensorReading(
+            sensor_id=data["sensor"].id,
+            **{field: record[field] for field in READING_FIELDS},
+        )
+        reading.recorded_at = reading.recorded_at or timezone.now()
+        reading.sensor = data["sensor"]
+        return Response(
+            SensorReadingSerializer(reading).data,
+            status=status.HTTP_201_CREATED,
+            headers={"X-Reading-Outcome": outcomes[0]},
+        )
+
+
+class SensorBatchIngestView(APIView):
+    """
+    Bulk ingestion for gateways: a JSON array (or ``{"readings": [...]}``) or
+    NDJSON body, optionally gzip-compressed, with readings from many devices.
+    Rows are validated in one pass, sensors resolved with at most one query
+    and accepted rows inserted with a single bulk_create.
+    """
+
+    authentication_classes = []
+    permission_classes = []
+    parser_classes = [GzipJSONParser, NDJSONParser]
+
+    def post(self, request, *args, **kwargs):
+        rows = request.data
+        if isinstance(rows, dict):
+            rows = rows.get("readings")
+        if not isinstance(rows, list):
+            return Response(
+                {"detail": "Expected a JSON array of readings or NDJSON"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(rows) > settings.IOT_BATCH_MAX_ROWS:
+            return Response(
+                {"detail": f"At most {settings.IOT_BATCH_MAX_ROWS} readings per request"},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        results: list[dict] = []
+        parsed: list[tuple[int, dict]] = []
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                results.append({"index": index, "status": "rejected", "error": "Row must be a JSON object"})
+                continue
+            if "device_id" not in row and "sensor" in row:
+                row = {**row, "device_id": row["sensor"]}
+            try:
+                parsed.append((index, parse_record(row)))
+            except TelemetryError as exc:
+                results.append({"index": index, "status": "rejected", "error": str(exc)})
+
+        writer = TelemetryWriter(auto_create=False, source="HTTP")
+        refs = writer.resolve_sensors(record["device_id"] for _, record in parsed)
+        accepted: list[tuple[int, dict]] = []
+        for index, record in parsed:
+            if record["device_id"] in refs:
+                accepted.append((index, record))
+            else:
+                results.append({"index": index, "status": "rejected", "error": "Unknown sensor device_id"})
+
+        readings, outcomes = writer.write_detailed([record for _, record in accepted])
+        written = duplicates = suppressed = 0
+        rejected = len(rows) - len(accepted)
+        for (index, _), reading, outcome in zip(accepted, readings, outcomes):
+            if reading is not None:
+                written += 1
+                results.append({"index": index, "status": "accepted", "id": reading.id})
+            elif outcome == SUPPRESSED:
+                # Within the sensor's deadband: acknowledged, nothing new to store.
+                suppressed += 1
+                results.append({"index": index, "status": "suppressed"})
+            elif outcome == UNKNOWN_SENSOR:
+                # The sensor was deleted after it was resolved above.
+                rejected += 1
+                results.append({"index": index, "status": "rejected", "error": "Unknown sensor device_id"})
+            else:
+                duplicates += 1
+                results.append({"index": index, "status": "duplicate"})
+
+        metrics.incr("ingest.http_batch_rows", len(rows))
+        metrics.incr("ingest.written", written)
+        metrics.incr("ingest.rejected", rejected)
+        results.sort(key=lambda result: result["index"])
+        return Response(
+            {
+                "accepted": written,
+                "suppressed": suppressed,
+                "duplicates": duplicates,
+                "rejected": rejected,
+                "results": results,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class IngestMetricsView(APIView):
+    """Ingest counters and sensor-cache hit/miss stats for this process."""
+
+    authentication_classes = []
+    permission_classes = []
 
+    def get(self, request, *args, **kwargs):
+        return Response({**metrics.snapshot(), "sensor_cache": sensor_cache.stats()})
 
@@ -0,0 +1,122 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from water.models import Sensor, SensorLatest
+from water.services.events import event_hub, latest_from_event
+from water.services.latest import VALUE_FIELDS
+from water.services.tank_status import tank_status
+from water.views.batch import _select_sensors
+
+# Client reconnect delay sent in the stream's ``retry:`` field.
+RETRY_MS = 3000
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets clients send ``Accept: text/event-stream``; only error bodies are rendered through it."""
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+def _status_frame(device_id: str, latest: SensorLatest | None) -> str:
+    payload, problem = tank_status(device_id, latest)
+    reading = {"id": latest.reading_id, **{name: getattr(latest, name) for name in VALUE_FIELDS}} if latest else None
+    data = {"device_id": device_id, "status": payload, "detail": problem, "reading": reading}
+    return f"event: status\ndata: {json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))}\n\n"
+
+
+class _LiveStream:
+    """
+    Frames for one connection: the snapshot, then a status frame per changed
+    device, with a comment heartbeat while idle. Pending events coalesce in
+    the subscription while the client is slow to read, so it only ever
+    receives each device's newest state. Needs no database access.
+    """
+
+    def __init__(self, subscription, devices: dict[int, str], snapshot: list[str]):
+        self.subscription = subscription
+        self.devices = devices
+        self.snapshot = snapshot
+        self.deadline = time.monotonic() + settings.LIVE_STREAM_MAX_SECONDS
+
+    def _encode(self, events: list[dict]) -> str:
+        if not events:
+            return ": ping\n\n"
+        return "".join(_status_frame(self.devices[event["sensor_id"]], latest_from_event(event)) for event in events)
+
+    def frames(self):
+        try:
+            yield f"retry: {RETRY_MS}\n\n" + "".join(self.snapshot)
+            while time.monotonic() < self.deadline:
+                yield self._encode(self.subscription.wait(settings.LIVE_STREAM_HEARTBEAT_SECONDS))
+        finally:
+            self.subscription.close()
+
+    async def async_frames(self):
+        try:
+            yield f"retry: {RETRY_MS}\n\n" + "".join(self.snapshot)
+            while time.monotonic() < self.deadline:
+                yield self._encode(await self.subscription.wait_async(settings.LIVE_STREAM_HEARTBEAT_SECONDS))
+        finally:
+            self.subscription.close()
+
+
+class LiveStreamView(APIView):
+    """
+    Server-Sent Events stream of tank status for the devices named by
+    ``device_ids`` / ``device_id``, ``system_id`` or ``user_id``. Starts with
+    a ``status`` event per device from SensorLatest, then pushes one whenever
+    ingest stores a newer reading for it, via the live event bus. Under ASGI
+    a connection costs no worker thread; under WSGI it holds one, so
+    connections are capped per process and closed after
+    LIVE_STREAM_MAX_SECONDS (EventSource reconnects on its own).
+    """
+
+    authentication_classes = []
+    permission_classes = []
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    def get(self, request, *args, **kwargs):
+        sensors, missing, error = _select_sensors(request, Sensor.objects.all())
+        if error:
+            return error
+        if not sensors:
+            return Response({"detail": "No sensors match the stream scope"}, status=status.HTTP_404_NOT_FOUND)
+        if event_hub.stats()["subscriptions"] >= settings.LIVE_STREAM_MAX_CONNECTIONS:
+            return Response(
+                {"detail": "Too many live connections; poll /api/devices/status/batch/ instead"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(RETRY_MS // 1000)},
+            )
+
+        devices = {sensor.id: sensor.device_id for sensor in sensors}
+        # Subscribe before reading the snapshot so no reading stored in between is missed.
+        subscription = event_hub.subscribe(set(devices))
+        try:
+            latest = SensorLatest.objects.in_bulk(list(devices))
+        except Exception:
+            subscription.close()
+            raise
+        snapshot = [_status_frame(device_id, latest.get(sensor_id)) for sensor_id, device_id in devices.items()]
+        if missing:
+            snapshot.append(f"event: missing\ndata: {json.dumps(missing)}\n\n")
+
+        stream = _LiveStream(subscription, devices, snapshot)
+        frames = stream.async_frames() if isinstance(request._request, ASGIRequest) else stream.frames()
+        response = StreamingHttpResponse(frames, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
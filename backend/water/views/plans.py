@@ -3,14 +3,17 @@ import os
 
 from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from water.models import ClimateSnapshot, UserProfile, WaterPlan, WaterStorage, WaterSystem
+from water.models import UserProfile, WaterPlan, WaterStorage, WaterSystem
 from water.serializers import WaterPlanSerializer
 from water.services.ai_planner import AIPlannerService
+from water.services.batch_engines import current_climate
 from water.services.demand_engine import DemandEngine
+from water.views.conditional import ConditionalGetMixin
 
 logger = logging.getLogger(__name__)
 
@@ -34,9 +37,7 @@ class GenerateWaterPlanView(APIView):
         systems = list(WaterSystem.objects.filter(owner=profile))
         storages = list(WaterStorage.objects.filter(system__owner=profile))
         demand_units = list(profile.demand_units.all())
-        climate = None
-        if profile.location:
-            climate = ClimateSnapshot.objects.filter(location=profile.location).first()
+        climate = current_climate(profile.location_id)
 
         demand = DemandEngine().daily_demand(demand_units)
         priority_rules = {
@@ -56,14 +57,14 @@ class GenerateWaterPlanView(APIView):
 
         with transaction.atomic():
             WaterPlan.objects.filter(owner=profile, status=WaterPlan.Status.ACTIVE).update(
-                status=WaterPlan.Status.ARCHIVED
+                status=WaterPlan.Status.ARCHIVED, updated_at=timezone.now()
             )
             plan = planner.store_plan(profile, systems[0] if systems else None, plan_text, priority_rules, horizon_days)
 
         return Response(WaterPlanSerializer(plan).data, status=status.HTTP_201_CREATED)
 
 
-class ActivePlanView(APIView):
+class ActivePlanView(ConditionalGetMixin, APIView):
     authentication_classes = []
     permission_classes = []
 
@@ -73,9 +74,23 @@ class ActivePlanView(APIView):
         if not profile:
             return Response({"detail": "user_id missing or not found"}, status=400)
 
-        plan = profile.water_plans.filter(status=WaterPlan.Status.ACTIVE).first()
+        active = self.active_plans(profile)
+        # A new plan archives the old one and edits bump updated_at, so id and updated_at identify the response.
+        stamp = active.values_list("id", "updated_at").first()
+        if not stamp:
+            return Response({"detail": "No active plan"}, status=404)
+        not_modified = self.not_modified(request, self.validator("plan", *stamp), stamp[1])
+        if not_modified:
+            return not_modified
+
+        plan = active.first()
         if not plan:
             return Response({"detail": "No active plan"}, status=404)
 
         return Response(WaterPlanSerializer(plan).data)
 
+    @staticmethod
+    def active_plans(profile: UserProfile):
+        """The profile's active plans, newest first."""
+        return profile.water_plans.filter(status=WaterPlan.Status.ACTIVE)
+
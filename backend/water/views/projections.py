@@ -0,0 +1,77 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from water.models import WaterDemandUnit
+from water.serializers import WaterDemandUnitSerializer
+from water.services.projections import load_inputs, parse_rationing, parse_run, project, with_changes
+from water.views.conditional import ConditionalGetMixin
+
+
+class SupplyProjectionView(ConditionalGetMixin, APIView):
+    """
+    Monte Carlo projection of a profile's water supply: the probability of
+    running dry before the rains, day by day, with percentiles of days of
+    supply and rainfall onset. Optional ``scenarios`` and ``horizon_days``.
+    Cached per input fingerprint, which is also the ETag.
+    """
+
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, *args, **kwargs):
+        try:
+            user_id = int(request.query_params.get("user_id", ""))
+        except ValueError:
+            return Response({"detail": "user_id missing or not found"}, status=400)
+        try:
+            scenarios, horizon_days = parse_run(request.query_params.get("scenarios"), request.query_params.get("horizon_days"))
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        inputs = load_inputs(user_id)
+        if inputs is None:
+            return Response({"detail": "user_id missing or not found"}, status=400)
+        result, fingerprint = project(inputs, scenarios, horizon_days)
+
+        not_modified = self.not_modified(request, self.validator("projection", fingerprint))
+        if not_modified:
+            return not_modified
+        return Response(result)
+
+
+class WhatIfProjectionView(APIView):
+    """
+    Projects a profile's supply under changed demand: ``demand_units``
+    (objects like the profile's demand units) replace its own units and
+    ``rationing`` cuts needs, as one fraction for every category or per
+    category, e.g. {"crop": 0.5}. Returns the baseline and what-if projections.
+    """
+
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request, *args, **kwargs):
+        try:
+            user_id = int(request.data.get("user_id", ""))
+        except (TypeError, ValueError):
+            return Response({"detail": "user_id missing or not found"}, status=400)
+        try:
+            scenarios, horizon_days = parse_run(request.data.get("scenarios"), request.data.get("horizon_days"))
+            rationing = parse_rationing(request.data.get("rationing"))
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        demand_units = None
+        if request.data.get("demand_units") is not None:
+            serializer = WaterDemandUnitSerializer(data=request.data["demand_units"], many=True)
+            if not serializer.is_valid():
+                return Response({"demand_units": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+            demand_units = [WaterDemandUnit(**unit) for unit in serializer.validated_data]
+
+        inputs = load_inputs(user_id)
+        if inputs is None:
+            return Response({"detail": "user_id missing or not found"}, status=400)
+        baseline, _ = project(inputs, scenarios, horizon_days)
+        what_if, _ = project(with_changes(inputs, demand_units, rationing), scenarios, horizon_days)
+        return Response({"baseline": baseline, "what_if": what_if})
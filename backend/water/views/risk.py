@@ -0,0 +1,65 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from water.models import ProfileRisk
+from water.services.risk_board import board_page, parse_page_size
+
+
+class RegionRiskView(APIView):
+    """
+    Drought-risk board across profiles, read from the materialized
+    ProfileRisk table (kept current by ``manage.py refresh_risk_board``).
+    Filter by ``region``, ``location_id`` and ``risk_level`` (comma
+    separated); rows come most at risk first, ``page_size`` at a time, with
+    ``next_cursor`` for the next page.
+    """
+
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        risk_levels = [level for level in params.get("risk_level", "").split(",") if level]
+        unknown = set(risk_levels) - set(ProfileRisk.RiskLevel.values)
+        if unknown:
+            return Response(
+                {"detail": f"risk_level must be among {', '.join(ProfileRisk.RiskLevel.values)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            location_id = int(params["location_id"]) if params.get("location_id") else None
+            page_size = parse_page_size(params.get("page_size"))
+            rows, next_cursor = board_page(
+                region=params.get("region"),
+                location_id=location_id,
+                risk_levels=risk_levels,
+                cursor=params.get("cursor"),
+                page_size=page_size,
+            )
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = [
+            {
+                "profile_id": row.profile_id,
+                "user_id": row.profile.user_id,
+                "location_id": row.location_id,
+                "region": row.region,
+                "risk_level": row.risk_level,
+                "days_of_supply": row.days_of_supply,
+                "days_until_rainfall": row.days_until_rainfall,
+                "season": row.season or None,
+                "available_liters": row.available_liters,
+                "fog_capture_liters": row.fog_capture_liters,
+                "demand": {
+                    "human": row.human_liters,
+                    "livestock": row.livestock_liters,
+                    "crop": row.crop_liters,
+                    "total_daily_liters": row.total_daily_liters,
+                },
+                "refreshed_at": row.refreshed_at.isoformat(),
+            }
+            for row in rows
+        ]
+        return Response({"results": results, "next_cursor": next_cursor})
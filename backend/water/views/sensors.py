@@ -4,9 +4,39 @@ from rest_framework.views import APIView
 
 from water.models import Sensor
 from water.serializers import SensorReadingSerializer
+from water.services.downsample import LTTB, METHODS
+from water.services.history import (
+    RAW,
+    RESOLUTIONS,
+    decode_cursor,
+    downsample_buckets,
+    downsampled_series,
+    parse_page_size,
+    parse_points,
+    parse_range,
+    pick_resolution,
+    raw_page,
+    raw_series,
+    rollup_series,
+)
+from water.services.rollups import METRICS
 
 
 class SensorHistoryView(APIView):
+    """
+    Sensor history. With ``range`` (24h, 7d, 4w) or ``start``/``end`` it
+    returns the range oldest first, as raw readings or hourly/daily rollup
+    buckets; the resolution is picked from the span unless ``resolution`` is
+    given.
+
+    Raw readings can also be paged newest first: without a range, or with
+    ``cursor`` / ``page_size``, the response holds one page (HISTORY_PAGE_SIZE
+    by default) and ``next_cursor`` to pass back for the next, older page.
+
+    ``points=N`` downsamples a range to at most N chart points on ``metric``
+    (default distance_cm) with ``downsample=lttb`` (default) or ``minmax``.
+    """
+
     authentication_classes = []
     permission_classes = []
 
@@ -20,11 +50,64 @@ class SensorHistoryView(APIView):
         except Sensor.DoesNotExist:
             return Response({"detail": "Sensor not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        readings = sensor.readings.all()[:200]
-        data = SensorReadingSerializer(readings, many=True).data
-        return Response({"device_id": device_id, "readings": data})
-
-
+        params = request.query_params
+        ranged = bool(params.get("range") or params.get("start"))
+        paginated = not ranged or bool(params.get("cursor")) or "page_size" in params
+        try:
+            start, end = parse_range(params.get("range"), params.get("start"), params.get("end")) if ranged else (None, None)
+            cursor = decode_cursor(params["cursor"]) if params.get("cursor") else None
+            page_size = parse_page_size(params.get("page_size"))
+            points = parse_points(params.get("points"))
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        metric = params.get("metric", "distance_cm")
+        method = params.get("downsample", LTTB)
+        if points:
+            if paginated:
+                return Response(
+                    {"detail": "points needs range or start and cannot be combined with cursor or page_size"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if metric not in METRICS:
+                return Response({"detail": f"metric must be one of {', '.join(METRICS)}"}, status=status.HTTP_400_BAD_REQUEST)
+            if method not in METHODS:
+                return Response({"detail": f"downsample must be one of {', '.join(METHODS)}"}, status=status.HTTP_400_BAD_REQUEST)
 
+        resolution = params.get("resolution", "auto")
+        if resolution == "auto":
+            resolution = RAW if paginated else pick_resolution(start, end, points)
+        elif resolution not in RESOLUTIONS:
+            return Response(
+                {"detail": f"resolution must be auto or one of {', '.join(RESOLUTIONS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        elif paginated and resolution != RAW:
+            return Response(
+                {"detail": "cursor pagination is only available for raw readings"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
+        if paginated:
+            readings, next_cursor = raw_page(sensor, start, end, cursor, page_size)
+            body = {"device_id": device_id, "resolution": RAW}
+            if ranged:
+                body.update(start=start.isoformat(), end=end.isoformat())
+            body["readings"] = SensorReadingSerializer(readings, many=True).data
+            body["next_cursor"] = next_cursor
+            return Response(body)
 
+        body = {"device_id": device_id, "resolution": resolution, "start": start.isoformat(), "end": end.isoformat()}
+        if resolution == RAW and points:
+            readings, source = downsampled_series(sensor, start, end, metric, points, method)
+            body["readings"] = SensorReadingSerializer(readings, many=True).data
+            body["downsample"] = {"method": method, "metric": metric, "points": len(readings), "source_points": source}
+        elif resolution == RAW:
+            body["readings"] = SensorReadingSerializer(raw_series(sensor, start, end), many=True).data
+        else:
+            buckets = rollup_series(sensor, resolution, start, end)
+            if points:
+                source = len(buckets)
+                buckets = downsample_buckets(buckets, metric, points, method)
+                body["downsample"] = {"method": method, "metric": metric, "points": len(buckets), "source_points": source}
+            body["buckets"] = buckets
+        return Response(body)